@@ -1,42 +1,37 @@
 import streamlit as st
-import google.generativeai as genai
 from dotenv import load_dotenv
 import os
 from audio_recorder_streamlit import audio_recorder
-import speech_recognition as sr
-import io
-import tempfile
-from gtts import gTTS
+import hashlib
+import logging
+import sys
+import time
+import uuid
+import wave
+from tts_pipeline import SpeechPipeline, mp3_duration, synthesize_long_text
+from tts_cache import tts_cache_key
+from tts_worker import BUSY, FAILED, READY, TTSWorker
+from conversation_context import DEFAULT_TOKEN_BUDGET, ConversationContext, make_model_summarizer
+from response_cache import DEFAULT_SQLITE_PATH, ResponseCache, context_fingerprint, create_backend, response_cache_key
+from turn_manager import CancelledTurn, TurnManager
+from chat_html import assistant_bubble_html, message_html, read_styles
+from metrics import LatencyMetrics, start_metrics_server
+from audio_store import DEFAULT_SESSION_QUOTA, AudioStore
+from assistant_core import (ERROR_MESSAGES, LANGUAGES, PERSONALITIES, create_ai_model, create_gemini_client,
+                            create_summary_model, dispatch_voice_command, finish_speech, get_stt_backend,
+                            get_tts_cache, stream_reply, transcribe_audio)
+from model_warmup import DEFAULT_KEEPALIVE_SECONDS, ModelWarmer
+from conversation_store import DEFAULT_SQLITE_PATH as DEFAULT_CONVERSATION_DB
+from conversation_store import ConversationStore, new_conversation_id
+from conversation_store import create_backend as create_conversation_backend
+from live_mic import live_mic
+
+logger = logging.getLogger(__name__)
 
 # Load environment variables
 load_dotenv()
 
-# Configure Gemini API
-genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
-
-# Personality configurations
-PERSONALITIES = {
-    "General Assistant": {
-        "name": "General Assistant",
-        "icon": "🤖",
-        "system_prompt": "You are a helpful and friendly AI assistant. You provide clear, accurate, and concise responses to user questions across a wide range of topics."
-    },
-    "Study Buddy": {
-        "name": "Study Buddy",
-        "icon": "📚",
-        "system_prompt": "You are a supportive study companion. You help students understand concepts, explain topics clearly, provide study tips, and encourage learning. Use examples and break down complex ideas into simpler parts."
-    },
-    "Fitness Coach": {
-        "name": "Fitness Coach",
-        "icon": "💪",
-        "system_prompt": "You are an enthusiastic fitness coach. You provide workout advice, nutrition tips, motivation, and guidance on healthy lifestyle choices. You encourage users to stay active and make positive health decisions."
-    },
-    "Gaming Helper": {
-        "name": "Gaming Helper",
-        "icon": "🎮",
-        "system_prompt": "You are a knowledgeable gaming companion. You help with game strategies, tips, recommendations, and gaming culture discussions. You're enthusiastic about games and help players improve their skills."
-    }
-}
+# The Gemini SDK is configured on first use (see assistant_core.get_genai) - importing it takes about a second
 
 # Page configuration
 st.set_page_config(
@@ -46,302 +41,32 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+def inject_styles():
+    """Link the stylesheet served from static/, or inline it when static serving is off"""
+    css, version = read_styles()
+    if st.get_option("server.enableStaticServing"):
+        st.markdown(f'<link rel="stylesheet" href="app/static/styles.css?v={version}">', unsafe_allow_html=True)
+    else:
+        st.markdown(f"<style>{css}</style>", unsafe_allow_html=True)
+
 # Custom CSS for modern design with complementary color theory
-st.markdown("""
-<style>
-    /* Color Palette - Analogous Harmony (Blues and Purples) */
-    :root {
-        --primary: #4F46E5;        /* Indigo */
-        --secondary: #7C3AED;      /* Purple */
-        --accent: #06B6D4;         /* Cyan (complementary) */
-        --success: #10B981;        /* Green */
-        --warning: #F59E0B;        /* Amber */
-        --danger: #EF4444;         /* Red */
-        --background: #F8FAFC;     /* Light gray */
-        --surface: #FFFFFF;        /* White */
-        --text-primary: #1E293B;   /* Dark slate */
-        --text-secondary: #64748B; /* Slate */
-    }
-
-    /* Main container - Light background with subtle gradient */
-    .main {
-        background: linear-gradient(135deg, #EEF2FF 0%, #F1F5F9 50%, #E0F2FE 100%);
-        padding: 2rem;
-    }
-
-    /* Improve main block container */
-    .block-container {
-        padding: 2rem 3rem;
-        max-width: 1200px;
-    }
-
-    /* Sidebar - Primary color gradient */
-    [data-testid="stSidebar"] {
-        background: linear-gradient(180deg, var(--primary) 0%, var(--secondary) 100%);
-        box-shadow: 4px 0 24px rgba(79, 70, 229, 0.15);
-    }
-
-    [data-testid="stSidebar"] * {
-        color: white !important;
-    }
-
-    [data-testid="stSidebar"] .stSelectbox [data-baseweb="select"] {
-        background-color: rgba(255, 255, 255, 0.1) !important;
-        border-color: rgba(255, 255, 255, 0.3) !important;
-    }
-
-    /* Button styling with color-coded purposes */
-    .stButton > button {
-        border-radius: 12px;
-        font-weight: 600;
-        padding: 0.6rem 1.5rem;
-        transition: all 0.3s cubic-bezier(0.4, 0, 0.2, 1);
-        border: none;
-        box-shadow: 0 2px 8px rgba(0, 0, 0, 0.1);
-    }
-
-    .stButton > button[kind="primary"] {
-        background: linear-gradient(135deg, var(--primary) 0%, var(--secondary) 100%);
-        color: white;
-    }
-
-    .stButton > button[kind="primary"]:hover {
-        transform: translateY(-2px);
-        box-shadow: 0 8px 20px rgba(79, 70, 229, 0.3);
-    }
-
-    .stButton > button:not([kind="primary"]) {
-        background-color: var(--surface);
-        color: var(--text-primary);
-        border: 2px solid var(--accent);
-    }
-
-    .stButton > button:not([kind="primary"]):hover {
-        background-color: var(--accent);
-        color: white;
-        transform: translateY(-2px);
-    }
-
-    /* Text area with accent border */
-    .stTextArea textarea {
-        border-radius: 12px;
-        border: 2px solid #E2E8F0 !important;
-        padding: 1rem;
-        font-size: 1rem;
-        transition: all 0.3s ease;
-    }
-
-    .stTextArea textarea:focus {
-        border-color: var(--accent) !important;
-        box-shadow: 0 0 0 3px rgba(6, 182, 212, 0.1) !important;
-    }
-
-    /* Info boxes with color coding */
-    .stInfo {
-        background: linear-gradient(135deg, #DBEAFE 0%, #E0F2FE 100%);
-        border-left: 4px solid var(--accent);
-        border-radius: 12px;
-        padding: 1rem;
-        color: var(--text-primary) !important;
-    }
-
-    .stSuccess {
-        background: linear-gradient(135deg, #D1FAE5 0%, #A7F3D0 100%);
-        border-left: 4px solid var(--success);
-        border-radius: 12px;
-        color: var(--text-primary) !important;
-    }
-
-    .stWarning {
-        background: linear-gradient(135deg, #FEF3C7 0%, #FDE68A 100%);
-        border-left: 4px solid var(--warning);
-        border-radius: 12px;
-        color: var(--text-primary) !important;
-    }
-
-    .stError {
-        background: linear-gradient(135deg, #FEE2E2 0%, #FECACA 100%);
-        border-left: 4px solid var(--danger);
-        border-radius: 12px;
-        color: var(--text-primary) !important;
-    }
-
-    /* Title with gradient */
-    h1 {
-        background: linear-gradient(135deg, var(--primary) 0%, var(--secondary) 50%, var(--accent) 100%);
-        -webkit-background-clip: text;
-        -webkit-text-fill-color: transparent;
-        background-clip: text;
-        font-weight: 800;
-        font-size: 3rem;
-        margin-bottom: 0.5rem;
-    }
-
-    /* Subtitles */
-    h2, h3 {
-        color: var(--primary);
-        font-weight: 700;
-    }
-
-    /* Chat message styling - More specific selectors */
-    [data-testid="stChatMessage"] {
-        background: white !important;
-        border-radius: 16px !important;
-        padding: 1.25rem !important;
-        margin: 0.75rem 0 !important;
-        box-shadow: 0 4px 16px rgba(0, 0, 0, 0.1) !important;
-        border: 2px solid #E2E8F0 !important;
-    }
-
-    /* User messages - Indigo/Purple */
-    [data-testid="stChatMessageContent"]:has(+ [data-testid="chatAvatarIcon-user"]),
-    .stChatMessage:has([data-testid="chatAvatarIcon-user"]) {
-        background: linear-gradient(135deg, #EEF2FF 0%, #E0E7FF 100%) !important;
-        border-left: 5px solid #4F46E5 !important;
-    }
-
-    /* Assistant messages - Cyan */
-    [data-testid="stChatMessageContent"]:has(+ [data-testid="chatAvatarIcon-assistant"]),
-    .stChatMessage:has([data-testid="chatAvatarIcon-assistant"]) {
-        background: linear-gradient(135deg, #ECFEFF 0%, #CFFAFE 100%) !important;
-        border-left: 5px solid #06B6D4 !important;
-    }
-
-    /* Ensure chat message content is visible */
-    [data-testid="stChatMessageContent"] {
-        color: var(--text-primary) !important;
-    }
-
-    /* Caption text */
-    .stCaption {
-        color: var(--text-secondary) !important;
-        font-weight: 500;
-    }
-
-    /* Divider */
-    hr {
-        border: none;
-        height: 2px;
-        background: linear-gradient(90deg, transparent 0%, var(--accent) 50%, transparent 100%);
-        margin: 2rem 0;
-    }
-
-    /* Spinner color */
-    .stSpinner > div {
-        border-top-color: var(--primary) !important;
-    }
-
-    /* Mobile-friendly responsive styles */
-    @media (max-width: 768px) {
-        /* Reduce padding on mobile */
-        .stApp {
-            padding: 0.5rem !important;
-        }
-
-        /* Stack columns on mobile */
-        [data-testid="column"] {
-            width: 100% !important;
-            flex: 100% !important;
-        }
-
-        /* Make buttons full width on mobile */
-        .stButton > button {
-            width: 100% !important;
-            margin-bottom: 0.5rem !important;
-        }
-
-        /* Adjust text area height on mobile */
-        textarea {
-            min-height: 80px !important;
-        }
-
-        /* Reduce font sizes slightly on mobile */
-        h1 {
-            font-size: 1.75rem !important;
-        }
-
-        h2 {
-            font-size: 1.5rem !important;
-        }
-
-        h3 {
-            font-size: 1.25rem !important;
-        }
-
-        /* Make status cards stack on mobile */
-        [data-testid="stHorizontalBlock"] > div {
-            flex-direction: column !important;
-        }
-    }
-
-    /* Tablet styles */
-    @media (max-width: 1024px) and (min-width: 769px) {
-        .stApp {
-            padding: 1rem !important;
-        }
-    }
-
-    /* Improve audio player responsiveness */
-    audio {
-        max-width: 100% !important;
-        width: 100% !important;
-    }
-</style>
-""", unsafe_allow_html=True)
+# Served once as a static file the browser caches, instead of ~10 KB of <style> on every rerun
+inject_styles()
+
+# TTS language codes back to LANGUAGES names, for labelling background TTS timings
+TTS_LANGUAGE_NAMES = {settings["tts_code"]: name for name, settings in LANGUAGES.items()}
+
+# Messages rendered per page of chat history
+HISTORY_PAGE_SIZE = 20
 
-# Language support configuration
-LANGUAGES = {
-    "English": {"code": "en-US", "flag": "🇺🇸", "tts_code": "en", "name": "English"},
-    "Spanish": {"code": "es-ES", "flag": "🇪🇸", "tts_code": "es", "name": "Spanish"},
-    "French": {"code": "fr-FR", "flag": "🇫🇷", "tts_code": "fr", "name": "French"},
-    "German": {"code": "de-DE", "flag": "🇩🇪", "tts_code": "de", "name": "German"},
-    "Chinese (Mandarin)": {"code": "zh-CN", "flag": "🇨🇳", "tts_code": "zh-CN", "name": "Chinese (Mandarin)"},
-    "Japanese": {"code": "ja-JP", "flag": "🇯🇵", "tts_code": "ja", "name": "Japanese"},
-    "Korean": {"code": "ko-KR", "flag": "🇰🇷", "tts_code": "ko", "name": "Korean"},
-    "Italian": {"code": "it-IT", "flag": "🇮🇹", "tts_code": "it", "name": "Italian"},
-    "Portuguese": {"code": "pt-PT", "flag": "🇵🇹", "tts_code": "pt", "name": "Portuguese"},
-    "Russian": {"code": "ru-RU", "flag": "🇷🇺", "tts_code": "ru", "name": "Russian"},
-    "Arabic": {"code": "ar-SA", "flag": "🇸🇦", "tts_code": "ar", "name": "Arabic"},
-    "Hindi": {"code": "hi-IN", "flag": "🇮🇳", "tts_code": "hi", "name": "Hindi"}
-}
-
-# Voice commands configuration
-VOICE_COMMANDS = {
-    # Chat control commands
-    "clear chat": "clear_chat",
-    "clear conversation": "clear_chat",
-    "delete chat": "clear_chat",
-    "erase chat": "clear_chat",
-
-    # Personality change commands
-    "change personality to general": "General Assistant",
-    "change personality to study": "Study Buddy",
-    "change personality to fitness": "Fitness Coach",
-    "change personality to gaming": "Gaming Helper",
-    "switch to general": "General Assistant",
-    "switch to study": "Study Buddy",
-    "switch to fitness": "Fitness Coach",
-    "switch to gaming": "Gaming Helper",
-    "become general assistant": "General Assistant",
-    "become study buddy": "Study Buddy",
-    "become fitness coach": "Fitness Coach",
-    "become gaming helper": "Gaming Helper",
-
-    # TTS speed commands
-    "speak slower": "slow_down",
-    "slow down": "slow_down",
-    "talk slower": "slow_down",
-    "speak faster": "speed_up",
-    "speed up": "speed_up",
-    "talk faster": "speed_up",
-    "normal speed": "normal_speed",
-
-    # Help command
-    "help": "show_help",
-    "show commands": "show_help",
-    "what can you do": "show_help",
-    "list commands": "show_help"
-}
+# Maximum estimated prompt tokens sent to Gemini per request
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", DEFAULT_TOKEN_BUDGET))
+
+# Reply audio each session keeps in memory; older clips are fetched again from the shared cache
+SESSION_AUDIO_QUOTA = int(os.getenv("SESSION_AUDIO_QUOTA_KB", DEFAULT_SESSION_QUOTA // 1024)) * 1024
+
+# Voice API (python voice_server.py) that live microphone input streams to; live input is off without it
+VOICE_API_URL = os.getenv("VOICE_API_URL", "")
 
 # Initialize session state
 if "messages" not in st.session_state:
@@ -363,53 +88,345 @@ if "command_executed" not in st.session_state:
     st.session_state.command_executed = None
 
 if "tts_audio" not in st.session_state:
-    st.session_state.tts_audio = {}
+    st.session_state.tts_audio = AudioStore(SESSION_AUDIO_QUOTA)  # Clip bytes by message handle
 
 if "processing" not in st.session_state:
     st.session_state.processing = False
 
-if "last_audio_bytes" not in st.session_state:
-    st.session_state.last_audio_bytes = None
+if "resume_audio" not in st.session_state:
+    st.session_state.resume_audio = None  # (message handle, seconds already played) of the streamed reply
 
 if "tts_speed_slow" not in st.session_state:
     st.session_state.tts_speed_slow = False  # Normal speed by default
 
+if "session_id" not in st.session_state:
+    st.session_state.session_id = uuid.uuid4().hex  # Identifies this session's background TTS jobs
 
-# Cache the model creation for faster performance
+if "turn_spans" not in st.session_state:
+    st.session_state.turn_spans = {}  # Stage timings of the turn in progress
+
+if "show_performance" not in st.session_state:
+    st.session_state.show_performance = False
+
+if "turn_manager" not in st.session_state:
+    st.session_state.turn_manager = TurnManager()  # Turn ids so new input can cancel a stale reply
+
+if "use_response_cache" not in st.session_state:
+    st.session_state.use_response_cache = False  # Opt-in reuse of answers to repeated prompts
+
+if "history_window" not in st.session_state:
+    st.session_state.history_window = HISTORY_PAGE_SIZE  # Number of recent messages rendered
+
+if "stream_responses" not in st.session_state:
+    st.session_state.stream_responses = True  # Render replies as they arrive
+
+if "live_input" not in st.session_state:
+    st.session_state.live_input = False  # Stream the microphone with partial transcripts
+
+if "live_event_seq" not in st.session_state:
+    st.session_state.live_event_seq = 0  # Last live transcript event handled
+
+if "live_utterance_started" not in st.session_state:
+    st.session_state.live_utterance_started = False  # The utterance being transcribed has already barged in
+
+# Settings stored with each conversation, restored when it is reopened
+PERSISTED_SETTINGS = ("personality", "selected_language", "tts_speed_slow")
+
+# Conversations live in the store chosen by CONVERSATION_STORE (memory, sqlite or redis), so any
+# app process can reopen them and they survive restarts
 @st.cache_resource
+def get_conversation_store():
+    """Create the conversation store"""
+    backend = create_conversation_backend(
+        os.getenv("CONVERSATION_STORE", "memory"),
+        path=os.getenv("CONVERSATION_STORE_PATH", DEFAULT_CONVERSATION_DB),
+        redis_url=os.getenv("REDIS_URL")
+    )
+    return ConversationStore(backend)
+
+def save_settings():
+    """Persist the conversation's personality, language and speech speed"""
+    get_conversation_store().save_settings(
+        st.session_state.conversation_id,
+        {name: st.session_state[name] for name in PERSISTED_SETTINGS}
+    )
+
+def open_conversation(conversation_id):
+    """Load a stored conversation's settings and its newest page of messages"""
+    store = get_conversation_store()
+    settings = store.load_settings(conversation_id)
+    if settings.get("personality") in PERSONALITIES:
+        st.session_state.personality = settings["personality"]
+    if settings.get("selected_language") in LANGUAGES:
+        st.session_state.selected_language = settings["selected_language"]
+    st.session_state.tts_speed_slow = bool(settings.get("tts_speed_slow", st.session_state.tts_speed_slow))
+
+    messages, offset = store.recent_messages(conversation_id, HISTORY_PAGE_SIZE)
+    if messages and messages[-1]["role"] == "user":
+        # Its reply died with the process that was generating it - don't answer it twice
+        messages[-1]["interrupted"] = True
+
+    st.session_state.conversation_id = conversation_id
+    st.session_state.messages = messages
+    st.session_state.history_offset = offset  # Sequence number of the first loaded message
+    st.query_params["conversation"] = conversation_id
+
+def start_new_conversation():
+    """Switch to an empty conversation (the previous one stays in the store)"""
+    st.session_state.conversation_id = new_conversation_id()
+    st.session_state.messages = []
+    st.session_state.history_offset = 0
+    st.query_params["conversation"] = st.session_state.conversation_id
+    save_settings()
+
+def add_message(message):
+    """Append a message to the chat and to the conversation store"""
+    st.session_state.messages.append(message)
+    get_conversation_store().append_message(st.session_state.conversation_id, message)
+
+def load_earlier_messages(count):
+    """Fetch up to `count` older messages from the store into the session"""
+    older, offset = get_conversation_store().messages_before(
+        st.session_state.conversation_id, st.session_state.history_offset, count
+    )
+    st.session_state.messages = older + st.session_state.messages
+    st.session_state.history_offset = offset
+    # Message positions shifted, so rebuild the summary from the new start
+    get_conversation_context().reset()
+
+# The URL carries the conversation id, so a reload or another app process reopens the same chat
+if "conversation_id" not in st.session_state:
+    if st.query_params.get("conversation"):
+        open_conversation(st.query_params["conversation"])
+    else:
+        start_new_conversation()
+
+
+# Every session's Gemini calls share one rate limiter sized to the API quota (GEMINI_RPM, GEMINI_BURST)
+@st.cache_resource(show_spinner=False)
+def get_gemini_client():
+    """Create the process-wide Gemini client and export its queue metrics"""
+    metrics = get_metrics()
+    client = create_gemini_client(
+        on_wait=lambda seconds, personality, language: metrics.observe("gemini_queue", seconds, personality, language)
+    )
+    metrics.register_value("gemini_queue_depth", "Gemini requests waiting for a rate limit token",
+                           lambda: client.stats()["queue_depth"])
+    metrics.register_value("gemini_in_flight", "Gemini API calls in progress",
+                           lambda: client.stats()["in_flight"])
+    for name, description in [
+        ("requests", "Gemini API calls made"),
+        ("coalesced", "Requests answered by an identical call already in flight"),
+        ("throttled", "429 responses from Gemini"),
+        ("retries", "Gemini calls retried after a 429")
+    ]:
+        metrics.register_value(f"gemini_{name}_total", description,
+                               lambda name=name: client.stats()[name], kind="counter")
+    return client
+
+# Cache the model creation for faster performance
+@st.cache_resource(show_spinner=False)
 def get_ai_model(personality, language):
     """Create and cache the AI model for the given personality and language"""
-    # Get the base system prompt
-    base_prompt = PERSONALITIES[personality]["system_prompt"]
-
-    # Add language instruction if not English
-    if language != "English":
-        language_name = LANGUAGES[language]["name"]
-        language_instruction = f"\n\nIMPORTANT: Please respond in {language_name}. The user will communicate in {language_name}, and you should respond entirely in {language_name}."
-        system_prompt = base_prompt + language_instruction
-    else:
-        system_prompt = base_prompt
+    return create_ai_model(personality, language, get_gemini_client())
 
-    return genai.GenerativeModel(
-        'gemini-2.5-flash',
-        system_instruction=system_prompt
+@st.cache_resource
+def get_summary_model():
+    """Create the model used to fold older turns into the running summary"""
+    return create_summary_model(get_gemini_client())
+
+# GEMINI_WARMUP=1 builds every personality x language model and opens the API connection at server start
+@st.cache_resource
+def get_model_warmer():
+    """Create the model warmer (started in the background only when GEMINI_WARMUP is set)"""
+    def ping():
+        # Every model shares the SDK's default client, so one count_tokens call warms them all
+        get_ai_model("General Assistant", "English").model.count_tokens("ping")
+
+    warmer = ModelWarmer(
+        get_ai_model,
+        [(personality, language) for personality in PERSONALITIES for language in LANGUAGES],
+        ping=ping,
+        keepalive=float(os.getenv("GEMINI_KEEPALIVE_SECONDS", DEFAULT_KEEPALIVE_SECONDS))
+    )
+    if os.getenv("GEMINI_WARMUP", "").lower() in ("1", "true", "yes"):
+        warmer.start()
+    return warmer
+
+def get_conversation_context():
+    """Return this session's token-budgeted conversation context"""
+    if "conversation_context" not in st.session_state:
+        st.session_state.conversation_context = ConversationContext(
+            token_budget=CONTEXT_TOKEN_BUDGET,
+            summarize=make_model_summarizer(get_summary_model())
+        )
+    return st.session_state.conversation_context
+
+# Cache of replies to repeated prompts, shared by every session
+@st.cache_resource
+def get_response_cache():
+    """Create the response cache with the backend chosen by RESPONSE_CACHE_BACKEND"""
+    backend = create_backend(
+        os.getenv("RESPONSE_CACHE_BACKEND", "memory"),
+        path=os.getenv("RESPONSE_CACHE_PATH", DEFAULT_SQLITE_PATH)
+    )
+    return ResponseCache(backend, ttl=int(os.getenv("RESPONSE_CACHE_TTL", 24 * 60 * 60)))
+
+# Stage latency histograms shared by every session; METRICS_PORT also serves them over HTTP
+@st.cache_resource(show_spinner=False)
+def get_metrics():
+    """Create the latency metrics registry (and its /metrics endpoint if configured)"""
+    metrics = LatencyMetrics()
+    if os.getenv("METRICS_PORT"):
+        try:
+            start_metrics_server(metrics, int(os.getenv("METRICS_PORT")), os.getenv("METRICS_HOST", "127.0.0.1"))
+        except (OSError, ValueError) as e:
+            # Metrics are optional - never keep the app from starting
+            logger.warning("Metrics endpoint not started: %s", e)
+    return metrics
+
+def stage_span(stage):
+    """Time a stage for the current personality and language, as part of this session's turn"""
+    return get_metrics().span(
+        stage,
+        st.session_state.personality,
+        st.session_state.selected_language,
+        spans=st.session_state.turn_spans
     )
 
-def generate_tts_audio(text, language="en", slow=False):
-    """Generate TTS audio from text using gTTS"""
-    try:
-        # Create TTS object with speed control
-        tts = gTTS(text=text, lang=language, slow=slow)
+def finish_turn_metrics():
+    """Publish the finished turn's stage timings to the recent-turns view"""
+    if st.session_state.turn_spans:
+        get_metrics().record_turn(
+            st.session_state.personality,
+            st.session_state.selected_language,
+            st.session_state.turn_spans
+        )
+    st.session_state.turn_spans = {}
+
+def timed_synthesize(text, language="en", slow=False):
+    """synthesize_long_text, timed as the tts stage (background clips have no personality)"""
+    with get_metrics().span("tts", language=TTS_LANGUAGE_NAMES.get(language, language)):
+        return synthesize_long_text(text, language=language, slow=slow)
+
+# Background TTS worker shared by every session, writing into the shared cache
+@st.cache_resource
+def get_tts_worker():
+    """Start the background TTS worker threads"""
+    return TTSWorker(get_tts_cache(), synthesize=timed_synthesize)
 
-        # Save to bytes buffer
-        audio_buffer = io.BytesIO()
-        tts.write_to_fp(audio_buffer)
-        audio_buffer.seek(0)
+def cancel_pending_audio():
+    """Stop background synthesis for this session's clips (e.g. when the chat is cleared)"""
+    get_tts_worker().cancel_session(st.session_state.session_id)
 
-        return audio_buffer.read()
-    except Exception as e:
-        st.error(f"TTS Error: {str(e)}")
-        return None
+def start_new_turn():
+    """Barge-in: cancel whatever the previous turn is still doing and start a new one"""
+    cancel_pending_audio()
+    st.session_state.processing = False
+
+    # A question whose reply was cut off stays in the history but is not answered any more
+    messages = st.session_state.messages
+    if messages and messages[-1]["role"] == "user":
+        messages[-1]["interrupted"] = True
+
+    return st.session_state.turn_manager.start_turn()
+
+@st.fragment(run_every=1.0)
+def watch_pending_audio(pending_keys, queue_was_busy=False):
+    """Poll the TTS worker and rerun the app once every pending clip has settled"""
+    worker = get_tts_worker()
+    if queue_was_busy and not worker.has_capacity():
+        return
+    if all(worker.is_settled(key) for key in pending_keys):
+        st.rerun()
+
+def play_static_speech(text):
+    """Voice a fixed message from the speech bundle - instant and free, so it never falls back to gTTS"""
+    tts_lang = LANGUAGES[st.session_state.selected_language]["tts_code"]
+    audio = get_tts_cache().bundled(text, tts_lang, st.session_state.tts_speed_slow)
+    if audio is not None:
+        st.audio(audio, format="audio/mp3", autoplay=True)
+
+class SegmentPlayer:
+    """Autoplay a reply's synthesized sentences one after another in a single audio element
+
+    A segment starts once the previous one has had time to finish (its
+    length is read from the MP3 frames), so the sentences play in order.
+    """
+
+    def __init__(self, speech_pipeline, audio_placeholder):
+        self.speech_pipeline = speech_pipeline
+        self.audio_placeholder = audio_placeholder
+        self.played = 0
+        self.offset = 0.0      # Where the playing segment starts within the whole reply
+        self.duration = 0.0    # Length of the playing segment
+        self.started = 0.0     # perf_counter time it started
+
+    def poll(self):
+        """Start the next ready segment if the previous one has finished"""
+        now = time.perf_counter()
+        if self.played and now < self.started + self.duration:
+            return
+        segments = self.speech_pipeline.ready_segments()
+        if self.played < len(segments):
+            segment = segments[self.played]
+            # A distinct label per sentence keeps repeated sentences from sharing an element id
+            self.audio_placeholder.audio(
+                segment, format="audio/mp3", autoplay=True, alt=f"Reply sentence {self.played + 1}"
+            )
+            self.offset += self.duration
+            self.duration = mp3_duration(segment)
+            self.started = now
+            self.played += 1
+
+    def position(self):
+        """Seconds of the reply heard so far - where the joined clip should resume"""
+        if not self.played:
+            return 0.0
+        return self.offset + min(time.perf_counter() - self.started, self.duration)
+
+def stream_ai_response(model, prompt, placeholder, speech_pipeline=None, player=None, turn=None):
+    """Stream a Gemini reply into the placeholder and return the text with its timings
+
+    Raises CancelledTurn as soon as the turn is superseded, which abandons the stream.
+    """
+    def show(delta, reply):
+        # Show a cursor while more chunks are still arriving
+        placeholder.markdown(assistant_bubble_html(reply + " ▌"), unsafe_allow_html=True)
+
+    full_response, timing = stream_reply(
+        model, prompt, show, speech_pipeline,
+        on_speech=player.poll if player is not None else None,
+        check=turn.check if turn is not None else None
+    )
+    placeholder.markdown(assistant_bubble_html(full_response), unsafe_allow_html=True)
+    return full_response, timing
+
+# Start the warm-up on the first run (once every helper it calls is defined)
+get_model_warmer()
+
+def run_voice_command(text, language_code):
+    """Apply the voice command spoken in text; returns False when text is not a command"""
+    command = dispatch_voice_command(
+        text, language_code, st.session_state.personality, st.session_state.tts_speed_slow
+    )
+    if command is None:
+        return False
+
+    if command["clear_chat"]:
+        cancel_pending_audio()
+        get_conversation_context().reset()
+        start_new_conversation()
+        st.session_state.tts_audio.clear()
+        st.session_state.history_window = HISTORY_PAGE_SIZE
+    if (command["personality"], command["slow"]) != (st.session_state.personality, st.session_state.tts_speed_slow):
+        st.session_state.personality = command["personality"]
+        st.session_state.tts_speed_slow = command["slow"]
+        save_settings()
+    if command["reply"]:
+        add_message({"role": "assistant", "content": command["reply"]})
+    st.session_state.command_executed = command["confirmation"]
+    return True
 
 # Sidebar
 with st.sidebar:
@@ -425,7 +442,8 @@ with st.sidebar:
     # Update personality if changed
     if selected_personality != st.session_state.personality:
         st.session_state.personality = selected_personality
-        st.session_state.messages = []  # Clear chat history on personality change
+        start_new_conversation()  # Clear chat history on personality change
+        get_conversation_context().reset()
         st.rerun()
 
     # Display personality info
@@ -454,13 +472,37 @@ with st.sidebar:
     selected_lang = selected_lang_display.split(" ", 1)[1]
     if selected_lang != st.session_state.selected_language:
         st.session_state.selected_language = selected_lang
-        # Clear the cached model so it regenerates with new language instruction
-        get_ai_model.clear()
+        save_settings()
+        # Models are cached per personality and language, so the pre-warmed ones stay valid
         st.success(f"Language changed to {LANGUAGES[selected_lang]['flag']} {selected_lang}")
         st.rerun()
 
     st.markdown("---")
 
+    # Streaming toggle - show replies as they are generated
+    st.session_state.stream_responses = st.checkbox(
+        "⚡ Stream AI responses",
+        value=st.session_state.stream_responses,
+        help="Show the reply word by word while Gemini is still generating it"
+    )
+
+    # Response cache toggle - answer repeated questions without an API call
+    st.session_state.use_response_cache = st.checkbox(
+        "♻️ Reuse answers to repeated questions",
+        value=st.session_state.use_response_cache,
+        help="Serve identical questions in the same context from a cache instead of calling Gemini again"
+    )
+
+    # Live microphone toggle - partial transcripts while speaking, via the voice API
+    if VOICE_API_URL:
+        st.session_state.live_input = st.checkbox(
+            "🎙️ Live transcription",
+            value=st.session_state.live_input,
+            help="Stream the microphone while you speak and show the transcript as it is recognized"
+        )
+
+    st.markdown("---")
+
     # Voice Settings in an expandable section
     with st.expander("🎙️ Voice Settings & Tips", expanded=False):
         st.markdown("""
@@ -491,10 +533,85 @@ with st.sidebar:
     st.markdown("---")
     # Clear chat button
     if st.button("Clear Chat History", use_container_width=True):
-        st.session_state.messages = []
-        st.session_state.tts_audio = {}
+        cancel_pending_audio()
+        get_conversation_context().reset()
+        start_new_conversation()
+        st.session_state.tts_audio.clear()
+        st.session_state.history_window = HISTORY_PAGE_SIZE
         st.rerun()
 
+    # Shared TTS cache counters
+    tts_stats = get_tts_cache().stats()
+    st.caption(
+        f"🗄️ TTS cache: {tts_stats['bundle_hits'] + tts_stats['memory_hits'] + tts_stats['disk_hits']} hits · "
+        f"{tts_stats['misses']} misses · {tts_stats['memory_bytes'] // 1024} KB in memory"
+        + (f" · {tts_stats['bundle_clips']} pre-rendered clips" if tts_stats["bundle_clips"] else "")
+    )
+    audio_stats = st.session_state.tts_audio.stats()
+    st.caption(
+        f"🔈 Session audio: {audio_stats['clips']} clips · {audio_stats['bytes'] // 1024} of "
+        f"{audio_stats['quota_bytes'] // 1024} KB · {audio_stats['evictions']} evicted"
+    )
+    # Only once voice input has loaded the STT engine - don't import it just for this caption
+    stt_stats = get_stt_backend().stats() if "speech_to_text" in sys.modules else {"calls": 0}
+    if stt_stats["calls"]:
+        st.caption(
+            f"🎧 STT ({stt_stats['backend']}): {stt_stats['calls']} calls · "
+            f"p50 {stt_stats['p50_ms']:.0f} ms · p95 {stt_stats['p95_ms']:.0f} ms"
+        )
+    if st.session_state.use_response_cache:
+        response_stats = get_response_cache().stats()
+        st.caption(
+            f"♻️ Response cache: {response_stats['hits']} hits · {response_stats['misses']} misses · "
+            f"{response_stats['hit_rate']:.0%} hit rate"
+        )
+
+    # Where the time goes: stage latencies across the server and the latest turns
+    st.session_state.show_performance = st.checkbox(
+        "📈 Show performance panel",
+        value=st.session_state.show_performance,
+        help="Latency of speech recognition, Gemini, TTS and page rendering"
+    )
+    if st.session_state.show_performance:
+        metrics = get_metrics()
+        with st.expander("📈 Performance", expanded=True):
+            summary = metrics.summary()
+            if not summary:
+                st.caption("No timings recorded yet")
+            for stage, row in summary.items():
+                st.caption(
+                    f"**{stage}** · {row['count']} · mean {row['mean'] * 1000:.0f} ms · "
+                    f"p50 {row['p50'] * 1000:.0f} ms · p95 {row['p95'] * 1000:.0f} ms"
+                )
+
+            gemini_stats = get_gemini_client().stats()
+            st.caption(
+                f"**Gemini queue** · {gemini_stats['queue_depth']} waiting (max {gemini_stats['max_queue_depth']}) · "
+                f"wait p95 {gemini_stats['wait_p95'] * 1000:.0f} ms · {gemini_stats['coalesced']} coalesced · "
+                f"{gemini_stats['throttled']} throttled"
+            )
+
+            warmer_stats = get_model_warmer().stats()
+            st.caption(
+                f"**Model warm-up** · {warmer_stats['built']}/{warmer_stats['total']} models · "
+                f"connection {'warm' if warmer_stats['transport_warm'] else 'cold'} · "
+                f"{warmer_stats['pings']} keep-alive pings"
+            )
+
+            recent_turns = metrics.recent_turns()[-5:]
+            if recent_turns:
+                st.markdown("**Recent turns**")
+            for turn_record in reversed(recent_turns):
+                stages = " · ".join(f"{stage} {seconds:.2f}s" for stage, seconds in turn_record["spans"].items())
+                st.caption(f"{turn_record['personality']} · {turn_record['language']} · {stages}")
+
+            st.download_button(
+                "⬇️ Export (Prometheus)",
+                metrics.to_prometheus(),
+                file_name="voice_assistant_metrics.txt",
+                use_container_width=True
+            )
+
 # Main chat interface
 st.title(f"💬 AI Voice Assistant")
 
@@ -545,80 +662,103 @@ st.markdown("### 💬 Conversation History")
 # Create a container for chat messages
 chat_container = st.container()
 
+render_start = time.perf_counter()
 with chat_container:
     if len(st.session_state.messages) == 0:
         st.info("👋 No messages yet. Start a conversation by typing or using voice input below!")
     else:
+        # Clips still being synthesized in the background
+        pending_audio_keys = []
+        audio_queue_busy = False
+
+        # Only render the most recent messages so rerun cost stays flat as history grows
+        # Older pages stay in the conversation store until asked for
+        first_visible = max(0, len(st.session_state.messages) - st.session_state.history_window)
+        hidden_messages = st.session_state.history_offset + first_visible
+        if hidden_messages > 0:
+            if st.button(f"⬆️ Load earlier messages ({hidden_messages} hidden)", use_container_width=True):
+                st.session_state.history_window += HISTORY_PAGE_SIZE
+                if st.session_state.history_window > len(st.session_state.messages):
+                    load_earlier_messages(st.session_state.history_window - len(st.session_state.messages))
+                st.rerun()
+
         # Display chat messages with custom styling
-        for idx, message in enumerate(st.session_state.messages):
+        for message in st.session_state.messages[first_visible:]:
             if message["role"] == "user":
                 # User message with indigo background
-                st.markdown(f"""
-                <div style="background: linear-gradient(135deg, #EEF2FF 0%, #E0E7FF 100%);
-                            border-left: 5px solid #4F46E5;
-                            border-radius: 16px;
-                            padding: 1.25rem;
-                            margin: 0.75rem 0;
-                            box-shadow: 0 4px 16px rgba(0, 0, 0, 0.1);">
-                    <strong style="color: #4F46E5;">👤 You</strong><br>
-                    <div style="margin-top: 0.5rem; color: #1E293B;">{message["content"]}</div>
-                </div>
-                """, unsafe_allow_html=True)
+                st.markdown(message_html("user", message["content"]), unsafe_allow_html=True)
+                if message.get("interrupted"):
+                    st.caption("⏹️ Interrupted by a newer message")
             else:
                 # Assistant message with cyan background
-                st.markdown(f"""
-                <div style="background: linear-gradient(135deg, #ECFEFF 0%, #CFFAFE 100%);
-                            border-left: 5px solid #06B6D4;
-                            border-radius: 16px;
-                            padding: 1.25rem;
-                            margin: 0.75rem 0;
-                            box-shadow: 0 4px 16px rgba(0, 0, 0, 0.1);">
-                    <strong style="color: #06B6D4;">🤖 AI Assistant</strong><br>
-                    <div style="margin-top: 0.5rem; color: #1E293B;">{message["content"]}</div>
-                </div>
-                """, unsafe_allow_html=True)
+                st.markdown(message_html("assistant", message["content"]), unsafe_allow_html=True)
+
+                # Request stats recorded when the reply was generated
+                if message.get("cached"):
+                    st.caption(f"♻️ Cached reply · {message['timing']['ttlt'] * 1000:.1f} ms")
+                elif "timing" in message:
+                    st.caption(
+                        f"🧮 {message['prompt_tokens']} prompt tokens · "
+                        f"first token {message['timing']['ttft']:.2f}s · "
+                        f"complete {message['timing']['ttlt']:.2f}s"
+                    )
 
                 # Display audio player OUTSIDE chat message container
-                message_key = f"msg_{idx}"
+                # Key by content and voice settings so a language or speed change re-voices the message
+                tts_lang = LANGUAGES[st.session_state.selected_language]["tts_code"]
+                message_key = tts_cache_key(message["content"], tts_lang, st.session_state.tts_speed_slow)
 
                 # Add visual separator between message and audio
                 st.markdown("<div style='height: 8px;'></div>", unsafe_allow_html=True)
 
-                if message_key in st.session_state.tts_audio:
+                session_audio = st.session_state.tts_audio.get(message_key)
+                if session_audio is not None:
                     # Audio already generated - display it
                     audio_col1, audio_col2 = st.columns([1, 10])
                     with audio_col1:
                         st.markdown("🔊")
                     with audio_col2:
-                        st.audio(st.session_state.tts_audio[message_key], format="audio/mp3")
+                        if st.session_state.resume_audio and st.session_state.resume_audio[0] == message_key:
+                            # Just streamed: finish speaking the reply from where its sentences left off
+                            st.audio(session_audio, format="audio/mp3",
+                                     start_time=st.session_state.resume_audio[1], autoplay=True)
+                            st.session_state.resume_audio = None
+                        else:
+                            st.audio(session_audio, format="audio/mp3")
                 elif not st.session_state.processing:
-                    # Generate TTS audio if not already generated
-                    message_length = len(message["content"])
-
-                    # Warn for very long messages
-                    if message_length > 500:
-                        st.info(f"📝 Long message ({message_length} chars) - audio generation may take a moment...")
-
-                    with st.spinner("🎵 Generating audio..."):
-                        try:
-                            # Get proper TTS language code from LANGUAGES configuration
-                            tts_lang = LANGUAGES[st.session_state.selected_language]["tts_code"]
-
-                            # Truncate extremely long messages for TTS (optional)
-                            tts_text = message["content"]
-                            if message_length > 1000:
-                                tts_text = message["content"][:1000] + "..."
-                                st.warning("⚠️ Message truncated to 1000 characters for audio")
-
-                            audio_bytes = generate_tts_audio(tts_text, language=tts_lang, slow=st.session_state.tts_speed_slow)
-
-                            if audio_bytes:
-                                st.session_state.tts_audio[message_key] = audio_bytes
-                                st.rerun()
-                            else:
-                                st.error("❌ Audio generation failed. Please refresh or try again.")
-                        except Exception as e:
-                            st.error(f"❌ TTS Error: {str(e)}")
+                    # Ask the background worker for the clip - never block the render loop.
+                    # Clips evicted from the session store come back from the shared cache (or are re-synthesized)
+                    tts_state, tts_result = get_tts_worker().request(
+                        st.session_state.session_id,
+                        message["content"],
+                        language=tts_lang,
+                        slow=st.session_state.tts_speed_slow
+                    )
+
+                    if tts_state == READY:
+                        st.session_state.tts_audio.put(message_key, tts_result)
+                        audio_col1, audio_col2 = st.columns([1, 10])
+                        with audio_col1:
+                            st.markdown("🔊")
+                        with audio_col2:
+                            st.audio(tts_result, format="audio/mp3")
+                    elif tts_state == FAILED:
+                        st.error(f"❌ TTS Error: {tts_result}")
+                    elif tts_state == BUSY:
+                        st.caption("⏳ Audio queue is busy - this message will be voiced shortly")
+                        audio_queue_busy = True
+                    else:
+                        st.caption("🎵 Audio pending...")
+                        pending_audio_keys.append(message_key)
+
+        # Refresh once the pending clips are ready (or the queue has room again)
+        if pending_audio_keys or audio_queue_busy:
+            watch_pending_audio(pending_audio_keys, audio_queue_busy)
+
+# Rendering cost of the chat history on every rerun
+get_metrics().observe(
+    "render", time.perf_counter() - render_start, st.session_state.personality, st.session_state.selected_language
+)
 
 st.markdown("---")
 
@@ -670,17 +810,23 @@ with st.expander("✨ Available Voice Commands", expanded=False):
 # Voice input in a compact row
 voice_col1, voice_col2, voice_col3 = st.columns([1, 1, 1])
 
+live_event = None
 with voice_col2:
     st.markdown("**🎤 Voice Input**")
-    audio_bytes = audio_recorder(
-        text="",
-        recording_color="#EF4444",  # Red when recording
-        neutral_color="#3498db",     # Blue when ready
-        icon_name="microphone",
-        icon_size="2x",
-        sample_rate=16000,
-        key="audio_recorder"
-    )
+    if VOICE_API_URL and st.session_state.live_input:
+        # The browser streams to the voice API, which sends back partial and final transcripts
+        audio_bytes = None
+        live_event = live_mic(VOICE_API_URL, language=st.session_state.selected_language, key="live_mic")
+    else:
+        audio_bytes = audio_recorder(
+            text="",
+            recording_color="#EF4444",  # Red when recording
+            neutral_color="#3498db",     # Blue when ready
+            icon_name="microphone",
+            icon_size="2x",
+            sample_rate=16000,
+            key="audio_recorder"
+        )
 
 # Status indicator - compact with language info
 current_lang = st.session_state.selected_language
@@ -715,6 +861,7 @@ if st.session_state.command_executed:
         <span style="color: #7C3AED; font-weight: bold;">✨ {st.session_state.command_executed}</span>
     </div>
     """, unsafe_allow_html=True)
+    play_static_speech(st.session_state.command_executed)
     st.session_state.command_executed = None
 
 # VOICE PROCESSING - Completely rewritten
@@ -724,74 +871,62 @@ if audio_bytes:
     if "last_audio_hash" not in st.session_state:
         st.session_state.last_audio_hash = None
 
+    # speech_recognition is loaded once voice is first used (for its recognition errors)
+    import speech_recognition as sr
+
     # Create hash of current audio to detect new recordings
-    import hashlib
+    dedupe_start = time.perf_counter()
     current_hash = hashlib.md5(audio_bytes).hexdigest()
+    is_new_recording = current_hash != st.session_state.last_audio_hash
+    dedupe_seconds = time.perf_counter() - dedupe_start
+    get_metrics().observe(
+        "dedupe", dedupe_seconds, st.session_state.personality, st.session_state.selected_language
+    )
 
     # Only process if this is a new recording
-    if current_hash != st.session_state.last_audio_hash:
+    if is_new_recording:
         st.session_state.last_audio_hash = current_hash
+        st.session_state.turn_spans = {"dedupe": dedupe_seconds}
 
-        if len(audio_bytes) < 100:
-            st.warning("🔇 Recording too short. Please speak for at least 1 second.")
-        else:
-            with st.spinner("🎧 Converting speech to text..."):
+        # A new recording supersedes the reply still being generated or voiced
+        turn = start_new_turn()
+
+        # Trim silence locally, reject recordings without speech before calling the recognizer, then recognize
+        with st.spinner("🎧 Converting speech to text..."):
+            try:
+                language_code = LANGUAGES[st.session_state.selected_language]["code"]
                 try:
-                    recognizer = sr.Recognizer()
-                    wav_io = io.BytesIO(audio_bytes)
-
-                    with sr.AudioFile(wav_io) as source:
-                        audio_data = recognizer.record(source)
-
-                    language_code = LANGUAGES[st.session_state.selected_language]["code"]
-                    text = recognizer.recognize_google(audio_data, language=language_code)
-
-                    # Check for voice commands
-                    text_lower = text.lower().strip()
-                    command_executed = False
-
-                    for command, action in VOICE_COMMANDS.items():
-                        if command in text_lower:
-                            if action == "clear_chat":
-                                st.session_state.messages = []
-                                st.session_state.tts_audio = {}
-                                st.session_state.command_executed = "Voice Command: Chat Cleared! 🗑️"
-                                command_executed = True
-                            elif action == "slow_down":
-                                st.session_state.tts_speed_slow = True
-                                st.session_state.command_executed = "Voice Command: Speech slowed down 🐢"
-                                command_executed = True
-                            elif action == "speed_up" or action == "normal_speed":
-                                st.session_state.tts_speed_slow = False
-                                st.session_state.command_executed = "Voice Command: Speech speed normal 🚀"
-                                command_executed = True
-                            elif action == "show_help":
-                                help_message = """**Available Voice Commands:**
-
-**Chat Control:**
-- "Clear chat" - Erase conversation
-- "Help" - Show this help message
-
-**Personality:**
-- "Switch to gaming" - Change to Gaming Helper
-- "Switch to study" - Change to Study Buddy
-- "Switch to fitness" - Change to Fitness Coach
-- "Switch to general" - Change to General Assistant
-
-**Speech Control:**
-- "Speak slower" - Slow down text-to-speech
-- "Speak faster" - Return to normal speed
-
-Try saying any of these commands naturally!"""
-                                st.session_state.messages.append({"role": "assistant", "content": help_message})
-                                st.session_state.command_executed = "Voice Command: Help displayed! 💡"
-                                command_executed = True
-                            elif action in PERSONALITIES:
-                                old_personality = st.session_state.personality
-                                st.session_state.personality = action
-                                st.session_state.command_executed = f"Voice Command: Switched from {old_personality} to {action}! 🎭"
-                                command_executed = True
-                            break
+                    with stage_span("recognize"):
+                        text, stt_stats = transcribe_audio(
+                            audio_bytes, language_code, get_stt_backend(), cancelled=lambda: turn.cancelled
+                        )
+                except (wave.Error, EOFError):
+                    text = None  # Not a readable WAV recording
+                turn.check()
+
+                if text is None:
+                    st.warning(ERROR_MESSAGES["no_speech"])
+                    play_static_speech(ERROR_MESSAGES["no_speech"])
+                else:
+                    vad_stats, frontend_stats = stt_stats["vad"], stt_stats["frontend"]
+                    trimmed_seconds = vad_stats["total_seconds"] - vad_stats["speech_seconds"]
+                    st.caption(
+                        f"✂️ Trimmed {trimmed_seconds:.1f}s of silence · "
+                        f"{vad_stats['input_bytes'] // 1024} KB recorded → {frontend_stats['output_bytes'] // 1024} KB upload · "
+                        f"{frontend_stats['processing_ms']:.0f} ms"
+                    )
+
+                    segment_timings = stt_stats["segments"]
+                    if segment_timings:
+                        with st.expander(f"⏱️ Transcribed in {len(segment_timings)} segments", expanded=False):
+                            for timing in segment_timings:
+                                st.caption(
+                                    f"Segment {timing['segment'] + 1}: {timing['start']:.1f}s +{timing['duration']:.1f}s · "
+                                    f"{timing['seconds']:.2f}s · {timing['attempts']} attempt(s) · {timing['status']}"
+                                )
+
+                    # Check for voice commands (compiled per-language matcher)
+                    command_executed = run_voice_command(text, language_code)
 
                     # If no command, set voice text and force update
                     if not command_executed:
@@ -799,14 +934,36 @@ Try saying any of these commands naturally!"""
                         st.success(f"✅ Voice recognized: \"{text}\"")
                     else:
                         st.session_state.voice_text = ""
+                        finish_turn_metrics()
                         st.rerun()
-
-                except sr.UnknownValueError:
-                    st.error("🤔 Could not understand the audio. Please speak clearly and try again.")
-                except sr.RequestError as e:
-                    st.error(f"🌐 Could not connect to speech recognition service: {str(e)}")
-                except Exception as e:
-                    st.error(f"⚠️ Error processing audio: {str(e)}")
+            except CancelledTurn:
+                pass  # A newer recording took over
+            except sr.UnknownValueError:
+                st.error(ERROR_MESSAGES["not_understood"])
+                play_static_speech(ERROR_MESSAGES["not_understood"])
+            except sr.RequestError as e:
+                st.error(f"🌐 Could not connect to speech recognition service: {str(e)}")
+            except Exception as e:
+                st.error(f"⚠️ Error processing audio: {str(e)}")
+
+# Live transcripts: show partials in the message box, then handle the final like a recording
+if live_event and live_event["seq"] > st.session_state.live_event_seq:
+    st.session_state.live_event_seq = live_event["seq"]
+    # Barge-in once per utterance, on its first transcript: every partial reruns the script and
+    # stops the run answering the previous question, which must then stay interrupted, not restart
+    if not st.session_state.live_utterance_started:
+        start_new_turn()
+    if live_event["type"] == "partial":
+        st.session_state.live_utterance_started = True
+        st.session_state.voice_text = live_event["text"]
+    else:
+        st.session_state.live_utterance_started = False
+        language_code = LANGUAGES[st.session_state.selected_language]["code"]
+        if run_voice_command(live_event["text"], language_code):
+            st.session_state.voice_text = ""
+            st.rerun()
+        st.session_state.voice_text = live_event["text"]
+        st.success(f"✅ Voice recognized: \"{live_event['text']}\"")
 
 # Text input - use voice_text directly
 user_input = st.text_area(
@@ -826,8 +983,11 @@ with send_col1:
         if user_input and user_input.strip():
             prompt = user_input.strip()
 
+            # A new message supersedes the reply still being generated or voiced
+            start_new_turn()
+
             # Add user message to chat history
-            st.session_state.messages.append({"role": "user", "content": prompt})
+            add_message({"role": "user", "content": prompt})
 
             # Clear inputs and reset audio tracking
             st.session_state.voice_text = ""
@@ -843,40 +1003,140 @@ with send_col2:
         st.rerun()
 
 # Check if last message needs AI response
-if len(st.session_state.messages) > 0 and st.session_state.messages[-1]["role"] == "user" and not st.session_state.processing:
+if (len(st.session_state.messages) > 0 and st.session_state.messages[-1]["role"] == "user"
+        and not st.session_state.messages[-1].get("interrupted") and not st.session_state.processing):
     # Set processing flag to prevent duplicate processing
     st.session_state.processing = True
+    turn = st.session_state.turn_manager.active()
+    speech_pipeline = None
 
-    with st.spinner("🤖 Thinking..."):
-        try:
-            # Get the last user message
-            prompt = st.session_state.messages[-1]["content"]
-
-            # Get cached model for current personality and language
-            model = get_ai_model(st.session_state.personality, st.session_state.selected_language)
-
-            # Generate response
-            response = model.generate_content(prompt)
-            full_response = response.text
+    try:
+        # Recent turns verbatim plus a running summary of older ones, capped at the token budget
+        prompt, prompt_tokens = get_conversation_context().build(st.session_state.messages)
+
+        # Get cached model for current personality and language
+        model_start = time.perf_counter()
+        first_request_path = get_model_warmer().claim(st.session_state.personality, st.session_state.selected_language)
+        model = get_ai_model(st.session_state.personality, st.session_state.selected_language)
+        model_seconds = time.perf_counter() - model_start
+
+        # Look for an earlier answer to the same question in the same context
+        cached_response = None
+        if st.session_state.use_response_cache:
+            response_cache = get_response_cache()
+            cache_key = response_cache_key(
+                st.session_state.personality,
+                st.session_state.selected_language,
+                st.session_state.messages[-1]["content"],
+                context_fingerprint(prompt[:-1])
+            )
+            request_start = time.perf_counter()
+            cached_response = response_cache.get(cache_key)
+
+        if cached_response is not None:
+            full_response = cached_response
+            elapsed = time.perf_counter() - request_start
+            timing = {"ttft": elapsed, "ttlt": elapsed}
+        elif st.session_state.stream_responses:
+            # Stream the response into a bubble at the end of the conversation
+            with chat_container:
+                response_placeholder = st.empty()
+                audio_placeholder = st.empty()
+
+            # Speak the reply sentence by sentence while it is being generated
+            tts_lang = LANGUAGES[st.session_state.selected_language]["tts_code"]
+            tts_cache = get_tts_cache()
+            speech_pipeline = SpeechPipeline(
+                language=tts_lang,
+                slow=st.session_state.tts_speed_slow,
+                synthesize=tts_cache.get_or_synthesize
+            )
+            # Stop synthesizing the moment this turn is superseded
+            turn.on_cancel(speech_pipeline.cancel)
+            player = SegmentPlayer(speech_pipeline, audio_placeholder)
+            with stage_span("generate"):
+                full_response, timing = stream_ai_response(
+                    model, prompt, response_placeholder, speech_pipeline, player, turn
+                )
+
+            # Keep playing sentences as they finish; only the speech still unfinished
+            # when the reply ends counts as TTS wait
+            with st.spinner("🎵 Generating audio..."), stage_span("tts"):
+                audio_segments = finish_speech(speech_pipeline, player.poll, check=turn.check)
+            turn.check()
+
+            # MP3 frames can be concatenated, so the ordered segments form one clip
+            if audio_segments and not speech_pipeline.errors:
+                full_audio = b"".join(audio_segments)
+                tts_cache.put(full_response, tts_lang, st.session_state.tts_speed_slow, full_audio)
+                message_key = tts_cache_key(full_response, tts_lang, st.session_state.tts_speed_slow)
+                st.session_state.tts_audio.put(message_key, full_audio)
+                # The rerun replaces the segment player: the joined clip carries on where it stopped
+                st.session_state.resume_audio = (message_key, int(player.position()))
+        else:
+            with st.spinner("🤖 Thinking..."):
+                request_start = time.perf_counter()
+                with stage_span("generate"):
+                    response = model.generate_content(prompt, check=turn.check)
+                full_response = response.text
+                elapsed = time.perf_counter() - request_start
+                timing = {"ttft": elapsed, "ttlt": elapsed}
+            turn.check()
+
+        if cached_response is None:
+            # Time to first response including model construction, split by cold and warm path
+            get_model_warmer().mark_connected()
+            get_metrics().observe(
+                f"ttfr_{first_request_path}",
+                model_seconds + timing["ttft"],
+                st.session_state.personality,
+                st.session_state.selected_language
+            )
+
+        if st.session_state.use_response_cache and cached_response is None:
+            response_cache.put(cache_key, full_response)
+
+        # Add assistant response to chat history only once it is complete
+        add_message({
+            "role": "assistant",
+            "content": full_response,
+            "timing": timing,
+            "prompt_tokens": prompt_tokens,
+            "cached": cached_response is not None
+        })
+
+        # Reset processing flag
+        st.session_state.processing = False
+        finish_turn_metrics()
+
+        # Rerun to display the response
+        st.rerun()
 
-            # Add assistant response to chat history
-            st.session_state.messages.append({"role": "assistant", "content": full_response})
+    except CancelledTurn:
+        # Superseded by a newer recording or message - drop the stale reply
+        st.session_state.processing = False
+        finish_turn_metrics()
 
-            # Reset processing flag
-            st.session_state.processing = False
+    except Exception as e:
+        if speech_pipeline is not None:
+            # Release the synthesis worker waiting for more sentences
+            speech_pipeline.cancel()
+        error_message = f"❌ Error: {str(e)}"
+        add_message({"role": "assistant", "content": error_message})
 
-            # Rerun to display the response
-            st.rerun()
+        # Reset processing flag
+        st.session_state.processing = False
+        finish_turn_metrics()
 
-        except Exception as e:
-            error_message = f"❌ Error: {str(e)}"
-            st.session_state.messages.append({"role": "assistant", "content": error_message})
+        st.rerun()
 
-            # Reset processing flag
+    finally:
+        if st.session_state.processing:
+            # Streamlit stopped this run for new input: cancel the turn's background work
+            # so the next run can answer (or drop) the question instead of staying stuck
+            turn.cancel()
             st.session_state.processing = False
 
-            st.rerun()
-
 # Auto-scroll to bottom using JavaScript
 st.markdown("""
 <script>
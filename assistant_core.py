@@ -0,0 +1,317 @@
+"""
+The assistant's configuration and pipeline stages, without any UI.
+
+PERSONALITIES and LANGUAGES, model construction for a personality and
+language, speech recognition of a WAV recording, voice command dispatch,
+reply streaming with sentence-by-sentence speech and cached text-to-speech
+live here so that the Streamlit app, the voice API server, command-line
+tools and other front ends share one implementation. Importing this
+module is cheap: the Gemini SDK, SpeechRecognition and NumPy are only
+loaded on first use.
+
+Process-wide resources (Gemini client, models, TTS cache, STT backend)
+are created once per process on first use.
+"""
+
+import functools
+import logging
+import os
+import time
+
+from conversation_context import make_model_summarizer
+from gemini_client import DEFAULT_BURST, DEFAULT_REQUESTS_PER_MINUTE, GeminiClient
+from speech_bundle import DEFAULT_BUNDLE_PATH, load_bundle
+from tts_cache import DEFAULT_CACHE_DIR, DEFAULT_DISK_BYTES, TTSCache
+from tts_pipeline import MAX_CHUNK_CHARS, synthesize_long_text, synthesize_speech
+from voice_commands import match_voice_command
+
+logger = logging.getLogger(__name__)
+
+MODEL_NAME = "gemini-2.5-flash"
+
+# How often a reply's speech is checked for newly synthesized sentences once its text is complete
+AUDIO_POLL_SECONDS = 0.05
+
+# Personality configurations
+PERSONALITIES = {
+    "General Assistant": {
+        "name": "General Assistant",
+        "icon": "🤖",
+        "system_prompt": "You are a helpful and friendly AI assistant. You provide clear, accurate, and concise responses to user questions across a wide range of topics."
+    },
+    "Study Buddy": {
+        "name": "Study Buddy",
+        "icon": "📚",
+        "system_prompt": "You are a supportive study companion. You help students understand concepts, explain topics clearly, provide study tips, and encourage learning. Use examples and break down complex ideas into simpler parts."
+    },
+    "Fitness Coach": {
+        "name": "Fitness Coach",
+        "icon": "💪",
+        "system_prompt": "You are an enthusiastic fitness coach. You provide workout advice, nutrition tips, motivation, and guidance on healthy lifestyle choices. You encourage users to stay active and make positive health decisions."
+    },
+    "Gaming Helper": {
+        "name": "Gaming Helper",
+        "icon": "🎮",
+        "system_prompt": "You are a knowledgeable gaming companion. You help with game strategies, tips, recommendations, and gaming culture discussions. You're enthusiastic about games and help players improve their skills."
+    }
+}
+
+# Language support configuration
+LANGUAGES = {
+    "English": {"code": "en-US", "flag": "🇺🇸", "tts_code": "en", "name": "English"},
+    "Spanish": {"code": "es-ES", "flag": "🇪🇸", "tts_code": "es", "name": "Spanish"},
+    "French": {"code": "fr-FR", "flag": "🇫🇷", "tts_code": "fr", "name": "French"},
+    "German": {"code": "de-DE", "flag": "🇩🇪", "tts_code": "de", "name": "German"},
+    "Chinese (Mandarin)": {"code": "zh-CN", "flag": "🇨🇳", "tts_code": "zh-CN", "name": "Chinese (Mandarin)"},
+    "Japanese": {"code": "ja-JP", "flag": "🇯🇵", "tts_code": "ja", "name": "Japanese"},
+    "Korean": {"code": "ko-KR", "flag": "🇰🇷", "tts_code": "ko", "name": "Korean"},
+    "Italian": {"code": "it-IT", "flag": "🇮🇹", "tts_code": "it", "name": "Italian"},
+    "Portuguese": {"code": "pt-PT", "flag": "🇵🇹", "tts_code": "pt", "name": "Portuguese"},
+    "Russian": {"code": "ru-RU", "flag": "🇷🇺", "tts_code": "ru", "name": "Russian"},
+    "Arabic": {"code": "ar-SA", "flag": "🇸🇦", "tts_code": "ar", "name": "Arabic"},
+    "Hindi": {"code": "hi-IN", "flag": "🇮🇳", "tts_code": "hi", "name": "Hindi"}
+}
+
+# Reply to the "help" voice command
+HELP_MESSAGE = """**Available Voice Commands:**
+
+**Chat Control:**
+- "Clear chat" - Erase conversation
+- "Help" - Show this help message
+
+**Personality:**
+- "Switch to gaming" - Change to Gaming Helper
+- "Switch to study" - Change to Study Buddy
+- "Switch to fitness" - Change to Fitness Coach
+- "Switch to general" - Change to General Assistant
+
+**Speech Control:**
+- "Speak slower" - Slow down text-to-speech
+- "Speak faster" - Return to normal speed
+
+Try saying any of these commands naturally!"""
+
+# Confirmation shown after each voice command
+COMMAND_CONFIRMATIONS = {
+    "clear_chat": "Voice Command: Chat Cleared! 🗑️",
+    "slow_down": "Voice Command: Speech slowed down 🐢",
+    "speed_up": "Voice Command: Speech speed normal 🚀",
+    "normal_speed": "Voice Command: Speech speed normal 🚀",
+    "show_help": "Voice Command: Help displayed! 💡"
+}
+PERSONALITY_SWITCH_CONFIRMATION = "Voice Command: Switched from {old} to {new}! 🎭"
+
+# Messages shown (and, from the speech bundle, spoken) when a recording cannot be used
+ERROR_MESSAGES = {
+    "no_speech": "🔇 No speech detected. Please speak for at least 1 second.",
+    "not_understood": "🤔 Could not understand the audio. Please speak clearly and try again."
+}
+
+
+# Import and configure the Gemini SDK once per process, on first use - importing it takes about a second
+@functools.lru_cache(maxsize=1)
+def get_genai():
+    """Return the configured google.generativeai module"""
+    import google.generativeai as genai
+    genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
+    return genai
+
+
+def create_gemini_client(on_wait=None):
+    """Create a Gemini client sized to the API quota (GEMINI_RPM, GEMINI_BURST)"""
+    return GeminiClient(
+        requests_per_minute=float(os.getenv("GEMINI_RPM", DEFAULT_REQUESTS_PER_MINUTE)),
+        burst=int(os.getenv("GEMINI_BURST", DEFAULT_BURST)),
+        on_wait=on_wait
+    )
+
+
+@functools.lru_cache(maxsize=1)
+def get_gemini_client():
+    """The process-wide Gemini client"""
+    return create_gemini_client()
+
+
+def system_prompt_for(personality, language):
+    """The personality's system prompt, asking for replies in the language"""
+    # Get the base system prompt
+    base_prompt = PERSONALITIES[personality]["system_prompt"]
+
+    # Add language instruction if not English
+    if language != "English":
+        language_name = LANGUAGES[language]["name"]
+        language_instruction = f"\n\nIMPORTANT: Please respond in {language_name}. The user will communicate in {language_name}, and you should respond entirely in {language_name}."
+        return base_prompt + language_instruction
+    return base_prompt
+
+
+def create_ai_model(personality, language, client=None):
+    """Build the model for a personality and language, routed through a Gemini client"""
+    model = get_genai().GenerativeModel(
+        MODEL_NAME,
+        system_instruction=system_prompt_for(personality, language)
+    )
+    return (client or get_gemini_client()).wrap(model, personality, language)
+
+
+@functools.lru_cache(maxsize=None)
+def get_ai_model(personality, language):
+    """Create and cache the AI model for the given personality and language"""
+    return create_ai_model(personality, language)
+
+
+def create_summary_model(client=None):
+    """Build the model used to fold older turns into the running summary"""
+    return (client or get_gemini_client()).wrap(get_genai().GenerativeModel(MODEL_NAME), "summary")
+
+
+@functools.lru_cache(maxsize=1)
+def get_summarizer():
+    """Summarizer for ConversationContext backed by the process-wide summary model"""
+    return make_model_summarizer(create_summary_model())
+
+
+# One TTS cache per process, shared with every other process through the disk tier
+@functools.lru_cache(maxsize=1)
+def get_tts_cache():
+    """Create the process-wide TTS cache (memory LRU backed by disk, fixed messages from the speech bundle)"""
+    bundle_path = os.getenv("TTS_BUNDLE_PATH", DEFAULT_BUNDLE_PATH)
+    try:
+        bundle = load_bundle(bundle_path)
+    except (OSError, ValueError) as e:
+        # A bad bundle only costs speed: fixed messages are synthesized live like any other text
+        logger.warning("Ignoring speech bundle %s: %s", bundle_path, e)
+        bundle = None
+    return TTSCache(
+        cache_dir=os.getenv("TTS_CACHE_DIR", DEFAULT_CACHE_DIR),
+        bundle=bundle,
+        max_disk_bytes=int(os.getenv("TTS_CACHE_DISK_MB", DEFAULT_DISK_BYTES // (1024 * 1024))) * 1024 * 1024
+    )
+
+
+def generate_tts_audio(text, language="en", slow=False, long_text=None, cache=None):
+    """Generate TTS audio from text using gTTS, reusing cached clips
+
+    Long texts are split into chunks that are synthesized in parallel.
+    """
+    if long_text is None:
+        long_text = len(text) > MAX_CHUNK_CHARS
+    synthesize = synthesize_long_text if long_text else synthesize_speech
+    return (cache or get_tts_cache()).get_or_synthesize(text, language=language, slow=slow, synthesize=synthesize)
+
+
+def stream_reply(model, prompt, on_text, speech=None, on_speech=None, check=None):
+    """Stream a Gemini reply, handing every completed sentence to speech while the rest generates
+
+    on_text(delta, reply) is called for each chunk and on_speech() after
+    each chunk fed to speech, to pick up sentences synthesized so far.
+    check() runs with every chunk and raises to abandon the stream.
+    Closes speech once the text is complete. Returns (reply, timing) with
+    the times to first and last token.
+    """
+    request_start = time.perf_counter()
+    first_token_time = None
+    reply = ""
+    for chunk in model.generate_content(prompt, stream=True, check=check):
+        if check is not None:
+            check()
+        if first_token_time is None:
+            first_token_time = time.perf_counter()
+        reply += chunk.text
+        on_text(chunk.text, reply)
+        if speech is not None:
+            speech.feed(chunk.text)
+            if on_speech is not None:
+                on_speech()
+
+    last_token_time = time.perf_counter()
+    if speech is not None:
+        speech.close()
+    timing = {
+        "ttft": (first_token_time or last_token_time) - request_start,  # Time to first token
+        "ttlt": last_token_time - request_start                        # Time to last token
+    }
+    return reply, timing
+
+
+def finish_speech(speech, on_speech=None, check=None, poll_seconds=AUDIO_POLL_SECONDS):
+    """Wait for speech to synthesize the rest of a closed reply and return every segment
+
+    on_speech() is called as sentences finish, and once more at the end.
+    """
+    while True:
+        # Read before polling, so the last sentences are picked up after the final wait
+        finished = speech.finished()
+        if on_speech is not None:
+            on_speech()
+        if finished:
+            return speech.join()
+        if check is not None:
+            check()
+        speech.join(poll_seconds)
+
+
+# Speech-to-text engine chosen by STT_BACKEND (google, sphinx or stub)
+@functools.lru_cache(maxsize=1)
+def get_stt_backend():
+    """Create the configured speech-to-text backend"""
+    from speech_to_text import create_stt_backend
+    return create_stt_backend(os.getenv("STT_BACKEND", "google"))
+
+
+def transcribe_audio(wav_bytes, language_code, stt_backend=None, cancelled=None):
+    """Trim, preprocess and recognize a WAV recording
+
+    Returns (text, stats); text is None when the recording holds no speech.
+    Recognition errors from the backend (UnknownValueError, RequestError)
+    are raised to the caller. Recordings over LONG_UTTERANCE_SECONDS are
+    recognized segment by segment in parallel.
+    """
+    from audio_frontend import preprocess_audio, trim_silence
+    from speech_to_text import LONG_UTTERANCE_SECONDS, audio_duration, transcribe_long
+
+    stt_backend = stt_backend or get_stt_backend()
+    speech_audio, vad_stats = trim_silence(wav_bytes)
+    stats = {"vad": vad_stats, "frontend": None, "segments": None, "audio_seconds": vad_stats["total_seconds"]}
+    if speech_audio is None:
+        return None, stats
+
+    # Downmix, resample to 16 kHz, normalize, gate and FLAC-encode locally
+    audio_data, stats["frontend"] = preprocess_audio(speech_audio)
+    if audio_duration(audio_data) > LONG_UTTERANCE_SECONDS:
+        # Long dictation: recognize pause-separated segments in parallel
+        text, stats["segments"] = transcribe_long(
+            audio_data, stt_backend.recognize, language_code, cancelled=cancelled
+        )
+    else:
+        text = stt_backend.recognize(audio_data, language=language_code)
+    return text, stats
+
+
+def dispatch_voice_command(text, language_code, personality, slow):
+    """Run the voice command spoken in text, if any
+
+    Returns None when text is not a command, otherwise a dict with the
+    action, the new personality and speech speed, whether the chat should
+    be cleared, a reply to add to the chat (or None) and the confirmation.
+    """
+    action = match_voice_command(text, language_code)
+    if action is None:
+        return None
+
+    command = {
+        "action": action,
+        "personality": personality,
+        "slow": slow,
+        "clear_chat": action == "clear_chat",
+        "reply": HELP_MESSAGE if action == "show_help" else None,
+        "confirmation": COMMAND_CONFIRMATIONS.get(action)
+    }
+    if action == "slow_down":
+        command["slow"] = True
+    elif action in ("speed_up", "normal_speed"):
+        command["slow"] = False
+    elif action in PERSONALITIES:
+        command["personality"] = action
+        command["confirmation"] = PERSONALITY_SWITCH_CONFIRMATION.format(old=personality, new=action)
+    return command
@@ -0,0 +1,275 @@
+"""
+Local audio processing that runs before speech recognition.
+
+Energy-based voice activity detection (VAD) works on the raw PCM frames
+of the recorder's WAV, with no network access: leading and trailing
+silence is trimmed so less audio is uploaded, and recordings without any
+speech are rejected before they reach the recognizer.
+
+The vectorized front-end then downmixes to mono, resamples to 16 kHz,
+normalizes the gain, gates background noise and FLAC-encodes the result,
+so only the bytes the recognizer needs are sent.
+"""
+
+import io
+import time
+import wave
+
+import numpy as np
+import speech_recognition as sr
+
+FRAME_MS = 30               # Analysis frame length
+PADDING_MS = 200            # Audio kept around detected speech so words are not clipped
+MIN_SPEECH_MS = 150         # Less speech than this counts as no speech
+NOISE_PERCENTILE = 10       # Quietest frames estimate the noise floor
+SPEECH_PERCENTILE = 90      # Loudest frames estimate the speech level
+SPEECH_TO_NOISE_RATIO = 3.0 # Speech frames must be this much louder than the floor
+SPEECH_LEVEL_RATIO = 0.5    # Pauses are frames below half the speech level (or the speech threshold)
+MIN_SPEECH_RMS = 0.01       # Absolute floor (full scale = 1.0) for near-silent recordings
+FLATNESS_FFT_SIZE = 512     # Window of the averaged spectrum used to tell voice from steady noise
+SPEECH_BAND_HZ = (80, 4000) # Where voiced speech has its harmonics
+MAX_SPEECH_FLATNESS = 0.1   # Voiced speech is peaky (~0.001); broadband noise is flat (~1.0)
+
+SAMPLE_DTYPES = {1: np.uint8, 2: np.int16, 4: np.int32}
+
+TARGET_RATE = 16000         # Google Speech Recognition works at 16 kHz
+RESAMPLE_TAPS = 63          # Length of the anti-aliasing low-pass filter
+TARGET_RMS = 0.1            # About -20 dBFS after normalization
+MAX_GAIN = 20.0             # Never boost quiet recordings by more than ~26 dB
+MAX_PEAK = 0.99             # Leave headroom so normalization never clips
+GATE_FRAME_MS = 10
+GATE_THRESHOLD = 0.003      # About -50 dBFS; quieter frames are silenced
+MAX_SEGMENT_SECONDS = 15.0  # Longest piece sent in one recognition request
+MIN_PAUSE_MS = 300          # Silences at least this long are candidate cut points
+
+
+def read_wav(wav_bytes):
+    """Decode WAV bytes into (float samples shaped [frames, channels], sample_rate)"""
+    with wave.open(io.BytesIO(wav_bytes), "rb") as wav:
+        sample_width = wav.getsampwidth()
+        channels = wav.getnchannels()
+        sample_rate = wav.getframerate()
+        raw = wav.readframes(wav.getnframes())
+
+    if sample_width not in SAMPLE_DTYPES:
+        raise ValueError(f"Unsupported WAV sample width: {sample_width} bytes")
+
+    samples = np.frombuffer(raw, dtype=SAMPLE_DTYPES[sample_width]).astype(np.float32)
+    if sample_width == 1:
+        samples = (samples - 128.0) / 128.0  # 8-bit WAV is unsigned
+    else:
+        samples /= float(2 ** (8 * sample_width - 1))
+
+    return samples.reshape(-1, channels), sample_rate
+
+
+def write_wav(samples, sample_rate):
+    """Encode float samples shaped [frames, channels] as 16-bit PCM WAV bytes"""
+    pcm = (np.clip(samples, -1.0, 1.0) * 32767).astype("<i2")
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav:
+        wav.setnchannels(pcm.shape[1])
+        wav.setsampwidth(2)
+        wav.setframerate(sample_rate)
+        wav.writeframes(pcm.tobytes())
+    return buffer.getvalue()
+
+
+def frame_energies(samples, sample_rate, frame_ms=FRAME_MS):
+    """RMS energy of each analysis frame (channels averaged)"""
+    mono = samples.mean(axis=1)
+    frame_length = max(1, int(sample_rate * frame_ms / 1000))
+    frame_count = len(mono) // frame_length
+    frames = mono[:frame_count * frame_length].reshape(frame_count, frame_length)
+    return np.sqrt(np.mean(frames ** 2, axis=1))
+
+
+def speech_mask(energies):
+    """Boolean mask of frames whose energy is well above the noise floor"""
+    if len(energies) == 0:
+        return np.zeros(0, dtype=bool)
+    noise_floor = np.percentile(energies, NOISE_PERCENTILE)
+    threshold = max(noise_floor * SPEECH_TO_NOISE_RATIO, MIN_SPEECH_RMS)
+    return energies > threshold
+
+
+def spectral_flatness(mono, sample_rate, fft_size=FLATNESS_FFT_SIZE, band=SPEECH_BAND_HZ):
+    """Geometric over arithmetic mean of the averaged power spectrum within band (0 = tonal, 1 = white noise)"""
+    frame_count = len(mono) // fft_size
+    if frame_count == 0:
+        return 1.0
+    frames = mono[:frame_count * fft_size].reshape(frame_count, fft_size) * np.hanning(fft_size)
+    power = np.mean(np.abs(np.fft.rfft(frames, axis=1)) ** 2, axis=0)
+    frequencies = np.fft.rfftfreq(fft_size, 1.0 / sample_rate)
+    power = power[(frequencies >= band[0]) & (frequencies <= band[1])] + 1e-12
+    return float(np.exp(np.mean(np.log(power))) / np.mean(power))
+
+
+def pause_mask(energies):
+    """Boolean mask of frames quiet enough to cut a recording at
+
+    Unlike speech_mask, the threshold is capped at half the loud (90th
+    percentile) frame level: in dictation that is nearly all speech the
+    noise floor is speech too, and no pauses would be found. Only used to
+    place cuts, never to decide whether a recording holds speech.
+    """
+    if len(energies) == 0:
+        return np.zeros(0, dtype=bool)
+    noise_floor, speech_level = np.percentile(energies, [NOISE_PERCENTILE, SPEECH_PERCENTILE])
+    threshold = max(min(noise_floor * SPEECH_TO_NOISE_RATIO, speech_level * SPEECH_LEVEL_RATIO), MIN_SPEECH_RMS)
+    return energies <= threshold
+
+
+def trim_silence(wav_bytes, frame_ms=FRAME_MS, padding_ms=PADDING_MS, min_speech_ms=MIN_SPEECH_MS):
+    """Trim leading/trailing silence from a WAV recording
+
+    Returns (trimmed_wav_bytes, stats); trimmed_wav_bytes is None when the
+    recording contains no speech.
+    """
+    samples, sample_rate = read_wav(wav_bytes)
+    energies = frame_energies(samples, sample_rate, frame_ms)
+    mask = speech_mask(energies)
+    if np.count_nonzero(mask) * frame_ms < min_speech_ms and (
+            spectral_flatness(samples.mean(axis=1), sample_rate) <= MAX_SPEECH_FLATNESS):
+        # Speech all the way through leaves no quiet frames to measure the noise floor from, so the
+        # adaptive threshold sits at the speech level. Voiced audio is judged by the absolute floor
+        # alone; steady broadband noise stays rejected
+        mask = energies > MIN_SPEECH_RMS
+
+    total_seconds = len(samples) / sample_rate
+    stats = {
+        "input_bytes": len(wav_bytes),
+        "output_bytes": 0,
+        "total_seconds": total_seconds,
+        "speech_seconds": 0.0
+    }
+
+    speech_frames = np.flatnonzero(mask)
+    if len(speech_frames) * frame_ms < min_speech_ms:
+        return None, stats
+
+    frame_length = max(1, int(sample_rate * frame_ms / 1000))
+    padding = int(sample_rate * padding_ms / 1000)
+    start = max(0, int(speech_frames[0]) * frame_length - padding)
+    end = min(len(samples), (int(speech_frames[-1]) + 1) * frame_length + padding)
+
+    trimmed = write_wav(samples[start:end], sample_rate)
+    stats["output_bytes"] = len(trimmed)
+    stats["speech_seconds"] = (end - start) / sample_rate
+    return trimmed, stats
+
+
+def split_at_pauses(mono, sample_rate, max_seconds=MAX_SEGMENT_SECONDS,
+                    min_pause_ms=MIN_PAUSE_MS, frame_ms=FRAME_MS):
+    """Split a mono signal into (start, end) sample ranges of at most max_seconds
+
+    Cuts are placed in the middle of pauses; a piece with no pause inside
+    the limit is cut hard at max_seconds.
+    """
+    frame_length = max(1, int(sample_rate * frame_ms / 1000))
+    silent = pause_mask(frame_energies(mono[:, None], sample_rate, frame_ms))
+
+    # Find runs of silent frames long enough to count as a pause
+    edges = np.diff(np.concatenate([[0], silent.astype(np.int8), [0]]))
+    run_starts = np.flatnonzero(edges == 1)
+    run_ends = np.flatnonzero(edges == -1)
+    long_enough = (run_ends - run_starts) * frame_ms >= min_pause_ms
+    cut_points = ((run_starts[long_enough] + run_ends[long_enough]) // 2) * frame_length
+
+    max_length = int(max_seconds * sample_rate)
+    segments = []
+    start = 0
+    while len(mono) - start > max_length:
+        # Latest pause that keeps this segment within the limit
+        candidates = cut_points[(cut_points > start) & (cut_points <= start + max_length)]
+        end = int(candidates[-1]) if len(candidates) else start + max_length
+        segments.append((start, end))
+        start = end
+    segments.append((start, len(mono)))
+    return segments
+
+
+def downmix(samples):
+    """Average all channels into one mono signal"""
+    return samples.mean(axis=1)
+
+
+def _lowpass(mono, cutoff):
+    """Windowed-sinc low-pass filter; cutoff is a fraction of the sample rate"""
+    n = np.arange(RESAMPLE_TAPS) - (RESAMPLE_TAPS - 1) / 2
+    taps = 2 * cutoff * np.sinc(2 * cutoff * n) * np.hamming(RESAMPLE_TAPS)
+    return np.convolve(mono, taps / taps.sum(), mode="same")
+
+
+def resample(mono, sample_rate, target_rate=TARGET_RATE):
+    """Resample a mono signal, low-pass filtering first when downsampling"""
+    if sample_rate == target_rate or len(mono) == 0:
+        return mono
+    if target_rate < sample_rate:
+        mono = _lowpass(mono, 0.45 * target_rate / sample_rate)
+
+    duration = len(mono) / sample_rate
+    target_length = int(round(duration * target_rate))
+    source_times = np.arange(len(mono)) / sample_rate
+    target_times = np.arange(target_length) / target_rate
+    return np.interp(target_times, source_times, mono)
+
+
+def normalize_gain(mono, target_rms=TARGET_RMS, max_gain=MAX_GAIN):
+    """Scale towards a target RMS level without clipping or over-boosting noise"""
+    rms = np.sqrt(np.mean(mono ** 2)) if len(mono) else 0.0
+    peak = np.max(np.abs(mono)) if len(mono) else 0.0
+    if rms == 0.0:
+        return mono
+    gain = min(target_rms / rms, max_gain, MAX_PEAK / peak)
+    return mono * gain
+
+
+def noise_gate(mono, sample_rate, threshold=GATE_THRESHOLD, frame_ms=GATE_FRAME_MS):
+    """Silence short frames whose level is below the gate threshold"""
+    frame_length = max(1, int(sample_rate * frame_ms / 1000))
+    frame_count = -(-len(mono) // frame_length)  # Round up so the tail frame is gated too
+    padded = np.zeros(frame_count * frame_length)
+    padded[:len(mono)] = mono
+
+    frames = padded.reshape(frame_count, frame_length)
+    open_frames = np.sqrt(np.mean(frames ** 2, axis=1)) >= threshold
+    return (frames * open_frames[:, None]).reshape(-1)[:len(mono)]
+
+
+class FlacAudioData(sr.AudioData):
+    """AudioData that remembers its FLAC encodings, so the recognizer reuses ours"""
+
+    def __init__(self, frame_data, sample_rate, sample_width):
+        super().__init__(frame_data, sample_rate, sample_width)
+        self._flac = {}
+
+    def get_flac_data(self, convert_rate=None, convert_width=None):
+        key = (convert_rate, convert_width)
+        if key not in self._flac:
+            self._flac[key] = super().get_flac_data(convert_rate, convert_width)
+        return self._flac[key]
+
+
+def preprocess_audio(wav_bytes, target_rate=TARGET_RATE):
+    """Turn recorder WAV bytes into 16 kHz mono, normalized, gated, FLAC-encoded audio
+
+    Returns (audio_data, stats) where audio_data can go straight to
+    recognizer.recognize_google().
+    """
+    start = time.perf_counter()
+
+    samples, sample_rate = read_wav(wav_bytes)
+    mono = resample(downmix(samples), sample_rate, target_rate)
+    mono = noise_gate(normalize_gain(mono), target_rate)
+
+    pcm = (np.clip(mono, -1.0, 1.0) * 32767).astype("<i2").tobytes()
+    audio_data = FlacAudioData(pcm, target_rate, 2)
+    flac = audio_data.get_flac_data(convert_width=2)
+
+    stats = {
+        "input_bytes": len(wav_bytes),
+        "output_bytes": len(flac),
+        "processing_ms": (time.perf_counter() - start) * 1000
+    }
+    return audio_data, stats
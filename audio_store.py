@@ -0,0 +1,64 @@
+"""
+Per-session store of reply audio with a byte quota.
+
+The chat keeps only handles (the TTS cache key of each message); clip
+bytes live in a small per-session LRU bounded by a byte quota, so a
+long conversation no longer keeps every clip it ever spoke in memory.
+An evicted clip is not lost: the next render asks the TTS worker for it
+again, which serves it from the shared TTS cache (memory or disk) or
+re-synthesizes it.
+"""
+
+from collections import OrderedDict
+
+DEFAULT_SESSION_QUOTA = 4 * 1024 * 1024  # About 15 minutes of gTTS MP3 per session
+
+
+class AudioStore:
+    """LRU of clip bytes keyed by handle, capped at quota_bytes"""
+
+    def __init__(self, quota_bytes=DEFAULT_SESSION_QUOTA):
+        self.quota_bytes = quota_bytes
+        self._clips = OrderedDict()
+        self._bytes = 0
+        self.evictions = 0
+
+    def __contains__(self, handle):
+        return handle in self._clips
+
+    def get(self, handle):
+        """Return the clip for a handle (marking it recently used), or None if evicted"""
+        audio = self._clips.get(handle)
+        if audio is not None:
+            self._clips.move_to_end(handle)
+        return audio
+
+    def put(self, handle, audio):
+        """Keep a clip, evicting the least recently used ones beyond the quota"""
+        if handle in self._clips:
+            self._bytes -= len(self._clips.pop(handle))
+
+        # A clip bigger than the whole quota is served from the shared cache instead
+        if len(audio) > self.quota_bytes:
+            return
+
+        self._clips[handle] = audio
+        self._bytes += len(audio)
+        while self._bytes > self.quota_bytes:
+            _, evicted = self._clips.popitem(last=False)
+            self._bytes -= len(evicted)
+            self.evictions += 1
+
+    def clear(self):
+        """Drop every clip (e.g. when the chat is cleared)"""
+        self._clips.clear()
+        self._bytes = 0
+
+    def stats(self):
+        """Clips held, bytes used, quota and evictions so far"""
+        return {
+            "clips": len(self._clips),
+            "bytes": self._bytes,
+            "quota_bytes": self.quota_bytes,
+            "evictions": self.evictions
+        }
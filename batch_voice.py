@@ -0,0 +1,310 @@
+#!/usr/bin/env python3
+"""
+Batch voice processing: WAV recordings -> speech-to-text -> Gemini -> TTS.
+
+Takes a directory of WAV files (searched recursively) or a JSONL manifest
+and runs every recording through the same pipeline stages as the app
+(assistant_core) on a thread or process pool with bounded concurrency.
+
+Output directory layout:
+    results.jsonl      one JSON line per recording: transcript, reply,
+                       audio file, stage timings, status
+    audio/<id>.mp3     the spoken reply (unless --no-tts)
+
+Results are appended as each recording finishes, so an interrupted run
+can be restarted with the same arguments: recordings already answered
+are skipped (and failed ones retried). Throughput is reported at the end.
+
+Manifest lines: {"path": "a.wav", "id": "...", "personality": "...", "language": "..."}
+(id, personality and language are optional; relative paths are resolved
+against the manifest's directory). The id names the output MP3, so it must
+be a relative path without ".."; by default it is the recording's path
+relative to the manifest, or its file name when it lies outside.
+
+Usage:
+    python batch_voice.py recordings/ --output out/
+    python batch_voice.py manifest.jsonl --output out/ --language Spanish --workers 8
+    python batch_voice.py recordings/ --output out/ --executor process --workers 4 --no-tts
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+
+import speech_recognition as sr
+from dotenv import load_dotenv
+
+from assistant_core import (LANGUAGES, PERSONALITIES, generate_tts_audio, get_ai_model, get_stt_backend,
+                            transcribe_audio)
+from gemini_client import DEFAULT_REQUESTS_PER_MINUTE
+
+RESULTS_FILE = "results.jsonl"
+AUDIO_DIR = "audio"
+DEFAULT_WORKERS = 4
+STAGES = ("stt", "llm", "tts")
+
+
+def manifest_job_id(path, base):
+    """Default id of a manifest entry: its path relative to the manifest, or its file name when outside"""
+    try:
+        relative = os.path.relpath(path, base)
+    except ValueError:
+        relative = os.pardir  # Another drive
+    if relative.split(os.sep)[0] == os.pardir:
+        relative = os.path.basename(path)
+    return os.path.splitext(relative)[0].replace(os.sep, "/")
+
+
+def check_job_id(job_id):
+    """Reject ids that would write results outside the output directory"""
+    name = str(job_id).replace("\\", "/")
+    if not name or name.startswith("/") or os.path.splitdrive(name)[0] or os.pardir in name.split("/"):
+        raise ValueError(f"Job id must be a relative path without '..': {job_id!r}")
+
+
+def load_jobs(source, personality, language):
+    """List the recordings to process: [{"id", "path", "personality", "language"}]"""
+    if os.path.isdir(source):
+        jobs = []
+        for directory, _, files in os.walk(source):
+            for name in files:
+                if name.lower().endswith(".wav"):
+                    path = os.path.join(directory, name)
+                    job_id = os.path.splitext(os.path.relpath(path, source))[0].replace(os.sep, "/")
+                    jobs.append({"id": job_id, "path": path})
+        jobs.sort(key=lambda job: job["id"])
+    else:
+        base = os.path.dirname(os.path.abspath(source))
+        jobs = []
+        with open(source, encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                entry = json.loads(line)
+                path = os.path.normpath(os.path.join(base, entry["path"]))
+                job = dict(entry, path=path)
+                job.setdefault("id", manifest_job_id(path, base))
+                jobs.append(job)
+
+    for job in jobs:
+        check_job_id(job["id"])
+        job.setdefault("personality", personality)
+        job.setdefault("language", language)
+        if job["personality"] not in PERSONALITIES:
+            raise ValueError(f"Unknown personality for {job['id']}: {job['personality']}")
+        if job["language"] not in LANGUAGES:
+            raise ValueError(f"Unknown language for {job['id']}: {job['language']}")
+    return jobs
+
+
+def load_finished(output_dir):
+    """Ids already answered by an earlier run, read from results.jsonl"""
+    finished = set()
+    path = os.path.join(output_dir, RESULTS_FILE)
+    if not os.path.exists(path):
+        return finished
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                result = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # A line cut short when the last run was interrupted
+            if result.get("status") in ("ok", "no_speech"):
+                finished.add(result["id"])
+    return finished
+
+
+class BatchPipeline:
+    """STT -> Gemini -> TTS for one recording at a time (safe to share between threads)"""
+
+    def __init__(self, output_dir, slow=False, speak=True, stt_backend=None, model_for=None, synthesize=None):
+        self.output_dir = output_dir
+        self.slow = slow
+        self.speak = speak
+        self.stt_backend = stt_backend or get_stt_backend()
+        self.model_for = model_for or get_ai_model
+        self.synthesize = synthesize or generate_tts_audio
+
+    def run(self, job):
+        """Process one recording and return its result line"""
+        result = {
+            "id": job["id"],
+            "path": job["path"],
+            "personality": job["personality"],
+            "language": job["language"],
+            "timings": {}
+        }
+        timings = result["timings"]
+        language = LANGUAGES[job["language"]]
+        try:
+            with open(job["path"], "rb") as f:
+                wav_bytes = f.read()
+
+            start = time.perf_counter()
+            transcript, stats = transcribe_audio(wav_bytes, language["code"], self.stt_backend)
+            timings["stt"] = time.perf_counter() - start
+            result["audio_seconds"] = stats["audio_seconds"]
+            if not transcript:
+                result["status"] = "no_speech"
+                return result
+            result["transcript"] = transcript
+
+            start = time.perf_counter()
+            reply = self.model_for(job["personality"], job["language"]).generate_content(transcript).text
+            timings["llm"] = time.perf_counter() - start
+            result["reply"] = reply
+
+            if self.speak:
+                start = time.perf_counter()
+                audio = self.synthesize(reply, language=language["tts_code"], slow=self.slow)
+                timings["tts"] = time.perf_counter() - start
+                audio_path = os.path.join(AUDIO_DIR, f"{job['id']}.mp3")
+                full_path = os.path.join(self.output_dir, audio_path)
+                os.makedirs(os.path.dirname(full_path), exist_ok=True)
+                with open(full_path, "wb") as f:
+                    f.write(audio)
+                result["audio"] = audio_path
+
+            result["status"] = "ok"
+        except sr.UnknownValueError:
+            result["status"] = "no_speech"  # Speech-like noise the recognizer could not make out
+        except Exception as e:
+            result["status"] = "error"
+            result["error"] = f"{type(e).__name__}: {e}"
+        return result
+
+
+# Each worker process builds its own pipeline (models, STT backend, TTS cache) once
+_worker_pipeline = None
+
+
+def _init_worker(output_dir, slow, speak, requests_per_minute):
+    global _worker_pipeline
+    load_dotenv()
+    # Every process has its own rate limiter, so each gets a share of the quota
+    os.environ["GEMINI_RPM"] = str(requests_per_minute)
+    _worker_pipeline = BatchPipeline(output_dir, slow=slow, speak=speak)
+
+
+def _run_in_worker(job):
+    return _worker_pipeline.run(job)
+
+
+def run_batch(jobs, output_dir, workers=DEFAULT_WORKERS, executor="thread", slow=False, speak=True,
+              pipeline=None, progress=None):
+    """Process the jobs on `workers` workers (at most twice that many queued), appending to results.jsonl
+
+    Returns a summary dict with counts, elapsed time and throughput.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    finished = load_finished(output_dir)
+    pending = [job for job in jobs if job["id"] not in finished]
+
+    if executor == "process":
+        share = float(os.getenv("GEMINI_RPM", DEFAULT_REQUESTS_PER_MINUTE)) / workers
+        pool = ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(output_dir, slow, speak, share))
+        submit = lambda job: pool.submit(_run_in_worker, job)
+    else:
+        pipeline = pipeline or BatchPipeline(output_dir, slow=slow, speak=speak)
+        pool = ThreadPoolExecutor(workers)
+        submit = lambda job: pool.submit(pipeline.run, job)
+
+    counts = {"ok": 0, "no_speech": 0, "error": 0}
+    stage_totals = dict.fromkeys(STAGES, 0.0)
+    audio_seconds = 0.0
+    start = time.perf_counter()
+
+    with pool, open(os.path.join(output_dir, RESULTS_FILE), "a", encoding="utf-8") as results:
+        queue = iter(pending)
+        in_flight = set()
+        while True:
+            # Keep the pool busy without queueing every recording up front
+            while len(in_flight) < workers * 2:
+                job = next(queue, None)
+                if job is None:
+                    break
+                in_flight.add(submit(job))
+            if not in_flight:
+                break
+
+            done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                result = future.result()
+                results.write(json.dumps(result, ensure_ascii=False) + "\n")
+                results.flush()
+
+                counts[result["status"]] += 1
+                audio_seconds += result.get("audio_seconds", 0.0)
+                for stage, seconds in result["timings"].items():
+                    stage_totals[stage] += seconds
+                if progress is not None:
+                    progress(sum(counts.values()), len(pending), result)
+
+    elapsed = time.perf_counter() - start
+    processed = sum(counts.values())
+    return {
+        "total": len(jobs),
+        "skipped": len(jobs) - len(pending),
+        "processed": processed,
+        **counts,
+        "elapsed_seconds": elapsed,
+        "recordings_per_minute": processed / elapsed * 60 if elapsed else 0.0,
+        "audio_seconds": audio_seconds,
+        "realtime_factor": audio_seconds / elapsed if elapsed else 0.0,  # Seconds of audio per wall-clock second
+        "stage_seconds": stage_totals
+    }
+
+
+def print_progress(done, total, result):
+    status = "✅" if result["status"] == "ok" else ("🔇" if result["status"] == "no_speech" else "❌")
+    detail = result.get("error") or result.get("transcript", "")
+    print(f"[{done}/{total}] {status} {result['id']}  {detail[:60]}")
+
+
+def print_summary(summary):
+    print("=" * 60)
+    print("BATCH SUMMARY")
+    print("=" * 60)
+    print(f"Recordings:  {summary['total']} ({summary['skipped']} already done, {summary['processed']} processed)")
+    print(f"Results:     {summary['ok']} answered · {summary['no_speech']} without speech · {summary['error']} failed")
+    print(f"Elapsed:     {summary['elapsed_seconds']:.1f}s")
+    print(f"Throughput:  {summary['recordings_per_minute']:.1f} recordings/min · "
+          f"{summary['realtime_factor']:.1f}x real time ({summary['audio_seconds']:.0f}s of audio)")
+    for stage, seconds in summary["stage_seconds"].items():
+        if summary["processed"]:
+            print(f"  {stage:<4} {seconds / summary['processed'] * 1000:>8.0f} ms per recording (busy time)")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("source", help="Directory of WAV files or a JSONL manifest")
+    parser.add_argument("--output", required=True, help="Directory for results.jsonl and audio/")
+    parser.add_argument("--personality", default="General Assistant", choices=list(PERSONALITIES))
+    parser.add_argument("--language", default="English", choices=list(LANGUAGES))
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="Recordings processed at once")
+    parser.add_argument("--executor", choices=["thread", "process"], default="thread",
+                        help="Threads share one Gemini rate limiter; processes split GEMINI_RPM between them")
+    parser.add_argument("--slow", action="store_true", help="Slow speech for the spoken replies")
+    parser.add_argument("--no-tts", action="store_true", help="Only transcribe and answer")
+    parser.add_argument("--quiet", action="store_true", help="No per-recording progress lines")
+    args = parser.parse_args(argv)
+
+    load_dotenv()
+    jobs = load_jobs(args.source, args.personality, args.language)
+    summary = run_batch(
+        jobs, args.output,
+        workers=args.workers,
+        executor=args.executor,
+        slow=args.slow,
+        speak=not args.no_tts,
+        progress=None if args.quiet else print_progress
+    )
+    print_summary(summary)
+    return 1 if summary["error"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
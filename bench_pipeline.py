@@ -0,0 +1,398 @@
+#!/usr/bin/env python3
+"""
+Headless end-to-end latency benchmark for a voice turn.
+
+Runs a recording through the same assistant_core stages app.py and the
+voice API use - transcribe_audio (silence trimming, preprocessing, speech
+recognition), voice command dispatch, context building, stream_reply
+through the GeminiClient layer and sentence-by-sentence text-to-speech -
+over the WAV fixtures in bench_fixtures/. Only the services are replaced:
+Google STT, the Gemini model and gTTS are local stand-ins with injected
+latency, so results are repeatable and need no network.
+
+Reports p50/p95/p99 per stage and end to end, and compares them with a
+saved baseline; the exit code is 1 when a stage regressed. Baselines are
+machine specific - record one on the machine that runs the comparison.
+
+Usage:
+    python bench_pipeline.py                    # run and compare with bench_baseline.json
+    python bench_pipeline.py --save-baseline    # record a new baseline
+    python bench_pipeline.py --stt-ms 300 --llm-ms 800 --tts-ms 250 --no-stream
+    python bench_pipeline.py --make-fixtures    # regenerate the WAV fixtures
+"""
+
+import argparse
+import functools
+import json
+import math
+import os
+import random
+import sys
+import time
+from contextlib import contextmanager
+
+import numpy as np
+
+from assistant_core import dispatch_voice_command, finish_speech, stream_reply, transcribe_audio
+from audio_frontend import write_wav
+from conversation_context import ConversationContext
+from gemini_client import GeminiClient
+from speech_to_text import StubBackend
+from tts_cache import TTSCache
+from tts_pipeline import SpeechPipeline, synthesize_long_text
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bench_fixtures")
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bench_baseline.json")
+FIXTURE_RATE = 8000  # Low rate keeps the checked-in WAVs small; preprocessing resamples to 16 kHz
+
+# Recorded utterances and what the stand-in recognizer "hears" in each
+FIXTURES = [
+    {"file": "command.wav", "seconds": 1.5, "seed": 1, "transcript": "speak slower"},
+    {"file": "question.wav", "seconds": 4.0, "seed": 2,
+     "transcript": "what should I eat before a morning run"},
+    {"file": "dictation.wav", "seconds": 18.0, "seed": 3,
+     "transcript": "I am planning a trip to Japan next spring and I would like to see the cherry "
+                   "blossoms, visit a few temples in Kyoto and try the street food in Osaka, so "
+                   "could you suggest a two week itinerary that is not too rushed"}
+]
+
+# Earlier turns already in the chat, so context building has some work to do
+HISTORY = [
+    {"role": "user", "content": "Hi there, can you help me plan my week?"},
+    {"role": "assistant", "content": "Of course! Tell me what you have coming up and what matters most."},
+    {"role": "user", "content": "I have three workouts, two deadlines and a birthday dinner."},
+    {"role": "assistant", "content": "Let's put the deadlines first, then fit the workouts around them."}
+]
+
+REPLY = ("Here is a plan that should work well for you. Start with something light and easy to digest. "
+         "A banana with a little peanut butter is a classic choice. Give yourself thirty to sixty minutes "
+         "before you head out, and drink a glass of water as well. Save the bigger meal for after the run, "
+         "when your body is ready to refuel.")
+REPLY_CHUNK_CHARS = 24  # Roughly what one streamed Gemini chunk carries
+BENCH_REQUESTS_PER_MINUTE = 10 ** 6  # Gemini quota high enough that pacing never delays a benchmark turn
+
+STAGES = ["vad", "preprocess", "stt", "command", "context", "llm_first_token", "llm", "tts", "total"]
+PERCENTILES = [50, 95, 99]
+
+
+class Latency:
+    """Injected service latency: lognormal around a mean, so runs have a realistic tail"""
+
+    def __init__(self, mean_ms, jitter=0.3, rng=None):
+        self.mean_ms = mean_ms
+        self.jitter = jitter
+        self.rng = rng or random.Random(0)
+
+    def sample(self):
+        if self.mean_ms <= 0:
+            return 0.0
+        factor = math.exp(self.rng.gauss(0, self.jitter) - self.jitter ** 2 / 2)
+        return self.mean_ms * factor / 1000
+
+    def wait(self):
+        delay = self.sample()
+        if delay:
+            time.sleep(delay)
+
+
+class _Chunk:
+    def __init__(self, text):
+        self.text = text
+
+
+class FakeGemini:
+    """Stand-in for a Gemini GenerativeModel: a fixed reply after injected delays"""
+
+    def __init__(self, first_token, per_chunk):
+        self.first_token = first_token
+        self.per_chunk = per_chunk
+        self.calls = 0
+
+    def generate_content(self, contents, stream=False):
+        self.calls += 1
+        # A fresh reply every call, so TTS is never served from the cache
+        reply = f"Answer {self.calls}. {REPLY}"
+        if stream:
+            return self._stream(reply)
+        self.first_token.wait()
+        for _ in range(0, len(reply), REPLY_CHUNK_CHARS):
+            self.per_chunk.wait()
+        return _Chunk(reply)
+
+    def _stream(self, reply):
+        self.first_token.wait()
+        for start in range(0, len(reply), REPLY_CHUNK_CHARS):
+            if start:
+                self.per_chunk.wait()
+            yield _Chunk(reply[start:start + REPLY_CHUNK_CHARS])
+
+
+def fake_gtts(latency):
+    """Stand-in for synthesize_speech: one injected delay per gTTS request"""
+    def synthesize(text, language="en", slow=False):
+        latency.wait()
+        return b"\xff\xf3" + text.encode("utf-8")
+    return synthesize
+
+
+def speech_like(seconds, sample_rate, seed):
+    """Voiced phrases with syllable-rate loudness and real pauses, over quiet room noise"""
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(seconds * sample_rate)) / sample_rate
+    signal = rng.normal(0, 0.002, len(t))
+
+    position = 0.3
+    while position < seconds - 0.6:
+        end = min(position + rng.uniform(0.8, 2.5), seconds - 0.3)
+        mask = (t >= position) & (t < end)
+        pitch = rng.uniform(110, 220)
+        envelope = 0.5 * (1 - np.cos(2 * np.pi * 4 * (t[mask] - position)))  # ~4 syllables a second
+        voice = sum(np.sin(2 * np.pi * pitch * k * t[mask]) / k for k in (1, 2, 3))
+        signal[mask] += 0.2 * envelope * voice
+        position = end + rng.uniform(0.35, 0.7)
+    return signal
+
+
+def make_fixtures(directory=FIXTURES_DIR):
+    """(Re)write the WAV fixtures"""
+    os.makedirs(directory, exist_ok=True)
+    for fixture in FIXTURES:
+        samples = speech_like(fixture["seconds"], FIXTURE_RATE, fixture["seed"])
+        with open(os.path.join(directory, fixture["file"]), "wb") as f:
+            f.write(write_wav(samples[:, None], FIXTURE_RATE))
+
+
+def load_fixtures(directory=FIXTURES_DIR):
+    """Return [(fixture, wav_bytes)] for every fixture"""
+    loaded = []
+    for fixture in FIXTURES:
+        with open(os.path.join(directory, fixture["file"]), "rb") as f:
+            loaded.append((fixture, f.read()))
+    return loaded
+
+
+class LatencyBackend(StubBackend):
+    """Stand-in recognizer with injected latency, recording when recognition ran"""
+
+    name = "bench"
+
+    def __init__(self, latency, transcript):
+        super().__init__(default=transcript)
+        self.latency = latency
+        self.window = None  # (first start, last end) of the recognize calls
+
+    def _recognize(self, audio_data, language):
+        start = time.perf_counter()
+        self.latency.wait()
+        text = super()._recognize(audio_data, language)
+        end = time.perf_counter()
+        with self._lock:
+            first, last = self.window or (start, end)
+            self.window = (min(first, start), max(last, end))
+        return text
+
+
+class Rig:
+    """The stand-in services and shared caches one benchmark run uses"""
+
+    def __init__(self, stt_ms=150, llm_ms=300, chunk_ms=20, tts_ms=100, jitter=0.3, seed=0, stream=True):
+        rng = random.Random(seed)
+        self.stt = Latency(stt_ms, jitter, rng)
+        # Through the real client layer (pacing, single-flight, retries), with a quota the benchmark never hits
+        self.client = GeminiClient(requests_per_minute=BENCH_REQUESTS_PER_MINUTE, burst=BENCH_REQUESTS_PER_MINUTE)
+        self.model = self.client.wrap(FakeGemini(Latency(llm_ms, jitter, rng), Latency(chunk_ms, jitter, rng)))
+        self.synthesize = fake_gtts(Latency(tts_ms, jitter, rng))
+        self.tts_cache = TTSCache(cache_dir=None)
+        self.stream = stream
+        self.config = {
+            "stt_ms": stt_ms, "llm_ms": llm_ms, "chunk_ms": chunk_ms, "tts_ms": tts_ms,
+            "jitter": jitter, "stream": stream
+        }
+
+    def stt_backend(self, transcript):
+        """A recognizer that hears transcript"""
+        return LatencyBackend(self.stt, transcript)
+
+
+def run_turn(rig, wav_bytes, transcript, language_code="en-US", tts_lang="en"):
+    """Run one voice turn through the assistant_core stages app.py uses and return {stage: seconds}"""
+    spans = {}
+
+    @contextmanager
+    def span(stage):
+        start = time.perf_counter()
+        yield
+        spans[stage] = time.perf_counter() - start
+
+    turn_start = time.perf_counter()
+    backend = rig.stt_backend(transcript)
+    text, stats = transcribe_audio(wav_bytes, language_code, backend)
+    if text is None:
+        raise ValueError("Fixture contains no speech")
+    # Split the recognition step into its local front end and the recognizer calls
+    spans["stt"] = backend.window[1] - backend.window[0]
+    spans["preprocess"] = stats["frontend"]["processing_ms"] / 1000
+    spans["vad"] = max(0.0, backend.window[0] - turn_start - spans["preprocess"])
+
+    with span("command"):
+        command = dispatch_voice_command(text, language_code, "General Assistant", False)
+
+    if command is None:
+        messages = HISTORY + [{"role": "user", "content": text}]
+        with span("context"):
+            contents, _ = ConversationContext().build(messages)
+
+        if rig.stream:
+            # Sentences go to TTS while the reply streams, as in the app and the voice API
+            speech = SpeechPipeline(
+                language=tts_lang,
+                synthesize=functools.partial(rig.tts_cache.get_or_synthesize, synthesize=rig.synthesize)
+            )
+            _, timing = stream_reply(rig.model, contents, lambda delta, reply: None, speech)
+            spans["llm_first_token"] = timing["ttft"]
+            spans["llm"] = timing["ttlt"]
+            with span("tts"):
+                finish_speech(speech)
+        else:
+            with span("llm"):
+                reply = rig.model.generate_content(contents).text
+            spans["llm_first_token"] = spans["llm"]
+            with span("tts"):
+                rig.tts_cache.get_or_synthesize(
+                    reply, language=tts_lang,
+                    synthesize=functools.partial(synthesize_long_text, synthesize=rig.synthesize)
+                )
+
+    spans["total"] = time.perf_counter() - turn_start
+    return spans
+
+
+def percentile(values, p):
+    """Nearest-rank percentile of an unsorted list"""
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(p / 100 * len(ordered)))]
+
+
+def summarize(samples):
+    """{stage: [seconds]} -> {stage: {"n", "p50", "p95", "p99"}} in milliseconds"""
+    summary = {}
+    for stage in STAGES:
+        values = samples.get(stage)
+        if not values:
+            continue
+        summary[stage] = {"n": len(values)}
+        for p in PERCENTILES:
+            summary[stage][f"p{p}"] = percentile(values, p) * 1000
+    return summary
+
+
+def run_benchmark(iterations=10, fixtures=None, **rig_options):
+    """Run every fixture `iterations` times; returns {"config", "stages"}"""
+    fixtures = fixtures if fixtures is not None else load_fixtures()
+    rig = Rig(**rig_options)
+    samples = {}
+
+    # One untimed pass so first-call costs (imports, numpy setup) don't land in the tail
+    for fixture, wav_bytes in fixtures:
+        run_turn(rig, wav_bytes, fixture["transcript"])
+
+    for _ in range(iterations):
+        for fixture, wav_bytes in fixtures:
+            for stage, seconds in run_turn(rig, wav_bytes, fixture["transcript"]).items():
+                samples.setdefault(stage, []).append(seconds)
+
+    return {"config": dict(rig.config, iterations=iterations), "stages": summarize(samples)}
+
+
+def compare(results, baseline, tolerance=0.2, min_delta_ms=10.0):
+    """Return [(stage, percentile, baseline_ms, current_ms)] for every regression
+
+    A regression is slower than the baseline by more than `tolerance` and
+    by at least `min_delta_ms`, so scheduler noise on the fast local
+    stages is not reported.
+    """
+    regressions = []
+    for stage, current in results["stages"].items():
+        previous = baseline.get("stages", {}).get(stage)
+        if previous is None:
+            continue
+        for p in PERCENTILES:
+            key = f"p{p}"
+            if current[key] > previous[key] * (1 + tolerance) and current[key] - previous[key] >= min_delta_ms:
+                regressions.append((stage, key, previous[key], current[key]))
+    return regressions
+
+
+def print_report(results, baseline=None):
+    print("=" * 72)
+    print("VOICE PIPELINE LATENCY BENCHMARK")
+    print("=" * 72)
+    print("Config: " + ", ".join(f"{key}={value}" for key, value in results["config"].items()))
+    print(f"{'stage':<16} {'n':>5} {'p50 (ms)':>10} {'p95 (ms)':>10} {'p99 (ms)':>10} {'p50 vs base':>12}")
+
+    for stage, row in results["stages"].items():
+        line = f"{stage:<16} {row['n']:>5} {row['p50']:>10.1f} {row['p95']:>10.1f} {row['p99']:>10.1f}"
+        previous = (baseline or {}).get("stages", {}).get(stage)
+        if previous and previous["p50"] > 0:
+            line += f" {(row['p50'] / previous['p50'] - 1) * 100:>+11.0f}%"
+        print(line)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=10, help="Runs of every fixture")
+    parser.add_argument("--stt-ms", type=float, default=150, help="Mean speech recognition latency")
+    parser.add_argument("--llm-ms", type=float, default=300, help="Mean Gemini time to first token")
+    parser.add_argument("--chunk-ms", type=float, default=20, help="Mean gap between streamed chunks")
+    parser.add_argument("--tts-ms", type=float, default=100, help="Mean latency of one gTTS request")
+    parser.add_argument("--jitter", type=float, default=0.3, help="Spread of the injected latencies")
+    parser.add_argument("--no-stream", action="store_true", help="Use the blocking (non-streaming) reply path")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="Baseline JSON to compare with")
+    parser.add_argument("--save-baseline", action="store_true", help="Write the results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed slowdown before failing")
+    parser.add_argument("--min-delta-ms", type=float, default=10.0, help="Ignore slowdowns smaller than this")
+    parser.add_argument("--make-fixtures", action="store_true", help="Regenerate the WAV fixtures and exit")
+    args = parser.parse_args(argv)
+
+    if args.make_fixtures:
+        make_fixtures()
+        print(f"Wrote {len(FIXTURES)} fixtures to {FIXTURES_DIR}")
+        return 0
+
+    results = run_benchmark(
+        iterations=args.iterations, stt_ms=args.stt_ms, llm_ms=args.llm_ms, chunk_ms=args.chunk_ms,
+        tts_ms=args.tts_ms, jitter=args.jitter, stream=not args.no_stream
+    )
+
+    baseline = None
+    if not args.save_baseline and os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    print_report(results, baseline)
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nBaseline saved to {args.baseline}")
+        return 0
+
+    if baseline is None:
+        print("\nNo baseline to compare with - run with --save-baseline to record one")
+        return 0
+
+    if baseline["config"] != results["config"]:
+        print("\n⚠️  Baseline was recorded with different settings - the comparison may not be meaningful")
+
+    regressions = compare(results, baseline, tolerance=args.tolerance, min_delta_ms=args.min_delta_ms)
+    if regressions:
+        print(f"\n❌ {len(regressions)} regression(s) beyond {args.tolerance:.0%}:")
+        for stage, key, previous, current in regressions:
+            print(f"   {stage} {key}: {previous:.1f} ms -> {current:.1f} ms")
+        return 1
+
+    print(f"\n✅ No stage slower than the baseline by more than {args.tolerance:.0%}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
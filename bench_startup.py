@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+Startup benchmark for the Streamlit app.
+
+Runs app.py headlessly (Streamlit's AppTest) in a fresh interpreter
+started with `-X importtime`, and reports:
+
+- the import-time profile of the first run, grouped by top-level package
+- whether the heavy SDKs (Gemini, SpeechRecognition, gTTS) were loaded
+  before any voice or LLM feature was used
+- the cold first run and the average warm rerun
+- the per-rerun payload: serialized size of every element the script sends
+
+Results are compared with a saved baseline like bench_pipeline.py; the
+exit code is 1 when startup got slower or the payload grew.
+
+Usage:
+    python bench_startup.py                    # run and compare with bench_startup_baseline.json
+    python bench_startup.py --save-baseline    # record a new baseline
+    python bench_startup.py --app path/to/app.py --top 15
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_BASELINE = os.path.join(ROOT, "bench_startup_baseline.json")
+
+# Modules that should only load once their feature is used
+HEAVY_MODULES = ["google.generativeai", "speech_recognition", "gtts"]
+
+# Compared with the baseline: (result key, allowed relative growth, ignored absolute growth)
+TRACKED = [
+    ("import_ms", 0.2, 50.0),
+    ("first_run_ms", 0.2, 100.0),
+    ("rerun_ms", 0.3, 10.0),
+    ("payload_bytes", 0.05, 256)
+]
+
+# Runs inside the child interpreter; prints one JSON line of results
+CHILD = r"""
+import json, sys, time
+from streamlit.testing.v1 import AppTest
+
+def walk(node):
+    yield node
+    for child in getattr(node, "children", {}).values():
+        yield from walk(child)
+
+def payload_bytes(at):
+    return sum(len(node.proto.SerializeToString()) for node in walk(at._tree) if getattr(node, "proto", None) is not None)
+
+app, reruns, heavy = sys.argv[1], int(sys.argv[2]), sys.argv[3].split(",")
+start = time.perf_counter()
+at = AppTest.from_file(app, default_timeout=120)
+at.run()
+first_run = time.perf_counter() - start
+loaded = [name for name in heavy if name in sys.modules]
+
+start = time.perf_counter()
+for _ in range(reruns):
+    at.run()
+rerun = (time.perf_counter() - start) / reruns
+
+print(json.dumps({
+    "first_run_ms": first_run * 1000,
+    "rerun_ms": rerun * 1000,
+    "payload_bytes": payload_bytes(at),
+    "heavy_modules_loaded": loaded,
+    "exceptions": [str(e.value) for e in at.exception]
+}))
+"""
+
+
+def parse_importtime(stderr):
+    """Sum `-X importtime` output per top-level package: {package: cumulative_us}"""
+    packages = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        # Nested imports are indented; only top-level entries add up to the total
+        if name.startswith("  "):
+            continue
+        package = name.strip().split(".")[0]
+        packages[package] = packages.get(package, 0) + int(cumulative)
+    return packages
+
+
+def profile_startup(app_path, reruns=5):
+    """Run the app once cold plus `reruns` warm reruns in a fresh interpreter"""
+    child = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", CHILD, app_path, str(reruns), ",".join(HEAVY_MODULES)],
+        cwd=os.path.dirname(os.path.abspath(app_path)),
+        capture_output=True,
+        text=True,
+        check=True
+    )
+    results = json.loads(child.stdout.strip().splitlines()[-1])
+    packages = parse_importtime(child.stderr)
+    results["import_ms"] = sum(packages.values()) / 1000
+    results["packages_ms"] = {
+        package: us / 1000 for package, us in sorted(packages.items(), key=lambda item: -item[1])
+    }
+    return results
+
+
+def compare(results, baseline):
+    """Return [(key, baseline, current)] for every tracked value that regressed"""
+    regressions = []
+    for key, tolerance, min_delta in TRACKED:
+        if key not in baseline:
+            continue
+        if results[key] > baseline[key] * (1 + tolerance) and results[key] - baseline[key] >= min_delta:
+            regressions.append((key, baseline[key], results[key]))
+    return regressions
+
+
+def print_report(results, baseline=None, top=10):
+    print("=" * 60)
+    print("APP STARTUP BENCHMARK")
+    print("=" * 60)
+    print(f"{'package':<30} {'import (ms)':>12}")
+    for package, ms in list(results["packages_ms"].items())[:top]:
+        print(f"{package:<30} {ms:>12.1f}")
+    print()
+
+    for key, _, _ in TRACKED:
+        line = f"{key:<30} {results[key]:>12.1f}"
+        if baseline and baseline.get(key):
+            line += f"   {(results[key] / baseline[key] - 1) * 100:>+5.0f}% vs baseline"
+        print(line)
+
+    loaded = results["heavy_modules_loaded"]
+    print(f"\nHeavy SDKs loaded at first paint: {', '.join(loaded) if loaded else 'none'}")
+    if results["exceptions"]:
+        print(f"⚠️  The app raised: {results['exceptions']}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--app", default=os.path.join(ROOT, "app.py"), help="Streamlit script to profile")
+    parser.add_argument("--reruns", type=int, default=5, help="Warm reruns to average")
+    parser.add_argument("--top", type=int, default=10, help="Packages to list in the import profile")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="Baseline JSON to compare with")
+    parser.add_argument("--save-baseline", action="store_true", help="Write the results as the new baseline")
+    args = parser.parse_args(argv)
+
+    results = profile_startup(args.app, args.reruns)
+
+    baseline = None
+    if not args.save_baseline and os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    print_report(results, baseline, args.top)
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nBaseline saved to {args.baseline}")
+        return 0
+
+    if baseline is None:
+        print("\nNo baseline to compare with - run with --save-baseline to record one")
+        return 0
+
+    regressions = compare(results, baseline)
+    if regressions:
+        print(f"\n❌ {len(regressions)} regression(s):")
+        for key, previous, current in regressions:
+            print(f"   {key}: {previous:.1f} -> {current:.1f}")
+        return 1
+
+    print("\n✅ Startup is no slower and no heavier than the baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
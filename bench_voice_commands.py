@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark for voice command matching.
+
+Compares the old "loop over every phrase and test `in`" approach with the
+compiled CommandMatcher as the command table grows. The compiled matcher
+should stay roughly flat while the loop grows with the number of commands.
+
+Usage: python bench_voice_commands.py
+"""
+
+import timeit
+
+from voice_commands import VOICE_COMMANDS, CommandMatcher
+
+WORDS = ["alpha", "bravo", "charlie", "delta", "echo", "foxtrot", "golf", "hotel"]
+TRANSCRIPT = "could you please tell me what the weather will be like tomorrow afternoon in the city"
+
+
+def synthetic_commands(count):
+    """The real command table padded with made-up multi-word phrases"""
+    commands = dict(VOICE_COMMANDS)
+    i = 0
+    while len(commands) < count:
+        commands[f"{WORDS[i % len(WORDS)]} {WORDS[(i // len(WORDS)) % len(WORDS)]} command {i}"] = "noop"
+        i += 1
+    return commands
+
+
+def loop_match(commands, text):
+    """The original substring loop from app.py"""
+    text_lower = text.lower().strip()
+    for command, action in commands.items():
+        if command in text_lower:
+            return action
+    return None
+
+
+def run_benchmark(sizes=(30, 300, 3000), repeat=2000):
+    print("=" * 60)
+    print("VOICE COMMAND MATCHING BENCHMARK")
+    print("=" * 60)
+    print(f"{'commands':>10} {'loop (µs)':>12} {'compiled (µs)':>15}")
+
+    for size in sizes:
+        commands = synthetic_commands(size)
+        matcher = CommandMatcher(commands)
+
+        loop_time = timeit.timeit(lambda: loop_match(commands, TRANSCRIPT), number=repeat)
+        compiled_time = timeit.timeit(lambda: matcher.match(TRANSCRIPT), number=repeat)
+
+        print(f"{len(commands):>10} {loop_time / repeat * 1e6:>12.2f} {compiled_time / repeat * 1e6:>15.2f}")
+
+
+if __name__ == "__main__":
+    run_benchmark()
@@ -0,0 +1,62 @@
+"""
+HTML for the chat UI: the stylesheet and the message bubbles.
+
+Streamlit re-executes app.py on every rerun, so caches defined there
+start empty each time. Living in an imported module, these caches last
+for the whole server process: the stylesheet is read and hashed once,
+and each finished message's bubble is built once and reused on every
+rerun of every session.
+"""
+
+import functools
+import hashlib
+import os
+
+STYLES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static", "styles.css")
+
+
+@functools.lru_cache(maxsize=1)
+def read_styles():
+    """The app stylesheet and a short content hash used to bust the browser cache"""
+    with open(STYLES_PATH, encoding="utf-8") as f:
+        css = f.read()
+    return css, hashlib.sha256(css.encode("utf-8")).hexdigest()[:12]
+
+
+def assistant_bubble_html(content):
+    """Build the styled HTML bubble for an assistant message"""
+    return f"""
+    <div style="background: linear-gradient(135deg, #ECFEFF 0%, #CFFAFE 100%);
+                border-left: 5px solid #06B6D4;
+                border-radius: 16px;
+                padding: 1.25rem;
+                margin: 0.75rem 0;
+                box-shadow: 0 4px 16px rgba(0, 0, 0, 0.1);">
+        <strong style="color: #06B6D4;">🤖 AI Assistant</strong><br>
+        <div style="margin-top: 0.5rem; color: #1E293B;">{content}</div>
+    </div>
+    """
+
+
+def user_bubble_html(content):
+    """Build the styled HTML bubble for a user message"""
+    return f"""
+    <div style="background: linear-gradient(135deg, #EEF2FF 0%, #E0E7FF 100%);
+                border-left: 5px solid #4F46E5;
+                border-radius: 16px;
+                padding: 1.25rem;
+                margin: 0.75rem 0;
+                box-shadow: 0 4px 16px rgba(0, 0, 0, 0.1);">
+        <strong style="color: #4F46E5;">👤 You</strong><br>
+        <div style="margin-top: 0.5rem; color: #1E293B;">{content}</div>
+    </div>
+    """
+
+
+# Finished messages never change, so their HTML is built once and reused on every rerun
+@functools.lru_cache(maxsize=1024)
+def message_html(role, content):
+    """Return the cached chat bubble HTML for a finished message"""
+    if role == "user":
+        return user_bubble_html(content)
+    return assistant_bubble_html(content)
@@ -0,0 +1,124 @@
+"""
+Token-budgeted conversation history for Gemini.
+
+The most recent turns are sent word for word; older turns are folded
+into a running summary that is updated incrementally, so the prompt
+never grows past the configured token budget however long the chat gets.
+"""
+
+import re
+
+DEFAULT_TOKEN_BUDGET = 4000
+DEFAULT_SUMMARY_WORDS = 150
+
+# Assistant messages with this prefix are local error reports, not real turns
+ERROR_PREFIX = "❌ Error:"
+
+SUMMARY_INTRO = "Summary of our conversation so far:\n"
+SUMMARY_ACK = "Got it, I'll keep that in mind."
+
+
+# Han, kana and Hangul run about one token per character, not four characters per token
+CJK_CHARS = re.compile(r'[\u1100-\u11ff\u3040-\u30ff\u3130-\u318f\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uf900-\ufaff]')
+
+
+def estimate_tokens(text):
+    """Cheap local token estimate (one per CJK character, ~4 characters per token otherwise), no API call needed"""
+    cjk = len(CJK_CHARS.findall(text))
+    return cjk + (len(text) - cjk) // 4 + 1
+
+
+def _first_sentence(text, max_chars=200):
+    sentence = re.split(r'(?<=[.!?。！？])\s*', text.strip(), maxsplit=1)[0]
+    return sentence[:max_chars]
+
+
+def truncating_summarizer(summary, messages, max_words=DEFAULT_SUMMARY_WORDS):
+    """Offline summarizer: keep the first sentence of each turn, capped at max_words"""
+    lines = [summary] if summary else []
+    for message in messages:
+        speaker = "User" if message["role"] == "user" else "Assistant"
+        lines.append(f"{speaker}: {_first_sentence(message['content'])}")
+
+    # Drop the oldest words once the summary is over its cap
+    words = "\n".join(lines).split(" ")
+    return " ".join(words[-max_words:])
+
+
+def make_model_summarizer(model, max_words=DEFAULT_SUMMARY_WORDS):
+    """Build a summarizer that asks a Gemini model to fold new turns into the summary"""
+    def summarize(summary, messages):
+        transcript = "\n".join(
+            f"{'User' if m['role'] == 'user' else 'Assistant'}: {m['content']}" for m in messages
+        )
+        prompt = (
+            f"Update the running summary of a conversation in at most {max_words} words. "
+            f"Keep names, facts, preferences and open questions.\n\n"
+            f"Current summary:\n{summary or '(empty)'}\n\nNew turns:\n{transcript}"
+        )
+        try:
+            return model.generate_content(prompt).text.strip()
+        except Exception:
+            # Never fail a reply because the summary could not be updated
+            return truncating_summarizer(summary, messages, max_words)
+
+    return summarize
+
+
+class ConversationContext:
+    """Builds Gemini multi-turn contents capped at a token budget"""
+
+    def __init__(self, token_budget=DEFAULT_TOKEN_BUDGET, summarize=truncating_summarizer,
+                 count_tokens=estimate_tokens):
+        self.token_budget = token_budget
+        self.summarize = summarize
+        self.count_tokens = count_tokens
+        self.reset()
+
+    def reset(self):
+        """Forget the summary (e.g. when the chat is cleared)"""
+        self.summary = ""
+        self.folded = 0  # Messages already folded into the summary
+
+    def build(self, messages):
+        """Return (contents, prompt_tokens) for the conversation ending with the new user message"""
+        history = [m for m in messages if not m["content"].startswith(ERROR_PREFIX)]
+        if self.folded > len(history):
+            # The history was replaced underneath us
+            self.reset()
+
+        # Keep as many recent messages verbatim as the budget allows (always the newest one)
+        budget = self.token_budget - self.count_tokens(self.summary)
+        keep_from = len(history)
+        used = 0
+        while keep_from > self.folded:
+            cost = self.count_tokens(history[keep_from - 1]["content"])
+            if used + cost > budget and keep_from < len(history):
+                break
+            used += cost
+            keep_from -= 1
+
+        # The verbatim part should open with a user turn
+        while keep_from < len(history) - 1 and history[keep_from]["role"] != "user":
+            keep_from += 1
+
+        # Fold everything older into the running summary, only the new part each time
+        if keep_from > self.folded:
+            self.summary = self.summarize(self.summary, history[self.folded:keep_from])
+            self.folded = keep_from
+
+        contents = []
+        if self.summary:
+            contents.append({"role": "user", "parts": [SUMMARY_INTRO + self.summary]})
+            contents.append({"role": "model", "parts": [SUMMARY_ACK]})
+
+        for message in history[keep_from:]:
+            role = "user" if message["role"] == "user" else "model"
+            if contents and contents[-1]["role"] == role:
+                # Gemini expects alternating turns - merge consecutive ones
+                contents[-1]["parts"].append(message["content"])
+            else:
+                contents.append({"role": role, "parts": [message["content"]]})
+
+        prompt_tokens = sum(self.count_tokens(part) for content in contents for part in content["parts"])
+        return contents, prompt_tokens
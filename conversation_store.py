@@ -0,0 +1,241 @@
+"""
+Pluggable store for conversations, so chats outlive a Streamlit process.
+
+Messages are only ever appended, each at the next sequence number of its
+conversation, and are read back by range: a session opens with its most
+recent page and loads older pages only when asked. Per-conversation
+settings (personality, language, speech speed) are stored alongside.
+
+Backends:
+- memory: in-process, lost on restart (the default)
+- sqlite: a database file shared by every process on the machine
+- redis:  a Redis server (REDIS_URL), or an in-process stand-in with the
+          same commands when no URL is given - handy for tests
+"""
+
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import uuid
+
+DEFAULT_SQLITE_PATH = os.path.join(tempfile.gettempdir(), "voice-assistant-conversations.db")
+REDIS_KEY_PREFIX = "voice-assistant:conversation"
+
+
+def new_conversation_id():
+    return uuid.uuid4().hex
+
+
+class MemoryBackend:
+    """Conversations in a dict of lists (single process only)"""
+
+    def __init__(self):
+        self._messages = {}
+        self._settings = {}
+        self._lock = threading.Lock()
+
+    def append(self, conversation_id, message):
+        """Append a message and return its sequence number"""
+        with self._lock:
+            messages = self._messages.setdefault(conversation_id, [])
+            messages.append(json.dumps(message))
+            return len(messages) - 1
+
+    def count(self, conversation_id):
+        with self._lock:
+            return len(self._messages.get(conversation_id, []))
+
+    def range(self, conversation_id, start, end):
+        """Messages with start <= sequence number < end"""
+        with self._lock:
+            return [json.loads(m) for m in self._messages.get(conversation_id, [])[start:end]]
+
+    def get_settings(self, conversation_id):
+        with self._lock:
+            return json.loads(self._settings.get(conversation_id, "{}"))
+
+    def set_settings(self, conversation_id, settings):
+        with self._lock:
+            self._settings[conversation_id] = json.dumps(settings)
+
+
+class SQLiteBackend:
+    """SQLite file shared by every process on the machine (WAL mode for concurrent readers)"""
+
+    def __init__(self, path=DEFAULT_SQLITE_PATH):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=10, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS messages ("
+            "conversation_id TEXT NOT NULL, seq INTEGER NOT NULL, body TEXT NOT NULL, "
+            "PRIMARY KEY (conversation_id, seq))"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS settings (conversation_id TEXT PRIMARY KEY, body TEXT NOT NULL)"
+        )
+        self._conn.commit()
+
+    def append(self, conversation_id, message):
+        with self._lock:
+            # One statement, so two processes appending at once still get distinct numbers
+            cursor = self._conn.execute(
+                "INSERT INTO messages (conversation_id, seq, body) "
+                "SELECT ?, COALESCE(MAX(seq) + 1, 0), ? FROM messages WHERE conversation_id = ?",
+                (conversation_id, json.dumps(message), conversation_id)
+            )
+            seq = self._conn.execute(
+                "SELECT seq FROM messages WHERE rowid = ?", (cursor.lastrowid,)
+            ).fetchone()[0]
+            self._conn.commit()
+            return seq
+
+    def count(self, conversation_id):
+        with self._lock:
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM messages WHERE conversation_id = ?", (conversation_id,)
+            ).fetchone()[0]
+
+    def range(self, conversation_id, start, end):
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT body FROM messages WHERE conversation_id = ? AND seq >= ? AND seq < ? ORDER BY seq",
+                (conversation_id, start, end)
+            ).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def get_settings(self, conversation_id):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT body FROM settings WHERE conversation_id = ?", (conversation_id,)
+            ).fetchone()
+        return json.loads(row[0]) if row else {}
+
+    def set_settings(self, conversation_id, settings):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO settings (conversation_id, body) VALUES (?, ?)",
+                (conversation_id, json.dumps(settings))
+            )
+            self._conn.commit()
+
+
+class LocalRedis:
+    """In-process stand-in for the handful of Redis commands RedisBackend uses"""
+
+    def __init__(self):
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def rpush(self, key, *values):
+        with self._lock:
+            items = self._data.setdefault(key, [])
+            items.extend(values)
+            return len(items)
+
+    def llen(self, key):
+        with self._lock:
+            return len(self._data.get(key, []))
+
+    def lrange(self, key, start, stop):
+        # Redis ranges include the stop index; -1 means the last element
+        with self._lock:
+            items = self._data.get(key, [])
+            stop = len(items) if stop == -1 else stop + 1
+            return list(items[start:stop])
+
+    def hset(self, key, mapping):
+        with self._lock:
+            self._data.setdefault(key, {}).update(mapping)
+            return len(mapping)
+
+    def hgetall(self, key):
+        with self._lock:
+            return dict(self._data.get(key, {}))
+
+
+class RedisBackend:
+    """Conversations as Redis lists (messages) and hashes (settings)"""
+
+    def __init__(self, client=None, prefix=REDIS_KEY_PREFIX):
+        self.client = client if client is not None else LocalRedis()
+        self.prefix = prefix
+
+    def _key(self, conversation_id, kind):
+        return f"{self.prefix}:{conversation_id}:{kind}"
+
+    def append(self, conversation_id, message):
+        # RPUSH is atomic and returns the new length
+        return self.client.rpush(self._key(conversation_id, "messages"), json.dumps(message)) - 1
+
+    def count(self, conversation_id):
+        return self.client.llen(self._key(conversation_id, "messages"))
+
+    def range(self, conversation_id, start, end):
+        if end <= start:
+            return []
+        values = self.client.lrange(self._key(conversation_id, "messages"), start, end - 1)
+        return [json.loads(value) for value in values]
+
+    def get_settings(self, conversation_id):
+        fields = self.client.hgetall(self._key(conversation_id, "settings"))
+        return {_text(name): json.loads(value) for name, value in fields.items()}
+
+    def set_settings(self, conversation_id, settings):
+        mapping = {name: json.dumps(value) for name, value in settings.items()}
+        if mapping:
+            self.client.hset(self._key(conversation_id, "settings"), mapping=mapping)
+
+
+def _text(value):
+    return value.decode("utf-8") if isinstance(value, bytes) else value
+
+
+class ConversationStore:
+    """Append-only conversation history with paged reads"""
+
+    def __init__(self, backend=None):
+        self.backend = backend if backend is not None else MemoryBackend()
+
+    def append_message(self, conversation_id, message):
+        """Persist one message; returns its sequence number"""
+        return self.backend.append(conversation_id, message)
+
+    def count_messages(self, conversation_id):
+        return self.backend.count(conversation_id)
+
+    def recent_messages(self, conversation_id, limit):
+        """Return (messages, offset): the newest `limit` messages and the sequence number of the first"""
+        total = self.backend.count(conversation_id)
+        offset = max(0, total - limit)
+        return self.backend.range(conversation_id, offset, total), offset
+
+    def messages_before(self, conversation_id, offset, limit):
+        """Return (messages, new_offset): up to `limit` messages just before `offset`"""
+        start = max(0, offset - limit)
+        return self.backend.range(conversation_id, start, offset), start
+
+    def load_settings(self, conversation_id):
+        return self.backend.get_settings(conversation_id)
+
+    def save_settings(self, conversation_id, settings):
+        self.backend.set_settings(conversation_id, settings)
+
+
+def create_backend(name, path=DEFAULT_SQLITE_PATH, redis_url=None):
+    """Create a backend by name ("memory", "sqlite" or "redis")"""
+    if name == "memory":
+        return MemoryBackend()
+    if name == "sqlite":
+        return SQLiteBackend(path)
+    if name == "redis":
+        if not redis_url:
+            return RedisBackend(LocalRedis())
+        try:
+            import redis
+        except ImportError as e:
+            raise ValueError("REDIS_URL is set but the redis package is not installed (pip install redis)") from e
+        return RedisBackend(redis.Redis.from_url(redis_url))
+    raise ValueError(f"Unknown conversation store backend: {name}")
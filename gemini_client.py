@@ -0,0 +1,301 @@
+"""
+Process-wide client layer in front of the Gemini models.
+
+Every session's generate_content call goes through one GeminiClient:
+
+- a token bucket paces requests to the API quota (requests per minute
+  plus a burst allowance); callers over the rate wait in line instead of
+  all hitting the API and getting 429s
+- identical concurrent requests (same model, same prompt) are coalesced
+  into one API call whose result - or stream of chunks - every caller
+  receives (single-flight)
+- a 429 is retried with jittered exponential backoff, and empties the
+  bucket so the rest of the process backs off too
+
+Queue depth, time spent waiting for a token, and counts of coalesced,
+throttled and retried requests are kept for capacity sizing.
+"""
+
+import hashlib
+import json
+import random
+import threading
+import time
+
+from metrics import Histogram
+
+DEFAULT_REQUESTS_PER_MINUTE = 60
+DEFAULT_BURST = 10
+DEFAULT_MAX_RETRIES = 4
+POLL_INTERVAL = 0.1  # How often waiting callers check whether they were cancelled
+
+
+class RateLimitedError(Exception):
+    """The API kept answering 429 after every retry"""
+
+
+class _Abandoned(Exception):
+    """Every caller of a coalesced request went away"""
+
+
+def is_rate_limited(error):
+    """True for a 429 / quota exhausted error from the Gemini SDK (google.api_core ResourceExhausted)"""
+    return getattr(error, "code", None) == 429
+
+
+class TokenBucket:
+    """Token bucket where callers reserve a token and wait out the returned delay
+
+    Tokens may go negative: each reservation queues behind the earlier
+    ones, so callers are served in order.
+    """
+
+    def __init__(self, rate, capacity, clock=time.monotonic):
+        self.rate = rate  # Tokens per second
+        self.capacity = capacity
+        self._clock = clock
+        self._tokens = float(capacity)
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = self._clock()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def reserve(self):
+        """Take a token; return the seconds to wait before using it"""
+        with self._lock:
+            self._refill()
+            self._tokens -= 1
+            return max(0.0, -self._tokens / self.rate)
+
+    def refund(self):
+        """Give back a reserved token that was never used"""
+        with self._lock:
+            self._tokens = min(self.capacity, self._tokens + 1)
+
+    def drain(self):
+        """Drop the saved-up burst (the API just said we are over quota)"""
+        with self._lock:
+            self._refill()
+            self._tokens = min(self._tokens, 0.0)
+
+
+class _Flight:
+    """One API call shared by every identical concurrent request"""
+
+    def __init__(self):
+        self.cond = threading.Condition()
+        self.items = []  # Stream chunks, or the single response
+        self.done = False
+        self.error = None
+        self.subscribers = 0
+
+
+class LimitedModel:
+    """A Gemini model whose generate_content goes through the shared client"""
+
+    def __init__(self, client, model, personality="", language=""):
+        self.client = client
+        self.model = model
+        self.personality = personality
+        self.language = language
+
+    def generate_content(self, prompt, stream=False, check=None):
+        """Same as the model's generate_content; `check` is called while waiting and may raise to give up"""
+        return self.client.generate(self, prompt, stream, check)
+
+
+class GeminiClient:
+    """Rate limiting, single-flight coalescing and 429 backoff for every model"""
+
+    def __init__(self, requests_per_minute=DEFAULT_REQUESTS_PER_MINUTE, burst=DEFAULT_BURST,
+                 max_retries=DEFAULT_MAX_RETRIES, base_delay=1.0, max_delay=30.0, on_wait=None,
+                 clock=time.monotonic, sleep=time.sleep, rng=random.random):
+        self.bucket = TokenBucket(requests_per_minute / 60.0, burst, clock)
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.on_wait = on_wait  # on_wait(seconds, personality, language) after each token wait
+        self._clock = clock
+        self._sleep = sleep
+        self._rng = rng
+
+        self._flights = {}
+        self._lock = threading.Lock()
+        self.wait_times = Histogram()
+        self.queue_depth = 0
+        self.max_queue_depth = 0
+        self.requests = 0
+        self.coalesced = 0
+        self.throttled = 0
+        self.retries = 0
+
+    def wrap(self, model, personality="", language=""):
+        """Return a LimitedModel routing `model` through this client"""
+        return LimitedModel(self, model, personality, language)
+
+    def generate(self, limited, prompt, stream=False, check=None):
+        """Run (or join) the API call for this model and prompt"""
+        key = self._key(limited, prompt, stream)
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is None:
+                flight = _Flight()
+                self._flights[key] = flight
+                self.requests += 1
+                threading.Thread(
+                    target=self._produce, args=(key, flight, limited, prompt, stream), daemon=True
+                ).start()
+            else:
+                self.coalesced += 1
+            flight.subscribers += 1
+
+        if stream:
+            return self._subscribe(flight, check)
+
+        try:
+            self._wait_for(flight, 0, check)
+            return flight.items[0]
+        finally:
+            self._leave(flight)
+
+    def _key(self, limited, prompt, stream):
+        body = json.dumps(prompt, sort_keys=True, default=str)
+        digest = hashlib.sha256(body.encode("utf-8")).hexdigest()
+        return (id(limited.model), digest, stream)
+
+    def _subscribe(self, flight, check):
+        """Yield the flight's chunks as they arrive, from the first one"""
+        try:
+            index = 0
+            while self._wait_for(flight, index, check):
+                yield flight.items[index]
+                index += 1
+        finally:
+            self._leave(flight)
+
+    def _wait_for(self, flight, index, check):
+        """Block until item `index` exists (True) or the flight ended without it (False)"""
+        with flight.cond:
+            while len(flight.items) <= index and not flight.done:
+                if check is not None:
+                    check()
+                flight.cond.wait(POLL_INTERVAL)
+            if index < len(flight.items):
+                return True
+            if flight.error is not None:
+                raise flight.error
+            return False
+
+    def _leave(self, flight):
+        with self._lock:
+            flight.subscribers -= 1
+
+    def _produce(self, key, flight, limited, prompt, stream):
+        """Make the API call for a flight in the background and publish its result"""
+        def abandoned():
+            if flight.subscribers <= 0:
+                raise _Abandoned()
+
+        def publish(item):
+            with flight.cond:
+                flight.items.append(item)
+                flight.cond.notify_all()
+
+        def call():
+            if not stream:
+                publish(limited.model.generate_content(prompt))
+                return
+            for chunk in limited.model.generate_content(prompt, stream=True):
+                abandoned()
+                publish(chunk)
+
+        try:
+            # A stream can only be retried before its first chunk went out
+            self._call_with_retry(limited, call, abandoned, can_retry=lambda: not flight.items)
+        except _Abandoned:
+            pass
+        except Exception as e:
+            flight.error = e
+        finally:
+            with self._lock:
+                self._flights.pop(key, None)
+            with flight.cond:
+                flight.done = True
+                flight.cond.notify_all()
+
+    def _call_with_retry(self, limited, call, check, can_retry):
+        attempt = 0
+        while True:
+            self._acquire(limited, check)
+            try:
+                return call()
+            except _Abandoned:
+                raise
+            except Exception as e:
+                if not is_rate_limited(e) or not can_retry():
+                    raise
+                with self._lock:
+                    self.throttled += 1
+                self.bucket.drain()
+                if attempt >= self.max_retries:
+                    raise RateLimitedError(
+                        "Gemini is over its request quota right now - please try again in a moment"
+                    ) from e
+                with self._lock:
+                    self.retries += 1
+                self._sleep_checked(self.backoff(attempt), check)
+                attempt += 1
+
+    def backoff(self, attempt):
+        """Exponential delay with jitter: half fixed, half random, capped at max_delay"""
+        delay = min(self.max_delay, self.base_delay * 2 ** attempt)
+        return delay / 2 + self._rng() * delay / 2
+
+    def _acquire(self, limited, check):
+        """Wait for a token from the bucket, counting the wait"""
+        delay = self.bucket.reserve()
+        if delay > 0:
+            with self._lock:
+                self.queue_depth += 1
+                self.max_queue_depth = max(self.max_queue_depth, self.queue_depth)
+            try:
+                self._sleep_checked(delay, check)
+            except BaseException:
+                self.bucket.refund()
+                raise
+            finally:
+                with self._lock:
+                    self.queue_depth -= 1
+
+        with self._lock:
+            self.wait_times.observe(delay)
+        if self.on_wait is not None:
+            self.on_wait(delay, limited.personality, limited.language)
+
+    def _sleep_checked(self, seconds, check):
+        """Sleep in short slices, calling check between them"""
+        deadline = self._clock() + seconds
+        while True:
+            check()
+            remaining = deadline - self._clock()
+            if remaining <= 0:
+                return
+            self._sleep(min(POLL_INTERVAL, remaining))
+
+    def stats(self):
+        """Queue depth, in-flight calls, request counts and token wait times"""
+        with self._lock:
+            return {
+                "queue_depth": self.queue_depth,
+                "max_queue_depth": self.max_queue_depth,
+                "in_flight": len(self._flights),
+                "requests": self.requests,
+                "coalesced": self.coalesced,
+                "throttled": self.throttled,
+                "retries": self.retries,
+                "wait_p50": self.wait_times.quantile(0.50),
+                "wait_p95": self.wait_times.quantile(0.95)
+            }
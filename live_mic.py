@@ -0,0 +1,27 @@
+"""
+Live microphone input for the Streamlit app.
+
+A custom component (static/live_mic/index.html) captures the microphone
+in the browser and streams 16 kHz PCM straight to the voice API's
+/v1/listen WebSocket (voice_server.py), which recognizes it
+incrementally. The component hands each partial and final transcript
+back to the script, so the app never handles raw audio.
+"""
+
+import os
+
+import streamlit.components.v1 as components
+
+COMPONENT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static", "live_mic")
+
+_live_mic = components.declare_component("live_mic", path=COMPONENT_DIR)
+
+
+def live_mic(url, language="English", key=None):
+    """Render the live mic button
+
+    Returns the latest transcript event, {"type": "partial" | "final",
+    "text": ..., "seq": n}, or None before the first one. seq increases
+    with every event, so a rerun can tell new events from old ones.
+    """
+    return _live_mic(url=url, language=language, key=key, default=None)
@@ -0,0 +1,214 @@
+"""
+Per-stage latency metrics for the voice pipeline.
+
+Timing spans (audio dedupe, speech recognition, Gemini, TTS, the chat
+render loop) are aggregated into fixed-bucket histograms labelled by
+stage, personality and language. The histograms can be exported in the
+Prometheus text format or as JSON, optionally from a small HTTP server
+so a Prometheus scraper can collect them. Other components can register
+live gauges and counters (e.g. the Gemini queue depth) to be exported
+alongside.
+"""
+
+import json
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Upper bounds in seconds, from a hashed WAV to a long Gemini reply
+BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+METRIC_NAME = "voice_assistant_stage_seconds"
+METRIC_PREFIX = "voice_assistant_"
+RECENT_TURNS = 50
+
+
+class Histogram:
+    """Cumulative-bucket latency histogram (Prometheus semantics)"""
+
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)  # Observations in each bucket (not cumulative)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, seconds):
+        for i, bound in enumerate(self.buckets):
+            if seconds <= bound:
+                self.counts[i] += 1
+                break
+        self.count += 1
+        self.sum += seconds
+
+    def cumulative(self):
+        """[(upper_bound, observations <= bound)] ending with +Inf"""
+        total = 0
+        rows = []
+        for bound, count in zip(self.buckets, self.counts):
+            total += count
+            rows.append((bound, total))
+        rows.append((float("inf"), self.count))
+        return rows
+
+    def quantile(self, q):
+        """Estimate a quantile by interpolating inside its bucket"""
+        if self.count == 0:
+            return 0.0
+        rank = q * self.count
+        lower = 0.0
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            if count and seen + count >= rank:
+                return lower + (bound - lower) * (rank - seen) / count
+            seen += count
+            lower = bound
+        return self.buckets[-1]  # Beyond the last bucket - report its bound
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def _format_bound(bound):
+    return "+Inf" if bound == float("inf") else repr(bound)
+
+
+class LatencyMetrics:
+    """Thread-safe registry of stage histograms plus the most recent turns"""
+
+    def __init__(self, buckets=BUCKETS, recent_turns=RECENT_TURNS):
+        self.buckets = buckets
+        self._histograms = {}
+        self._recent = deque(maxlen=recent_turns)
+        self._values = []  # (name, description, kind, read) registered with register_value
+        self._lock = threading.Lock()
+
+    def observe(self, stage, seconds, personality="", language=""):
+        """Record one stage duration"""
+        key = (stage, personality, language)
+        with self._lock:
+            if key not in self._histograms:
+                self._histograms[key] = Histogram(self.buckets)
+            self._histograms[key].observe(seconds)
+
+    @contextmanager
+    def span(self, stage, personality="", language="", spans=None):
+        """Time the block as `stage`; also store the duration in `spans` if given"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - start
+            self.observe(stage, seconds, personality, language)
+            if spans is not None:
+                spans[stage] = spans.get(stage, 0.0) + seconds
+
+    def register_value(self, name, description, read, kind="gauge"):
+        """Export read() (called at scrape time) as a Prometheus gauge or counter"""
+        with self._lock:
+            self._values.append((name, description, kind, read))
+
+    def values(self):
+        """Current value of every registered gauge and counter"""
+        with self._lock:
+            registered = list(self._values)
+        return {name: read() for name, _, _, read in registered}
+
+    def record_turn(self, personality, language, spans):
+        """Keep a finished turn's stage timings for the recent-turns view"""
+        turn = {"time": time.time(), "personality": personality, "language": language, "spans": dict(spans)}
+        with self._lock:
+            self._recent.append(turn)
+
+    def recent_turns(self):
+        with self._lock:
+            return list(self._recent)
+
+    def summary(self):
+        """Per-stage rows over every personality and language: count, mean, p50, p95"""
+        merged = {}
+        with self._lock:
+            for (stage, _, _), histogram in self._histograms.items():
+                total = merged.setdefault(stage, Histogram(self.buckets))
+                total.counts = [a + b for a, b in zip(total.counts, histogram.counts)]
+                total.count += histogram.count
+                total.sum += histogram.sum
+
+        return {
+            stage: {
+                "count": histogram.count,
+                "mean": histogram.sum / histogram.count,
+                "p50": histogram.quantile(0.50),
+                "p95": histogram.quantile(0.95)
+            }
+            for stage, histogram in sorted(merged.items())
+        }
+
+    def to_prometheus(self):
+        """Render every histogram in the Prometheus text exposition format"""
+        lines = [
+            f"# HELP {METRIC_NAME} Latency of each voice pipeline stage in seconds",
+            f"# TYPE {METRIC_NAME} histogram"
+        ]
+        with self._lock:
+            items = sorted(self._histograms.items())
+            for (stage, personality, language), histogram in items:
+                labels = f'stage="{_escape(stage)}",personality="{_escape(personality)}",language="{_escape(language)}"'
+                for bound, count in histogram.cumulative():
+                    lines.append(f'{METRIC_NAME}_bucket{{{labels},le="{_format_bound(bound)}"}} {count}')
+                lines.append(f"{METRIC_NAME}_sum{{{labels}}} {histogram.sum}")
+                lines.append(f"{METRIC_NAME}_count{{{labels}}} {histogram.count}")
+            registered = list(self._values)
+
+        for name, description, kind, read in registered:
+            lines.append(f"# HELP {METRIC_PREFIX}{name} {description}")
+            lines.append(f"# TYPE {METRIC_PREFIX}{name} {kind}")
+            lines.append(f"{METRIC_PREFIX}{name} {read()}")
+        return "\n".join(lines) + "\n"
+
+    def to_json(self):
+        """Histograms and recent turns as a JSON document"""
+        with self._lock:
+            stages = [
+                {
+                    "stage": stage,
+                    "personality": personality,
+                    "language": language,
+                    "count": histogram.count,
+                    "sum": histogram.sum,
+                    "buckets": {_format_bound(bound): count for bound, count in histogram.cumulative()},
+                    "p50": histogram.quantile(0.50),
+                    "p95": histogram.quantile(0.95)
+                }
+                for (stage, personality, language), histogram in sorted(self._histograms.items())
+            ]
+            recent = list(self._recent)
+        return json.dumps({"stages": stages, "values": self.values(), "recent_turns": recent}, indent=2)
+
+
+def start_metrics_server(metrics, port, host="127.0.0.1"):
+    """Serve /metrics (Prometheus text) and /metrics.json from a daemon thread"""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path == "/metrics":
+                body, content_type = metrics.to_prometheus(), "text/plain; version=0.0.4"
+            elif self.path == "/metrics.json":
+                body, content_type = metrics.to_json(), "application/json"
+            else:
+                self.send_error(404)
+                return
+            payload = body.encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, format, *args):
+            pass  # Scrapes every few seconds would flood the Streamlit log
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
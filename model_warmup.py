@@ -0,0 +1,111 @@
+"""
+Opt-in warm-up of the Gemini models and their connection.
+
+Without it, the first request for each personality and language pays for
+building its model and, on the first request of the process, for opening
+the API connection. The warmer builds every (personality, language)
+model in a background thread when the server starts, then opens the
+connection with a cheap count_tokens call and repeats that call
+periodically so the idle channel is not torn down.
+
+All models share the SDK's one default client, so a single ping keeps
+the transport warm for every personality and language.
+
+The warmer also labels each pair's first request "cold" or "warm", so
+time to first response can be compared between the two paths.
+"""
+
+import threading
+import time
+
+DEFAULT_KEEPALIVE_SECONDS = 240
+
+
+class ModelWarmer:
+    """Builds every model up front and keeps the API connection alive"""
+
+    def __init__(self, build, pairs, ping=None, keepalive=DEFAULT_KEEPALIVE_SECONDS):
+        self.build = build  # build(personality, language) -> model (cached by the caller)
+        self.pairs = list(pairs)
+        self.ping = ping  # Cheap API call that opens or refreshes the connection
+        self.keepalive = keepalive
+        self._warm = set()
+        self._used = set()
+        self._transport_warm = False
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self.warmup_seconds = None
+        self.pings = 0
+        self.last_error = None
+
+    def start(self):
+        """Start warming in a daemon thread (once)"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        start = time.perf_counter()
+        for pair in self.pairs:
+            if self._stop.is_set():
+                return
+            try:
+                self.build(*pair)
+            except Exception as e:
+                self.last_error = str(e)
+                continue
+            with self._lock:
+                self._warm.add(pair)
+
+        self._ping()
+        self.warmup_seconds = time.perf_counter() - start
+
+        while self.ping is not None and not self._stop.wait(self.keepalive):
+            self._ping()
+
+    def _ping(self):
+        if self.ping is None:
+            return
+        try:
+            self.ping()
+        except Exception as e:
+            # Warm-up is best effort - the first real request opens the connection instead
+            self.last_error = str(e)
+            return
+        with self._lock:
+            self._transport_warm = True
+            self.pings += 1
+
+    def claim(self, personality, language):
+        """Label a request "cold" or "warm" and count the pair as used
+
+        A request is warm when its model was built ahead of time (or served
+        before) and the connection is already open.
+        """
+        pair = (personality, language)
+        with self._lock:
+            warm = (pair in self._warm or pair in self._used) and self._transport_warm
+            self._used.add(pair)
+        return "warm" if warm else "cold"
+
+    def mark_connected(self):
+        """Note that a request succeeded, so the connection is open"""
+        with self._lock:
+            self._transport_warm = True
+
+    def stats(self):
+        """Models built, connection state, warm-up time and keep-alive pings"""
+        with self._lock:
+            return {
+                "built": len(self._warm),
+                "total": len(self.pairs),
+                "transport_warm": self._transport_warm,
+                "warmup_seconds": self.warmup_seconds,
+                "pings": self.pings,
+                "last_error": self.last_error
+            }
@@ -0,0 +1,160 @@
+"""
+Opt-in cache of Gemini replies for repeated prompts.
+
+Replies are keyed by (personality, language, normalized prompt, context
+fingerprint) so a greeting or FAQ asked again in the same situation is
+answered in milliseconds without an API call. Entries expire after a TTL
+and the oldest are evicted once the backend is full.
+"""
+
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+DEFAULT_TTL_SECONDS = 24 * 60 * 60
+DEFAULT_MAX_ENTRIES = 1000
+DEFAULT_SQLITE_PATH = os.path.join(tempfile.gettempdir(), "voice-assistant-responses.db")
+
+
+def normalize_prompt(text):
+    """Lowercase, drop punctuation and collapse whitespace so trivial variants match"""
+    text = re.sub(r"[^\w\s]", " ", text.lower())
+    return " ".join(text.split())
+
+
+def context_fingerprint(contents):
+    """Hash the conversation that precedes the new prompt"""
+    payload = json.dumps(contents, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def response_cache_key(personality, language, prompt, fingerprint=""):
+    payload = "\0".join([personality, language, normalize_prompt(prompt), fingerprint])
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class MemoryBackend:
+    """In-process LRU backend"""
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Return (value, stored_at) or None"""
+        with self._lock:
+            if key not in self._entries:
+                return None
+            self._entries.move_to_end(key)
+            return self._entries[key]
+
+    def set(self, key, value, stored_at):
+        with self._lock:
+            self._entries[key] = (value, stored_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+
+class SQLiteBackend:
+    """SQLite backend shared by every process on the machine"""
+
+    def __init__(self, path=DEFAULT_SQLITE_PATH, max_entries=DEFAULT_MAX_ENTRIES, clock=time.time):
+        self.max_entries = max_entries
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+            "stored_at REAL NOT NULL, last_used REAL NOT NULL)"
+        )
+        self._conn.commit()
+
+    def get(self, key):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, stored_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn.execute("UPDATE responses SET last_used = ? WHERE key = ?", (self._clock(), key))
+            self._conn.commit()
+            return row[0], row[1]
+
+    def set(self, key, value, stored_at):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, value, stored_at, last_used) VALUES (?, ?, ?, ?)",
+                (key, value, stored_at, self._clock())
+            )
+            # Evict the least recently used rows beyond the size limit
+            self._conn.execute(
+                "DELETE FROM responses WHERE key IN ("
+                "SELECT key FROM responses ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,)
+            )
+            self._conn.commit()
+
+    def delete(self, key):
+        with self._lock:
+            self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            self._conn.commit()
+
+
+class ResponseCache:
+    """TTL cache of model replies in front of generate_content"""
+
+    def __init__(self, backend=None, ttl=DEFAULT_TTL_SECONDS, clock=time.time):
+        self.backend = backend if backend is not None else MemoryBackend()
+        self.ttl = ttl
+        self._clock = clock
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Return the cached reply, or None on a miss or expired entry"""
+        entry = self.backend.get(key)
+        if entry is not None and self._clock() - entry[1] > self.ttl:
+            self.backend.delete(key)
+            entry = None
+
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, value):
+        self.backend.set(key, value, self._clock())
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0
+            }
+
+
+def create_backend(name, path=DEFAULT_SQLITE_PATH, max_entries=DEFAULT_MAX_ENTRIES):
+    """Create a backend by name ("memory" or "sqlite")"""
+    if name == "sqlite":
+        return SQLiteBackend(path, max_entries)
+    if name == "memory":
+        return MemoryBackend(max_entries)
+    raise ValueError(f"Unknown response cache backend: {name}")
@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""
+Pre-synthesized speech for the assistant's fixed messages.
+
+The help text, voice command confirmations and spoken error messages
+never change between requests, so instead of a gTTS call the first time
+each one is voiced on a server, they are rendered once at build time for
+every LANGUAGES tts_code at both speech speeds and written to a single
+bundle file. At startup the bundle is memory-mapped (only the small
+index is parsed) and TTSCache serves its clips before anything else, so
+these replies play instantly and cost no TTS quota.
+
+Bundle layout (little-endian):
+    b"VASB" | format version (uint32) | index length (uint32)
+    index: JSON {"version", "created", "clips": {cache key: [offset, length]}}
+    clip data: MP3 clips, offsets relative to the end of the index
+
+Clips are keyed with tts_cache_key, so an edited message simply misses
+and is synthesized live until the bundle is rebuilt. "version" hashes
+the message set; `info` reports whether the bundle is stale.
+
+Usage:
+    python speech_bundle.py build            # writes TTS_BUNDLE_PATH (default speech_bundle.bin)
+    python speech_bundle.py info
+"""
+
+import argparse
+import hashlib
+import json
+import mmap
+import os
+import struct
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from tts_cache import tts_cache_key
+
+MAGIC = b"VASB"
+FORMAT_VERSION = 1
+HEADER = struct.Struct("<4sII")
+DEFAULT_BUNDLE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "speech_bundle.bin")
+DEFAULT_WORKERS = 8
+
+
+def static_messages():
+    """Every fixed message the assistant may speak, without duplicates"""
+    from assistant_core import (COMMAND_CONFIRMATIONS, ERROR_MESSAGES, HELP_MESSAGE, PERSONALITIES,
+                                PERSONALITY_SWITCH_CONFIRMATION)
+
+    messages = [HELP_MESSAGE, *COMMAND_CONFIRMATIONS.values(), *ERROR_MESSAGES.values()]
+    for old in PERSONALITIES:
+        for new in PERSONALITIES:
+            if old != new:
+                messages.append(PERSONALITY_SWITCH_CONFIRMATION.format(old=old, new=new))
+    return list(dict.fromkeys(messages))
+
+
+def bundle_entries(messages=None):
+    """(text, tts language code, slow) for every clip the bundle should hold"""
+    from assistant_core import LANGUAGES
+
+    tts_codes = dict.fromkeys(settings["tts_code"] for settings in LANGUAGES.values())
+    return [
+        (text, language, slow)
+        for text in (messages or static_messages())
+        for language in tts_codes
+        for slow in (False, True)
+    ]
+
+
+def messages_version(entries):
+    """Short hash identifying the set of clips"""
+    keys = sorted(tts_cache_key(*entry) for entry in entries)
+    return hashlib.sha256("\n".join(keys).encode("ascii")).hexdigest()[:16]
+
+
+class SpeechBundle:
+    """Read-only, memory-mapped view of a bundle file"""
+
+    def __init__(self, path):
+        self.path = path
+        if os.path.getsize(path) < HEADER.size:
+            raise ValueError(f"Not a speech bundle (truncated or empty): {path}")
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            magic, self.format_version, index_length = HEADER.unpack_from(self._map)
+            if magic != MAGIC:
+                raise ValueError(f"Not a speech bundle: {path}")
+            if self.format_version != FORMAT_VERSION:
+                raise ValueError(
+                    f"Speech bundle format {self.format_version} is not supported (expected {FORMAT_VERSION}) - "
+                    "rebuild it with: python speech_bundle.py build"
+                )
+
+            try:
+                index = json.loads(self._map[HEADER.size:HEADER.size + index_length].decode("utf-8"))
+                self.version = index["version"]
+                self.created = index["created"]
+                self._clips = index["clips"]
+            except (ValueError, KeyError, TypeError) as e:
+                raise ValueError(f"Speech bundle index is damaged ({e}) - rebuild it: {path}") from e
+            self._data_start = HEADER.size + index_length
+        except ValueError:
+            self._map.close()
+            raise
+
+    def __len__(self):
+        return len(self._clips)
+
+    def __contains__(self, key):
+        return key in self._clips
+
+    def get(self, key):
+        """The clip for a tts_cache_key, or None"""
+        location = self._clips.get(key)
+        if location is None:
+            return None
+        start = self._data_start + location[0]
+        return self._map[start:start + location[1]]
+
+    def close(self):
+        self._map.close()
+
+
+def load_bundle(path=DEFAULT_BUNDLE_PATH):
+    """Open the bundle at path, or return None when it has not been built
+
+    Raises ValueError for a file that is not a bundle of this format
+    (including a truncated or damaged one) and OSError when it cannot be read.
+    """
+    if not path or not os.path.exists(path):
+        return None
+    return SpeechBundle(path)
+
+
+def write_bundle(path, clips, version):
+    """Write {cache key: MP3 bytes} as a bundle, replacing path atomically"""
+    index = {"version": version, "created": time.time(), "clips": {}}
+    offset = 0
+    for key, audio in clips.items():
+        index["clips"][key] = [offset, len(audio)]
+        offset += len(audio)
+    index_bytes = json.dumps(index, separators=(",", ":")).encode("utf-8")
+
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(HEADER.pack(MAGIC, FORMAT_VERSION, len(index_bytes)))
+            f.write(index_bytes)
+            for audio in clips.values():
+                f.write(audio)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def build_bundle(path, entries=None, synthesize=None, workers=DEFAULT_WORKERS, progress=None):
+    """Synthesize every entry (reusing the shared TTS cache) and write the bundle; returns its version"""
+    from assistant_core import generate_tts_audio
+    from tts_cache import DEFAULT_CACHE_DIR, TTSCache
+
+    entries = entries or bundle_entries()
+    if synthesize is None:
+        # The disk tier only - the bundle being replaced may be stale or unreadable
+        cache = TTSCache(cache_dir=os.getenv("TTS_CACHE_DIR", DEFAULT_CACHE_DIR))
+        synthesize = lambda text, language, slow: generate_tts_audio(text, language, slow, cache=cache)
+
+    def render(entry):
+        text, language, slow = entry
+        audio = synthesize(text, language=language, slow=slow)
+        if progress is not None:
+            progress(entry)
+        return tts_cache_key(text, language, slow), audio
+
+    with ThreadPoolExecutor(workers) as pool:
+        clips = dict(pool.map(render, entries))
+    version = messages_version(entries)
+    write_bundle(path, clips, version)
+    return version
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("command", choices=["build", "info"])
+    parser.add_argument("--path", default=os.getenv("TTS_BUNDLE_PATH", DEFAULT_BUNDLE_PATH))
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="Clips synthesized at once")
+    args = parser.parse_args(argv)
+
+    from dotenv import load_dotenv
+    load_dotenv()
+
+    if args.command == "build":
+        entries = bundle_entries()
+        done = []
+
+        def progress(entry):
+            done.append(entry)
+            print(f"[{len(done)}/{len(entries)}] {entry[1]}{' slow' if entry[2] else ''}: {entry[0][:50]!r}")
+
+        start = time.perf_counter()
+        version = build_bundle(args.path, entries, workers=args.workers, progress=progress)
+        print(f"Wrote {len(entries)} clips ({os.path.getsize(args.path) // 1024} KB) to {args.path} "
+              f"in {time.perf_counter() - start:.1f}s, version {version}")
+        return 0
+
+    bundle = load_bundle(args.path)
+    if bundle is None:
+        print(f"No bundle at {args.path} - run: python speech_bundle.py build")
+        return 1
+    current = messages_version(bundle_entries())
+    print(f"{args.path}: {len(bundle)} clips, version {bundle.version}, built {time.ctime(bundle.created)}")
+    if bundle.version != current:
+        print(f"Stale: the messages changed (current version {current}) - rebuild to voice them instantly")
+        return 1
+    print("Up to date")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,253 @@
+"""
+Speech-to-text backends and long-recording transcription.
+
+Backends share one interface (recognize(audio_data, language)) and keep
+their own latency stats, so the engine can be chosen by configuration:
+Google Web Speech in the cloud, PocketSphinx on the box, or a
+deterministic stub for tests and CI.
+
+A long dictation is split at pauses into segments under a size limit,
+the segments are recognized concurrently on a bounded thread pool and
+the transcripts are joined in order. A segment that fails is retried on
+its own instead of failing the whole recording.
+"""
+
+import hashlib
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import speech_recognition as sr
+
+from audio_frontend import MAX_SEGMENT_SECONDS, FlacAudioData, split_at_pauses
+
+LONG_UTTERANCE_SECONDS = 15.0  # Recordings longer than this use the segmented path
+MAX_STT_WORKERS = 4
+SEGMENT_RETRIES = 2            # Extra attempts for a segment after a request error
+RETRY_DELAY = 0.5              # Seconds, doubled after every failed attempt
+LATENCY_WINDOW = 200           # Recent calls kept for latency percentiles
+
+
+class STTBackend:
+    """Base class: times every recognition and maps LANGUAGES codes to the engine"""
+
+    name = "base"
+    # LANGUAGES[...]["code"] -> engine language; None means codes pass through unchanged
+    languages = None
+
+    def __init__(self):
+        self.recognizer = sr.Recognizer()
+        self.calls = 0
+        self.errors = 0
+        self._latencies = deque(maxlen=LATENCY_WINDOW)
+        self._lock = threading.Lock()
+
+    def language_for(self, language_code):
+        """Engine language for a LANGUAGES code (raises RequestError if unsupported)"""
+        if self.languages is None:
+            return language_code
+        if language_code not in self.languages:
+            raise sr.RequestError(f"{self.name} has no model for {language_code}")
+        return self.languages[language_code]
+
+    def recognize(self, audio_data, language="en-US"):
+        """Recognize speech in audio_data and return the transcript"""
+        start = time.perf_counter()
+        try:
+            return self._recognize(audio_data, self.language_for(language))
+        except sr.RequestError:
+            with self._lock:
+                self.errors += 1
+            raise
+        finally:
+            with self._lock:
+                self.calls += 1
+                self._latencies.append(time.perf_counter() - start)
+
+    def _recognize(self, audio_data, language):
+        raise NotImplementedError
+
+    def stats(self):
+        """Call count, errors and recent latency percentiles in milliseconds"""
+        with self._lock:
+            latencies = sorted(self._latencies)
+            calls, errors = self.calls, self.errors
+        if not latencies:
+            return {"backend": self.name, "calls": calls, "errors": errors, "p50_ms": 0.0, "p95_ms": 0.0}
+
+        def percentile(p):
+            return latencies[min(len(latencies) - 1, int(p * len(latencies)))] * 1000
+
+        return {
+            "backend": self.name,
+            "calls": calls,
+            "errors": errors,
+            "p50_ms": percentile(0.50),
+            "p95_ms": percentile(0.95)
+        }
+
+
+class GoogleBackend(STTBackend):
+    """Google Web Speech API (cloud) - supports every LANGUAGES code"""
+
+    name = "google"
+
+    def _recognize(self, audio_data, language):
+        return self.recognizer.recognize_google(audio_data, language=language)
+
+
+class SphinxBackend(STTBackend):
+    """CMU PocketSphinx (offline, on-box) via speech_recognition
+
+    Only English ships with pocketsphinx; the other codes need their
+    language pack installed.
+    """
+
+    name = "sphinx"
+    languages = {
+        "en-US": "en-US",
+        "es-ES": "es-ES",
+        "fr-FR": "fr-FR",
+        "de-DE": "de-DE",
+        "zh-CN": "zh-CN",
+        "it-IT": "it-IT",
+        "ru-RU": "ru-RU"
+    }
+
+    def _recognize(self, audio_data, language):
+        return self.recognizer.recognize_sphinx(audio_data, language=language)
+
+
+class StubBackend(STTBackend):
+    """Deterministic local stand-in for tests and CI - no network, no model
+
+    Returns the transcript registered for the exact audio bytes, or the
+    default transcript; with no default, unknown audio raises
+    UnknownValueError like a real engine that heard nothing.
+    """
+
+    name = "stub"
+
+    def __init__(self, transcripts=None, default="hello", delay=0.0):
+        super().__init__()
+        self.transcripts = dict(transcripts or {})
+        self.default = default
+        self.delay = delay
+
+    @staticmethod
+    def audio_key(audio_data):
+        return hashlib.sha256(audio_data.frame_data).hexdigest()
+
+    def add_transcript(self, audio_data, text):
+        self.transcripts[self.audio_key(audio_data)] = text
+
+    def _recognize(self, audio_data, language):
+        if self.delay:
+            time.sleep(self.delay)
+        text = self.transcripts.get(self.audio_key(audio_data), self.default)
+        if text is None:
+            raise sr.UnknownValueError()
+        return text
+
+
+STT_BACKENDS = {
+    "google": GoogleBackend,
+    "sphinx": SphinxBackend,
+    "stub": StubBackend
+}
+
+
+def create_stt_backend(name="google"):
+    """Create a speech-to-text backend by name (see STT_BACKENDS)"""
+    if name not in STT_BACKENDS:
+        raise ValueError(f"Unknown STT backend: {name} (choose from {', '.join(STT_BACKENDS)})")
+    return STT_BACKENDS[name]()
+
+
+def audio_duration(audio_data):
+    """Length of an AudioData clip in seconds"""
+    return len(audio_data.frame_data) / (audio_data.sample_rate * audio_data.sample_width)
+
+
+def split_audio_data(audio_data, max_seconds=MAX_SEGMENT_SECONDS):
+    """Split 16-bit mono AudioData at pauses into a list of (start_seconds, AudioData)"""
+    pcm = np.frombuffer(audio_data.frame_data, dtype="<i2")
+    mono = pcm.astype(np.float32) / 32768.0
+    rate = audio_data.sample_rate
+
+    return [
+        (start / rate, FlacAudioData(pcm[start:end].tobytes(), rate, 2))
+        for start, end in split_at_pauses(mono, rate, max_seconds)
+    ]
+
+
+def _recognize_segment(recognize, index, start_seconds, segment, language, retries, cancelled=None):
+    """Recognize one segment, retrying request errors; returns (text, timing)"""
+    timing = {
+        "segment": index,
+        "start": start_seconds,
+        "duration": audio_duration(segment),
+        "attempts": 0,
+        "seconds": 0.0,
+        "status": "ok"
+    }
+    delay = RETRY_DELAY
+    began = time.perf_counter()
+    text = ""
+
+    for attempt in range(retries + 1):
+        if cancelled is not None and cancelled():
+            # The turn was superseded - don't spend another request on it
+            timing["status"] = "cancelled"
+            break
+        timing["attempts"] = attempt + 1
+        try:
+            text = recognize(segment, language=language)
+            break
+        except sr.UnknownValueError:
+            # Nothing intelligible in this piece - not worth retrying
+            text = ""
+            timing["status"] = "no speech"
+            break
+        except sr.RequestError as e:
+            if attempt == retries:
+                text = ""
+                timing["status"] = f"failed: {e}"
+            else:
+                time.sleep(delay)
+                delay *= 2
+
+    timing["seconds"] = time.perf_counter() - began
+    return text, timing
+
+
+def transcribe_long(audio_data, recognize, language="en-US", max_seconds=MAX_SEGMENT_SECONDS,
+                    max_workers=MAX_STT_WORKERS, retries=SEGMENT_RETRIES, cancelled=None):
+    """Recognize a long recording segment by segment in parallel
+
+    Returns (transcript, timings) with one timing dict per segment. Raises
+    UnknownValueError if no segment produced text, or RequestError if every
+    segment failed to reach the service. Once cancelled() returns True,
+    segments that have not started are skipped.
+    """
+    segments = split_audio_data(audio_data, max_seconds)
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(segments))) as pool:
+        futures = [
+            pool.submit(_recognize_segment, recognize, index, start, segment, language, retries, cancelled)
+            for index, (start, segment) in enumerate(segments)
+        ]
+        results = [future.result() for future in futures]
+
+    texts = [text for text, _ in results if text]
+    timings = [timing for _, timing in results]
+
+    if cancelled is not None and cancelled():
+        return " ".join(texts), timings
+    if not texts:
+        if all(timing["status"].startswith("failed") for timing in timings):
+            raise sr.RequestError(timings[0]["status"])
+        raise sr.UnknownValueError()
+    return " ".join(texts), timings
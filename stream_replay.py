@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Frame-replay harness for streaming speech recognition, no microphone needed.
+
+Cuts a WAV recording into the small PCM frames a live microphone would
+send and feeds them, in order, to a StreamingRecognizer (streaming_stt.py)
+or to a running voice API's /v1/listen WebSocket, printing the
+speech_start / partial / final timeline. With --realtime the frames are
+paced like a real microphone, so partials show up while "speaking".
+
+Usage:
+    python stream_replay.py bench_fixtures/dictation.wav
+    STT_BACKEND=stub python stream_replay.py bench_fixtures/question.wav --realtime
+    python stream_replay.py recording.wav --url ws://127.0.0.1:8502/v1/listen --answer
+"""
+
+import argparse
+import json
+import sys
+import time
+
+from dotenv import load_dotenv
+
+from assistant_core import LANGUAGES
+
+DEFAULT_FRAME_MS = 20   # Browser audio callbacks deliver roughly this much per chunk
+TRAILING_SILENCE = 1.0  # Seconds of silence appended so the last utterance ends naturally
+
+
+def wav_to_pcm(wav_bytes, trailing_silence=TRAILING_SILENCE):
+    """Decode a WAV recording into (16-bit mono PCM bytes, sample_rate)"""
+    import numpy as np
+
+    from audio_frontend import downmix, read_wav
+
+    samples, sample_rate = read_wav(wav_bytes)
+    mono = np.concatenate([downmix(samples), np.zeros(int(trailing_silence * sample_rate), dtype=np.float32)])
+    return (np.clip(mono, -1.0, 1.0) * 32767).astype("<i2").tobytes(), sample_rate
+
+
+def pcm_frames(pcm, sample_rate, frame_ms=DEFAULT_FRAME_MS):
+    """Split PCM bytes into microphone-sized chunks"""
+    size = int(sample_rate * frame_ms / 1000) * 2
+    return [pcm[i:i + size] for i in range(0, len(pcm), size)]
+
+
+def replay(frames, feed, frame_ms=DEFAULT_FRAME_MS, realtime=False):
+    """Feed the frames in order, optionally paced at real time"""
+    start = time.perf_counter()
+    for index, frame in enumerate(frames):
+        if realtime:
+            time.sleep(max(0.0, start + index * frame_ms / 1000 - time.perf_counter()))
+        feed(frame)
+
+
+def replay_wav(wav_bytes, frame_ms=DEFAULT_FRAME_MS, realtime=False, **recognizer_options):
+    """Replay a recording through a StreamingRecognizer and return its events"""
+    from streaming_stt import StreamingRecognizer
+
+    pcm, sample_rate = wav_to_pcm(wav_bytes)
+    events = []
+    recognizer = StreamingRecognizer(events.append, sample_rate=sample_rate, **recognizer_options)
+    replay(pcm_frames(pcm, sample_rate, frame_ms), recognizer.feed, frame_ms, realtime)
+    recognizer.flush()
+    return events
+
+
+def replay_to_server(wav_bytes, url, language="English", frame_ms=DEFAULT_FRAME_MS, realtime=False,
+                     answer=False, on_event=None):
+    """Stream a recording to a voice API /v1/listen endpoint and return its events"""
+    import threading
+
+    from websockets.sync.client import connect
+
+    pcm, sample_rate = wav_to_pcm(wav_bytes)
+    events = []
+    with connect(url) as websocket:
+        websocket.send(json.dumps({
+            "type": "config", "sample_rate": sample_rate, "language": language, "answer": answer
+        }))
+
+        def receive():
+            for message in websocket:
+                if isinstance(message, bytes):
+                    continue
+                event = json.loads(message)
+                events.append(event)
+                if on_event is not None:
+                    on_event(event)
+                if event["type"] == "end":
+                    break
+
+        receiver = threading.Thread(target=receive, daemon=True)
+        receiver.start()
+        replay(pcm_frames(pcm, sample_rate, frame_ms), websocket.send, frame_ms, realtime)
+        websocket.send(json.dumps({"type": "end"}))
+        receiver.join()
+    return events
+
+
+def print_event(event):
+    label = event["type"]
+    detail = event.get("text") or event.get("delta") or event.get("message") or ""
+    when = f"{event['time']:6.2f}s" if "time" in event else " " * 7
+    print(f"{when}  {label:<12} {detail}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("wav", help="Recording to replay")
+    parser.add_argument("--language", default="English", choices=list(LANGUAGES))
+    parser.add_argument("--frame-ms", type=int, default=DEFAULT_FRAME_MS, help="Size of each PCM chunk")
+    parser.add_argument("--realtime", action="store_true", help="Pace the frames like a live microphone")
+    parser.add_argument("--url", help="Replay against a voice API /v1/listen WebSocket instead of in-process")
+    parser.add_argument("--answer", action="store_true", help="With --url, also have the server answer each final")
+    args = parser.parse_args(argv)
+
+    load_dotenv()
+    with open(args.wav, "rb") as f:
+        wav_bytes = f.read()
+
+    start = time.perf_counter()
+    if args.url:
+        events = replay_to_server(
+            wav_bytes, args.url, args.language, args.frame_ms, args.realtime, args.answer, print_event
+        )
+    else:
+        events = replay_wav(wav_bytes, args.frame_ms, args.realtime, language_code=LANGUAGES[args.language]["code"])
+        for event in events:
+            print_event(event)
+    print(f"Replayed in {time.perf_counter() - start:.2f}s")
+    return 0 if any(event["type"] == "final" for event in events) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,210 @@
+"""
+Incremental speech recognition for a live microphone stream.
+
+A StreamingRecognizer is fed raw 16-bit mono PCM while the user speaks.
+An online voice activity detector (the frame energy test from
+audio_frontend, with a running noise floor instead of percentiles over
+the whole recording) finds where an utterance starts and ends, and the
+audio so far is re-recognized about every PARTIAL_INTERVAL seconds so
+the UI can show a partial transcript. When the speaker pauses for
+END_SILENCE_MS the utterance is recognized one last time and finalized.
+
+Events passed to emit():
+
+    {"type": "speech_start", "utterance": n, "time": s}
+    {"type": "partial", "utterance": n, "text": ..., "time": s}
+    {"type": "final", "utterance": n, "text": ..., "time": s, "seconds": s}
+    {"type": "no_speech", "utterance": n, "time": s}   nothing recognizable
+    {"type": "error", "utterance": n, "message": ...}   final recognition failed
+
+"time" is the stream position in seconds of audio fed so far. Partials
+of an utterance never arrive after its final. With an executor the
+recognitions run in the background and emit() is called from worker
+threads; without one they run inline in feed(), which keeps replays
+deterministic.
+"""
+
+import collections
+import threading
+
+import numpy as np
+import speech_recognition as sr
+
+from assistant_core import get_stt_backend, transcribe_audio
+from audio_frontend import FRAME_MS, MIN_SPEECH_MS, MIN_SPEECH_RMS, PADDING_MS, SPEECH_TO_NOISE_RATIO, write_wav
+
+DEFAULT_SAMPLE_RATE = 16000
+START_MS = 90                 # Speech must last this long before an utterance starts
+END_SILENCE_MS = 700          # A pause this long ends the utterance
+PARTIAL_INTERVAL = 1.0        # Seconds of new speech between partial transcripts
+MAX_UTTERANCE_SECONDS = 30.0  # Finalize anyway after this much audio
+NOISE_ADAPT = 0.1             # Noise floor update weight for quiet frames...
+NOISE_DRIFT = 0.002           # ...and for loud ones, so a steady hum is learned eventually
+
+
+class StreamingRecognizer:
+    """Turns a stream of PCM chunks into speech_start, partial and final events"""
+
+    def __init__(self, emit, language_code="en-US", sample_rate=DEFAULT_SAMPLE_RATE, stt_backend=None,
+                 executor=None, partial_interval=PARTIAL_INTERVAL, end_silence_ms=END_SILENCE_MS,
+                 max_utterance_seconds=MAX_UTTERANCE_SECONDS):
+        self.emit = emit
+        self.language_code = language_code
+        self.sample_rate = sample_rate
+        self.stt_backend = stt_backend or get_stt_backend()
+        self.executor = executor
+
+        self.frame_length = int(sample_rate * FRAME_MS / 1000)
+        self.start_frames = max(1, START_MS // FRAME_MS)
+        self.end_frames = max(1, end_silence_ms // FRAME_MS)
+        self.padding_frames = PADDING_MS // FRAME_MS
+        self.min_speech_frames = max(1, MIN_SPEECH_MS // FRAME_MS)
+        self.partial_frames = max(1, int(partial_interval * 1000 / FRAME_MS))
+        self.max_frames = int(max_utterance_seconds * 1000 / FRAME_MS)
+
+        self.frames_seen = 0
+        self.noise_floor = None
+        self._pending = np.zeros(0, dtype=np.float32)
+        self._preroll = collections.deque(maxlen=self.padding_frames + self.start_frames)
+        self._loud_run = 0
+        self._utterance = None  # Frames of the utterance in progress
+        self._utterance_id = 0
+        self._voiced = 0
+        self._silence_run = 0
+        self._since_partial = 0
+
+        self._lock = threading.Lock()
+        self._finalized = set()
+        self._partial_busy = False
+        self._futures = []
+
+    @property
+    def audio_time(self):
+        """Seconds of audio processed so far"""
+        return self.frames_seen * FRAME_MS / 1000
+
+    def feed(self, pcm):
+        """Process a chunk of little-endian 16-bit mono PCM (any length)"""
+        samples = np.frombuffer(pcm, dtype="<i2").astype(np.float32) / 32768.0
+        samples = np.concatenate([self._pending, samples])
+        whole = len(samples) // self.frame_length * self.frame_length
+        for frame in samples[:whole].reshape(-1, self.frame_length):
+            self._process_frame(frame)
+        self._pending = samples[whole:]
+
+    def flush(self):
+        """End of stream: finalize the utterance in progress, then wait for every recognition"""
+        if self._utterance is not None:
+            self._finish_utterance(self._utterance)
+        for future in self._futures:
+            future.result()
+        self._futures = []
+
+    def _is_loud(self, frame):
+        rms = float(np.sqrt(np.mean(frame ** 2)))
+        if self.noise_floor is None:
+            self.noise_floor = min(rms, MIN_SPEECH_RMS / SPEECH_TO_NOISE_RATIO)
+        loud = rms > max(self.noise_floor * SPEECH_TO_NOISE_RATIO, MIN_SPEECH_RMS)
+        weight = NOISE_DRIFT if loud else NOISE_ADAPT
+        self.noise_floor += weight * (rms - self.noise_floor)
+        return loud
+
+    def _process_frame(self, frame):
+        loud = self._is_loud(frame)
+        self.frames_seen += 1
+
+        if self._utterance is None:
+            self._preroll.append(frame)
+            self._loud_run = self._loud_run + 1 if loud else 0
+            if self._loud_run >= self.start_frames:
+                self._utterance_id += 1
+                self._utterance = list(self._preroll)
+                self._preroll.clear()
+                self._voiced = self._loud_run
+                self._silence_run = 0
+                self._since_partial = 0
+                self._loud_run = 0
+                self.emit({"type": "speech_start", "utterance": self._utterance_id, "time": self.audio_time})
+            return
+
+        self._utterance.append(frame)
+        if loud:
+            self._voiced += 1
+            self._silence_run = 0
+        else:
+            self._silence_run += 1
+
+        if self._silence_run >= self.end_frames:
+            # Keep a little of the trailing pause so the last word is not clipped
+            keep = len(self._utterance) - self._silence_run + self.padding_frames
+            self._finish_utterance(self._utterance[:keep])
+        elif len(self._utterance) >= self.max_frames:
+            self._finish_utterance(self._utterance)
+        else:
+            self._since_partial += 1
+            if self._since_partial >= self.partial_frames:
+                self._since_partial = 0
+                self._start_partial()
+
+    def _start_partial(self):
+        with self._lock:
+            if self._partial_busy:
+                return  # Recognition is slower than real time - skip this partial rather than queue it
+            self._partial_busy = True
+        self._submit(self._run_partial, self._utterance_id, list(self._utterance), self.audio_time)
+
+    def _finish_utterance(self, frames):
+        utterance_id = self._utterance_id
+        with self._lock:
+            self._finalized.add(utterance_id)
+        self._utterance = None
+        if self._voiced < self.min_speech_frames:
+            self.emit({"type": "no_speech", "utterance": utterance_id, "time": self.audio_time})
+            return
+        self._submit(self._run_final, utterance_id, frames, self.audio_time)
+
+    def _submit(self, run, utterance_id, frames, time):
+        if self.executor is None:
+            run(utterance_id, frames, time)
+        else:
+            self._futures = [future for future in self._futures if not future.done()]
+            self._futures.append(self.executor.submit(run, utterance_id, frames, time))
+
+    def _recognize(self, frames):
+        wav_bytes = write_wav(np.concatenate(frames)[:, None], self.sample_rate)
+        try:
+            text, _ = transcribe_audio(wav_bytes, self.language_code, self.stt_backend)
+        except sr.UnknownValueError:
+            return None
+        return text
+
+    def _run_partial(self, utterance_id, frames, time):
+        try:
+            text = self._recognize(frames)
+        except Exception:
+            text = None  # A failed partial is simply skipped; the final will retry the whole utterance
+        finally:
+            with self._lock:
+                self._partial_busy = False
+        with self._lock:
+            # The utterance may have ended while this partial was being recognized
+            if text and utterance_id not in self._finalized:
+                self.emit({"type": "partial", "utterance": utterance_id, "text": text, "time": time})
+
+    def _run_final(self, utterance_id, frames, time):
+        try:
+            text = self._recognize(frames)
+        except Exception as e:
+            self.emit({"type": "error", "utterance": utterance_id, "message": f"{type(e).__name__}: {e}"})
+            return
+        with self._lock:
+            if text:
+                self.emit({
+                    "type": "final",
+                    "utterance": utterance_id,
+                    "text": text,
+                    "time": time,
+                    "seconds": len(frames) * FRAME_MS / 1000
+                })
+            else:
+                self.emit({"type": "no_speech", "utterance": utterance_id, "time": time})
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Offline tests for the audio front-end (VAD and preprocessing).
+All audio is synthesized, so no microphone or network is needed.
+
+Run with: python -m pytest test_audio_frontend.py
+"""
+
+import io
+import wave
+
+import numpy as np
+
+from audio_frontend import (
+    downmix, noise_gate, normalize_gain, preprocess_audio, read_wav, resample,
+    split_at_pauses, trim_silence, write_wav
+)
+
+
+def tone(frequency, seconds, sample_rate, amplitude=0.3):
+    t = np.arange(int(seconds * sample_rate)) / sample_rate
+    return amplitude * np.sin(2 * np.pi * frequency * t)
+
+
+def quiet_noise(seconds, sample_rate, level=0.002):
+    return np.random.default_rng(0).normal(0, level, int(seconds * sample_rate))
+
+
+def test_read_write_round_trip():
+    samples = np.stack([tone(440, 0.5, 16000), tone(220, 0.5, 16000)], axis=1)
+    decoded, sample_rate = read_wav(write_wav(samples, 16000))
+    assert sample_rate == 16000
+    assert decoded.shape == samples.shape
+    assert np.allclose(decoded, samples, atol=1e-3)
+
+
+def test_trim_silence_keeps_only_speech():
+    rate = 16000
+    signal = np.concatenate([quiet_noise(1.0, rate), tone(300, 1.0, rate), quiet_noise(2.0, rate)])
+    trimmed, stats = trim_silence(write_wav(signal[:, None], rate))
+
+    assert trimmed is not None
+    assert stats["total_seconds"] == 4.0
+    assert 1.0 <= stats["speech_seconds"] < 1.6
+    assert stats["output_bytes"] < stats["input_bytes"] / 2
+
+
+def test_trim_silence_rejects_recording_without_speech():
+    rate = 16000
+    trimmed, stats = trim_silence(write_wav(quiet_noise(2.0, rate)[:, None], rate))
+    assert trimmed is None
+    assert stats["speech_seconds"] == 0.0
+
+
+def test_trim_silence_rejects_steady_noise():
+    rate = 16000
+    for level in (0.02, 0.05):
+        noise = np.random.default_rng(1).normal(0, level, 3 * rate)
+        trimmed, stats = trim_silence(write_wav(noise[:, None], rate))
+        assert trimmed is None, f"{level} RMS noise was taken for speech"
+        assert stats["speech_seconds"] == 0.0
+
+
+def test_downmix_averages_channels():
+    stereo = np.stack([np.ones(10), np.zeros(10)], axis=1)
+    assert np.allclose(downmix(stereo), 0.5)
+
+
+def test_resample_keeps_duration_and_pitch():
+    signal = tone(1000, 1.0, 48000)
+    resampled = resample(signal, 48000, 16000)
+    assert len(resampled) == 16000
+
+    spectrum = np.abs(np.fft.rfft(resampled))
+    peak_hz = np.argmax(spectrum) * 16000 / len(resampled)
+    assert abs(peak_hz - 1000) < 5
+
+
+def test_resample_filters_out_aliasing_frequencies():
+    # 12 kHz is above the 8 kHz Nyquist limit of 16 kHz audio
+    resampled = resample(tone(12000, 1.0, 48000), 48000, 16000)
+    assert np.sqrt(np.mean(resampled ** 2)) < 0.02
+
+
+def test_normalize_gain_reaches_target_without_clipping():
+    quiet = tone(440, 1.0, 16000, amplitude=0.01)
+    louder = normalize_gain(quiet)
+    assert np.sqrt(np.mean(louder ** 2)) > np.sqrt(np.mean(quiet ** 2)) * 5
+    assert np.max(np.abs(louder)) <= 0.99
+
+
+def test_noise_gate_silences_quiet_frames():
+    rate = 16000
+    signal = np.concatenate([quiet_noise(0.5, rate, level=0.0005), tone(440, 0.5, rate)])
+    gated = noise_gate(signal, rate)
+    assert np.all(gated[:rate // 2 - 160] == 0)
+    assert np.allclose(gated[-rate // 4:], signal[-rate // 4:])
+
+
+def test_preprocess_produces_16k_mono_flac():
+    stereo = np.stack([tone(300, 1.0, 44100), tone(300, 1.0, 44100)], axis=1)
+    wav_bytes = write_wav(stereo, 44100)
+
+    audio_data, stats = preprocess_audio(wav_bytes)
+    assert audio_data.sample_rate == 16000
+    assert audio_data.sample_width == 2
+    assert len(audio_data.frame_data) == 16000 * 2
+
+    flac = audio_data.get_flac_data(convert_width=2)
+    assert flac.startswith(b"fLaC")
+    assert stats["output_bytes"] == len(flac)
+    assert stats["output_bytes"] < stats["input_bytes"]
+    assert stats["processing_ms"] >= 0
+
+
+def test_read_wav_handles_8_bit_audio():
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(1)
+        wav.setframerate(8000)
+        wav.writeframes(bytes([128, 255, 0, 128]))
+    samples, rate = read_wav(buffer.getvalue())
+    assert rate == 8000
+    assert np.allclose(samples[:, 0], [0.0, 127 / 128, -1.0, 0.0])
+
+
+def test_split_at_pauses_cuts_inside_silence():
+    rate = 16000
+    words = [tone(300, 4.0, rate), quiet_noise(0.6, rate), tone(300, 4.0, rate),
+             quiet_noise(0.6, rate), tone(300, 4.0, rate)]
+    signal = np.concatenate(words)
+
+    segments = split_at_pauses(signal, rate, max_seconds=6.0)
+    assert len(segments) == 3
+    assert segments[0][0] == 0 and segments[-1][1] == len(signal)
+    for (_, end), (start, _) in zip(segments, segments[1:]):
+        assert end == start
+        # Every cut lands in one of the pauses
+        assert any(abs(end / rate - pause) < 0.3 for pause in (4.3, 8.9))
+
+
+def test_split_at_pauses_hard_cuts_without_pauses():
+    rate = 16000
+    segments = split_at_pauses(tone(300, 10.0, rate), rate, max_seconds=4.0)
+    assert [(end - start) / rate for start, end in segments] == [4.0, 4.0, 2.0]
+
+
+def test_trim_silence_keeps_speech_without_pauses():
+    rate = 16000
+    t = np.arange(2 * rate) / rate
+    for depth in (0.0, 0.3, 0.6, 0.9):
+        # A voice talking for the whole recording: syllable-rate loudness changes, but no quiet frames
+        envelope = 1 - depth / 2 + depth / 2 * np.cos(2 * np.pi * 4 * t)
+        trimmed, stats = trim_silence(write_wav((tone(300, 2.0, rate) * envelope)[:, None], rate))
+        assert trimmed is not None, f"continuous speech at modulation depth {depth} was rejected"
+        assert stats["speech_seconds"] >= 1.9
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Offline tests for the batch voice CLI, using the benchmark WAV fixtures,
+the stub STT backend and stand-in Gemini and TTS.
+
+Run with: python -m pytest test_batch_voice.py
+"""
+
+import json
+import os
+import shutil
+import types
+
+import pytest
+
+from batch_voice import BatchPipeline, load_finished, load_jobs, run_batch
+from speech_to_text import StubBackend
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bench_fixtures")
+
+
+class EchoModel:
+    """Replies with the transcript, or fails every request"""
+
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.prompts = []
+
+    def generate_content(self, prompt):
+        self.prompts.append(prompt)
+        if self.fail:
+            raise RuntimeError("quota")
+        return types.SimpleNamespace(text=f"You said: {prompt}")
+
+
+def make_pipeline(output_dir, model, speak=True):
+    return BatchPipeline(
+        output_dir,
+        speak=speak,
+        stt_backend=StubBackend(default="what time is it"),
+        model_for=lambda personality, language: model,
+        synthesize=lambda text, language="en", slow=False: f"MP3 {language} {text}".encode()
+    )
+
+
+def read_results(output_dir):
+    with open(os.path.join(output_dir, "results.jsonl"), encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+def test_directory_run_writes_results_and_audio(tmp_path):
+    output_dir = str(tmp_path / "out")
+    jobs = load_jobs(FIXTURES, "Study Buddy", "Spanish")
+    summary = run_batch(jobs, output_dir, workers=2, pipeline=make_pipeline(output_dir, EchoModel()))
+
+    assert summary["processed"] == summary["ok"] == len(jobs) == 3
+    results = read_results(output_dir)
+    assert sorted(result["id"] for result in results) == ["command", "dictation", "question"]
+    for result in results:
+        # The long dictation is recognized in segments, so its transcript repeats the stub text
+        assert result["transcript"].startswith("what time is it")
+        assert result["reply"] == f"You said: {result['transcript']}"
+        assert set(result["timings"]) == {"stt", "llm", "tts"}
+        with open(os.path.join(output_dir, result["audio"]), "rb") as f:
+            assert f.read().startswith(b"MP3 es ")
+    assert summary["recordings_per_minute"] > 0
+
+
+def test_rerun_skips_finished_and_retries_failed(tmp_path):
+    output_dir = str(tmp_path / "out")
+    jobs = load_jobs(FIXTURES, "General Assistant", "English")
+
+    first = run_batch(jobs, output_dir, pipeline=make_pipeline(output_dir, EchoModel(fail=True), speak=False))
+    assert first["error"] == 3
+    assert load_finished(output_dir) == set()
+
+    model = EchoModel()
+    second = run_batch(jobs[:2], output_dir, pipeline=make_pipeline(output_dir, model, speak=False))
+    assert second["ok"] == 2
+
+    third = run_batch(jobs, output_dir, pipeline=make_pipeline(output_dir, model, speak=False))
+    assert third["skipped"] == 2
+    assert third["processed"] == 1
+    assert len(model.prompts) == 3
+
+
+def test_manifest_overrides_personality_and_language(tmp_path):
+    shutil.copy(os.path.join(FIXTURES, "question.wav"), tmp_path / "q.wav")
+    manifest = tmp_path / "manifest.jsonl"
+    manifest.write_text(
+        json.dumps({"path": "q.wav", "id": "q1", "language": "French"}) + "\n"
+        + json.dumps({"path": "q.wav", "id": "q2"}) + "\n"
+    )
+
+    jobs = load_jobs(str(manifest), "Fitness Coach", "English")
+    assert [(job["id"], job["language"], job["personality"]) for job in jobs] == [
+        ("q1", "French", "Fitness Coach"),
+        ("q2", "English", "Fitness Coach")
+    ]
+    assert jobs[0]["path"] == str(tmp_path / "q.wav")
+
+
+def test_manifest_ids_stay_inside_the_output_directory(tmp_path):
+    recordings = tmp_path / "recordings"
+    (recordings / "day1").mkdir(parents=True)
+    shutil.copy(os.path.join(FIXTURES, "question.wav"), recordings / "day1" / "q.wav")
+    manifest = tmp_path / "manifests" / "manifest.jsonl"
+    manifest.parent.mkdir()
+    shutil.copy(os.path.join(FIXTURES, "question.wav"), manifest.parent / "local.wav")
+    manifest.write_text(
+        json.dumps({"path": str(recordings / "day1" / "q.wav")}) + "\n"
+        + json.dumps({"path": "../recordings/day1/q.wav"}) + "\n"
+        + json.dumps({"path": "local.wav"}) + "\n"
+    )
+
+    jobs = load_jobs(str(manifest), "General Assistant", "English")
+    # Recordings outside the manifest's directory are named after the file, never by their path
+    assert [job["id"] for job in jobs] == ["q", "q", "local"]
+    assert jobs[1]["path"] == str(recordings / "day1" / "q.wav")
+
+
+def test_manifest_rejects_ids_that_escape_the_output_directory(tmp_path):
+    shutil.copy(os.path.join(FIXTURES, "question.wav"), tmp_path / "q.wav")
+    manifest = tmp_path / "manifest.jsonl"
+    for job_id in ("/tmp/answer", "../answer", "replies/../../answer", ""):
+        manifest.write_text(json.dumps({"path": "q.wav", "id": job_id}) + "\n")
+        with pytest.raises(ValueError):
+            load_jobs(str(manifest), "General Assistant", "English")
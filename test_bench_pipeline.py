@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Offline tests for the pipeline latency benchmark.
+Runs the checked-in WAV fixtures through the stand-in services.
+
+Run with: python -m pytest test_bench_pipeline.py
+"""
+
+from bench_pipeline import FIXTURES, Rig, compare, load_fixtures, run_benchmark, run_turn
+
+
+def test_every_fixture_runs_end_to_end():
+    results = run_benchmark(iterations=1, stt_ms=0, llm_ms=0, chunk_ms=0, tts_ms=0)
+    stages = results["stages"]
+
+    assert stages["total"]["n"] == len(FIXTURES)
+    assert stages["stt"]["n"] == len(FIXTURES)
+    # The command fixture never reaches Gemini or TTS
+    assert stages["llm"]["n"] == len(FIXTURES) - 1
+    assert stages["tts"]["n"] == len(FIXTURES) - 1
+    for row in stages.values():
+        assert row["p50"] <= row["p95"] <= row["p99"]
+
+
+def test_injected_latency_shows_up_in_its_stage():
+    fixture, wav_bytes = load_fixtures()[1]
+    spans = run_turn(Rig(stt_ms=40, llm_ms=0, chunk_ms=0, tts_ms=0, jitter=0.0), wav_bytes, fixture["transcript"])
+    assert spans["stt"] >= 0.04
+    assert spans["llm"] < 0.04
+
+
+def test_blocking_path_synthesizes_the_whole_reply():
+    fixture, wav_bytes = load_fixtures()[1]
+    rig = Rig(stt_ms=0, llm_ms=0, chunk_ms=0, tts_ms=0, stream=False)
+    spans = run_turn(rig, wav_bytes, fixture["transcript"])
+    assert spans["llm_first_token"] == spans["llm"]
+    assert rig.tts_cache.stats()["entries"] == 1
+
+
+def test_compare_reports_only_real_regressions():
+    baseline = {"stages": {"stt": {"p50": 100.0, "p95": 150.0, "p99": 200.0},
+                           "vad": {"p50": 1.0, "p95": 2.0, "p99": 3.0}}}
+    results = {"stages": {"stt": {"p50": 150.0, "p95": 160.0, "p99": 210.0},
+                          "vad": {"p50": 3.0, "p95": 6.0, "p99": 9.0}}}
+
+    # vad tripled but only by a few milliseconds
+    assert compare(results, baseline) == [("stt", "p50", 100.0, 150.0)]
+
+
+def test_turns_go_through_the_gemini_client():
+    rig = Rig(stt_ms=0, llm_ms=0, chunk_ms=0, tts_ms=0)
+    for fixture, wav_bytes in load_fixtures():
+        run_turn(rig, wav_bytes, fixture["transcript"])
+    # The command fixture is handled without Gemini
+    assert rig.client.stats()["requests"] == len(FIXTURES) - 1
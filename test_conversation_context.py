@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+"""
+Tests for the token-budgeted conversation history.
+
+Run with: python -m pytest test_conversation_context.py
+"""
+
+from conversation_context import ConversationContext, estimate_tokens, truncating_summarizer
+
+
+def conversation(user, assistant, turns):
+    messages = []
+    for _ in range(turns):
+        messages += [{"role": "user", "content": user}, {"role": "assistant", "content": assistant}]
+    return messages + [{"role": "user", "content": user}]
+
+
+def test_latin_text_is_about_four_characters_per_token():
+    assert estimate_tokens("") == 1
+    assert estimate_tokens("What is the weather like today?") == 8
+
+
+def test_cjk_characters_count_one_token_each():
+    assert estimate_tokens("今日の天気はどうですか") == 12
+    assert estimate_tokens("오늘 날씨 어때요") == 8
+    assert estimate_tokens("Gemini で翻訳して") == 7
+
+
+def test_cjk_history_is_folded_to_stay_within_the_budget():
+    reply = "はい、" + "東京は晴れです。" * 10
+    context = ConversationContext(token_budget=300, summarize=truncating_summarizer)
+    contents, _ = context.build(conversation("今日の天気はどうですか", reply, 10))
+
+    # At four characters per token all 21 messages (~250 tokens) would have been sent verbatim
+    assert context.folded > 0
+    assert contents[0]["parts"][0].startswith("Summary")
+    verbatim = [part for content in contents[2:] for part in content["parts"]]
+    assert sum(estimate_tokens(part) for part in verbatim) <= 300
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Offline tests for the conversation store and its backends. Redis runs on
+the in-process LocalRedis stand-in, and on fakeredis when it is installed.
+
+Run with: python -m pytest test_conversation_store.py
+"""
+
+import pytest
+
+from conversation_store import (ConversationStore, LocalRedis, MemoryBackend, RedisBackend, SQLiteBackend,
+                                create_backend)
+
+
+def fakeredis_backend(tmp_path):
+    fakeredis = pytest.importorskip("fakeredis")
+    return RedisBackend(fakeredis.FakeRedis())
+
+
+BACKENDS = {
+    "memory": lambda tmp_path: MemoryBackend(),
+    "sqlite": lambda tmp_path: SQLiteBackend(str(tmp_path / "conversations.db")),
+    "redis": lambda tmp_path: RedisBackend(LocalRedis()),
+    "fakeredis": fakeredis_backend
+}
+
+
+@pytest.fixture(params=sorted(BACKENDS))
+def store(request, tmp_path):
+    return ConversationStore(BACKENDS[request.param](tmp_path))
+
+
+def message(n):
+    return {"role": "user" if n % 2 == 0 else "assistant", "content": f"message {n}"}
+
+
+def test_append_numbers_messages_per_conversation(store):
+    assert [store.append_message("a", message(n)) for n in range(3)] == [0, 1, 2]
+    assert store.append_message("b", message(0)) == 0
+    assert store.count_messages("a") == 3
+    assert store.count_messages("missing") == 0
+
+
+def test_paging_from_the_newest_back_to_the_first(store):
+    for n in range(7):
+        store.append_message("a", message(n))
+
+    page, offset = store.recent_messages("a", 3)
+    assert (page, offset) == ([message(4), message(5), message(6)], 4)
+    page, offset = store.messages_before("a", offset, 3)
+    assert (page, offset) == ([message(1), message(2), message(3)], 1)
+    page, offset = store.messages_before("a", offset, 3)
+    assert (page, offset) == ([message(0)], 0)
+    assert store.messages_before("a", offset, 3) == ([], 0)
+
+
+def test_short_conversations_fit_on_one_page(store):
+    store.append_message("a", message(0))
+    assert store.recent_messages("a", 20) == ([message(0)], 0)
+    assert store.recent_messages("missing", 20) == ([], 0)
+
+
+def test_settings_round_trip(store):
+    assert store.load_settings("a") == {}
+    settings = {"personality": "Study Buddy", "selected_language": "日本語", "tts_speed_slow": True}
+    store.save_settings("a", settings)
+    assert store.load_settings("a") == settings
+
+    store.save_settings("a", dict(settings, tts_speed_slow=False))
+    assert store.load_settings("a")["tts_speed_slow"] is False
+    assert store.load_settings("b") == {}
+
+
+def test_sqlite_file_is_reopened_with_its_history(tmp_path):
+    path = str(tmp_path / "conversations.db")
+    first = ConversationStore(SQLiteBackend(path))
+    for n in range(3):
+        first.append_message("a", message(n))
+    first.save_settings("a", {"personality": "Fitness Coach"})
+
+    reopened = ConversationStore(SQLiteBackend(path))
+    assert reopened.recent_messages("a", 10) == ([message(0), message(1), message(2)], 0)
+    assert reopened.load_settings("a") == {"personality": "Fitness Coach"}
+    # Numbering continues where the earlier process stopped
+    assert reopened.append_message("a", message(3)) == 3
+
+
+def test_create_backend_by_name(tmp_path):
+    assert isinstance(create_backend("memory"), MemoryBackend)
+    assert isinstance(create_backend("sqlite", path=str(tmp_path / "c.db")), SQLiteBackend)
+    assert isinstance(create_backend("redis").client, LocalRedis)
+    with pytest.raises(ValueError):
+        create_backend("postgres")
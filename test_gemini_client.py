@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Offline tests for the Gemini client layer, with stand-in models.
+
+Run with: python -m pytest test_gemini_client.py
+"""
+
+import threading
+import types
+
+import pytest
+
+from gemini_client import GeminiClient, RateLimitedError, TokenBucket, is_rate_limited
+
+
+class QuotaExceeded(Exception):
+    code = 429
+
+
+class FakeModel:
+    """Answers with the prompt; fails with 429 `failures` times first"""
+
+    def __init__(self, failures=0, release=None):
+        self.failures = failures
+        self.release = release
+        self.calls = 0
+
+    def generate_content(self, prompt, stream=False):
+        self.calls += 1
+        if self.release is not None:
+            self.release.wait(5)
+        if self.failures:
+            self.failures -= 1
+            raise QuotaExceeded("429 Resource has been exhausted")
+        if stream:
+            return (types.SimpleNamespace(text=word) for word in prompt.split())
+        return types.SimpleNamespace(text=prompt)
+
+
+def make_client(**kwargs):
+    # Simulated time: backoff and token waits return at once
+    now = [0.0]
+
+    def sleep(seconds):
+        now[0] += seconds
+
+    return GeminiClient(clock=lambda: now[0], sleep=sleep, **kwargs)
+
+
+def test_token_bucket_spaces_requests_after_the_burst():
+    now = [0.0]
+    bucket = TokenBucket(rate=2.0, capacity=2, clock=lambda: now[0])
+
+    assert [bucket.reserve() for _ in range(4)] == [0.0, 0.0, 0.5, 1.0]
+    now[0] = 1.0
+    assert bucket.reserve() == 0.5
+
+
+def test_identical_concurrent_requests_share_one_call():
+    release = threading.Event()
+    model = FakeModel(release=release)
+    client = make_client()
+    limited = client.wrap(model)
+
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(limited.generate_content("same prompt").text))
+        for _ in range(3)
+    ]
+    for thread in threads:
+        thread.start()
+    while client.stats()["coalesced"] < 2:
+        pass
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert results == ["same prompt"] * 3
+    assert model.calls == 1
+    assert client.stats()["requests"] == 1
+
+
+def test_streams_are_coalesced_and_replayed_from_the_start():
+    release = threading.Event()
+    model = FakeModel(release=release)
+    client = make_client()
+    limited = client.wrap(model)
+
+    first = limited.generate_content("one two three", stream=True)
+    second = limited.generate_content("one two three", stream=True)
+    release.set()
+
+    assert [chunk.text for chunk in first] == ["one", "two", "three"]
+    assert [chunk.text for chunk in second] == ["one", "two", "three"]
+    assert model.calls == 1
+
+
+def test_429_is_retried_with_backoff():
+    model = FakeModel(failures=2)
+    client = make_client()
+
+    assert client.wrap(model).generate_content("hello").text == "hello"
+    assert model.calls == 3
+    assert client.stats()["throttled"] == 2
+    assert client.stats()["retries"] == 2
+
+
+def test_other_errors_mentioning_429_are_not_retried():
+    class ModelWith429InItsMessage(FakeModel):
+        def generate_content(self, prompt, stream=False):
+            self.calls += 1
+            raise ValueError("Prompt is 4290 characters long")
+
+    model = ModelWith429InItsMessage()
+    with pytest.raises(ValueError):
+        make_client().wrap(model).generate_content("hello")
+    assert model.calls == 1
+
+
+def test_sdk_quota_error_is_rate_limited():
+    exceptions = pytest.importorskip("google.api_core.exceptions")
+    assert is_rate_limited(exceptions.ResourceExhausted("Resource has been exhausted"))
+    assert not is_rate_limited(exceptions.InvalidArgument("Request had 429 tokens too many"))
+
+
+def test_gives_up_after_max_retries():
+    model = FakeModel(failures=10)
+    client = make_client(max_retries=2)
+
+    with pytest.raises(RateLimitedError):
+        client.wrap(model).generate_content("hello")
+    assert model.calls == 3
+
+
+def test_backoff_grows_and_is_capped():
+    client = GeminiClient(base_delay=1.0, max_delay=8.0, rng=lambda: 1.0)
+    assert [client.backoff(attempt) for attempt in range(5)] == [1.0, 2.0, 4.0, 8.0, 8.0]
+    assert GeminiClient(base_delay=1.0, rng=lambda: 0.0).backoff(2) == 2.0
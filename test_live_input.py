@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+App tests for live microphone input, with the live mic component, Gemini
+and gTTS replaced by stand-ins.
+
+Run with: python -m pytest test_live_input.py
+"""
+
+import os
+import types
+
+import google.generativeai as genai
+import gtts
+import pytest
+from streamlit.testing.v1 import AppTest
+
+import live_mic
+
+APP = os.path.join(os.path.dirname(os.path.abspath(__file__)), "app.py")
+
+
+class CountingModel:
+    """Answers every prompt with one sentence and counts the requests"""
+
+    prompts = []
+
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def generate_content(self, prompt, stream=False, **kwargs):
+        CountingModel.prompts.append(prompt)
+        chunk = types.SimpleNamespace(text="Here is the answer.")
+        return iter([chunk]) if stream else chunk
+
+    def count_tokens(self, contents):
+        return types.SimpleNamespace(total_tokens=len(str(contents).split()))
+
+
+class SilentTTS:
+    def __init__(self, text, lang="en", slow=False, **kwargs):
+        self.text = text
+
+    def write_to_fp(self, fp):
+        fp.write(b"MP3" + self.text.encode())
+
+
+@pytest.fixture
+def live_app(tmp_path, monkeypatch):
+    monkeypatch.setenv("VOICE_API_URL", "http://127.0.0.1:8502")
+    monkeypatch.setenv("TTS_CACHE_DIR", str(tmp_path / "tts"))
+    monkeypatch.setattr(genai, "GenerativeModel", CountingModel)
+    monkeypatch.setattr(gtts, "gTTS", SilentTTS)
+    CountingModel.prompts = []
+
+    event = {"value": None}
+    monkeypatch.setattr(live_mic, "live_mic", lambda url, language="English", key=None: event["value"])
+
+    app = AppTest.from_file(APP, default_timeout=30)
+    app.run()
+    app.session_state.live_input = True
+    return app, event
+
+
+def test_partials_do_not_restart_the_interrupted_reply(live_app):
+    app, event = live_app
+    # A question whose reply run was stopped by the first partial of the next utterance
+    app.session_state.messages = [{"role": "user", "content": "tell me a long story"}]
+
+    for seq, (kind, text) in enumerate([("partial", "what"), ("partial", "what time"),
+                                        ("final", "what time is it")], start=1):
+        event["value"] = {"type": kind, "text": text, "seq": seq}
+        app.run()
+        assert not app.exception
+    assert CountingModel.prompts == []
+    assert app.session_state.messages[-1]["interrupted"]
+    assert app.session_state.voice_text == "what time is it"
+
+    # Sending the final transcript asks Gemini once
+    app.text_area(key="text_input_area").input("what time is it")
+    app.button(key="send_btn").click().run()
+    app.run()
+    assert len(CountingModel.prompts) == 1
+    assert [m["role"] for m in app.session_state.messages] == ["user", "user", "assistant"]
+
+
+def test_each_utterance_barges_in_once(live_app):
+    app, event = live_app
+    turns = []
+    for seq, (kind, text) in enumerate([("partial", "hi"), ("partial", "hi there"), ("final", "hi there"),
+                                        ("partial", "and"), ("final", "and you")], start=1):
+        event["value"] = {"type": kind, "text": text, "seq": seq}
+        app.run()
+        turns.append(app.session_state.turn_manager.current.id)
+    assert turns[0] == turns[1] == turns[2] < turns[3] == turns[4]
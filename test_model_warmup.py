@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+Offline tests for the model warmer, with a stand-in model builder.
+
+Run with: python -m pytest test_model_warmup.py
+"""
+
+import time
+
+from model_warmup import ModelWarmer
+
+PAIRS = [("General Assistant", "English"), ("Gaming Helper", "Spanish")]
+
+
+def wait_for_warmup(warmer):
+    deadline = time.time() + 5
+    while warmer.stats()["warmup_seconds"] is None and time.time() < deadline:
+        time.sleep(0.01)
+
+
+def test_warmup_builds_every_pair_and_opens_the_connection():
+    built = []
+    pings = []
+    warmer = ModelWarmer(lambda *pair: built.append(pair), PAIRS, ping=lambda: pings.append(1), keepalive=60)
+    warmer.start()
+    wait_for_warmup(warmer)
+    warmer.stop()
+
+    assert built == PAIRS
+    assert pings == [1]
+    assert warmer.stats()["built"] == 2
+    assert warmer.claim("Gaming Helper", "Spanish") == "warm"
+
+
+def test_first_request_without_warmup_is_cold_then_warm():
+    warmer = ModelWarmer(lambda *pair: None, PAIRS)
+
+    assert warmer.claim("General Assistant", "English") == "cold"
+    warmer.mark_connected()
+    assert warmer.claim("General Assistant", "English") == "warm"
+    # Another pair still pays for building its model
+    assert warmer.claim("Gaming Helper", "Spanish") == "cold"
+
+
+def test_failed_ping_leaves_the_connection_cold():
+    def ping():
+        raise ConnectionError("offline")
+
+    warmer = ModelWarmer(lambda *pair: None, PAIRS, ping=ping)
+    warmer._ping()
+
+    assert warmer.stats()["transport_warm"] is False
+    assert warmer.stats()["last_error"] == "offline"
+    assert warmer.claim(*PAIRS[0]) == "cold"
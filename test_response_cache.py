@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Offline tests for the reply cache, on a simulated clock.
+
+Run with: python -m pytest test_response_cache.py
+"""
+
+import pytest
+
+from response_cache import (MemoryBackend, ResponseCache, SQLiteBackend, context_fingerprint,
+                            response_cache_key)
+
+TTL = 60
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def make_backend(request, tmp_path, clock):
+    def make(max_entries=3):
+        if request.param == "memory":
+            return MemoryBackend(max_entries)
+        return SQLiteBackend(str(tmp_path / "responses.db"), max_entries, clock=clock)
+    return make
+
+
+def key(prompt, personality="General Assistant", language="English", history=()):
+    return response_cache_key(personality, language, prompt, context_fingerprint(list(history)))
+
+
+def test_trivial_variants_of_a_prompt_share_a_key():
+    assert key("What can you do?") == key("  what CAN you do ")
+
+
+def test_key_separates_personality_language_and_context():
+    assert len({
+        key("hello"),
+        key("hello", personality="Study Buddy"),
+        key("hello", language="Español"),
+        key("hello", history=[{"role": "user", "parts": ["hi"]}])
+    }) == 4
+
+
+def test_identical_key_is_served_from_the_cache(make_backend, clock):
+    cache = ResponseCache(make_backend(), ttl=TTL, clock=clock)
+    assert cache.get(key("hello")) is None
+    cache.put(key("hello"), "Hi there!")
+    assert cache.get(key("Hello!")) == "Hi there!"
+    assert cache.get(key("hello", language="Français")) is None
+    assert cache.stats() == {"hits": 1, "misses": 2, "hit_rate": 1 / 3}
+
+
+def test_entries_expire_after_the_ttl(make_backend, clock):
+    cache = ResponseCache(make_backend(), ttl=TTL, clock=clock)
+    cache.put(key("hello"), "Hi there!")
+
+    clock.now += TTL
+    assert cache.get(key("hello")) == "Hi there!"
+    clock.now += 1
+    assert cache.get(key("hello")) is None
+    # The expired entry is gone, not just hidden
+    clock.now -= 10
+    assert cache.get(key("hello")) is None
+
+
+def test_least_recently_used_entry_is_evicted(make_backend, clock):
+    cache = ResponseCache(make_backend(max_entries=3), ttl=TTL, clock=clock)
+    for prompt in ("one", "two", "three"):
+        cache.put(key(prompt), prompt.upper())
+        clock.now += 1
+
+    assert cache.get(key("one")) == "ONE"  # Now the most recently used
+    clock.now += 1
+    cache.put(key("four"), "FOUR")
+
+    assert cache.get(key("two")) is None
+    assert [cache.get(key(prompt)) for prompt in ("one", "three", "four")] == ["ONE", "THREE", "FOUR"]
+
+
+def test_sqlite_entries_survive_a_reopen(tmp_path, clock):
+    path = str(tmp_path / "responses.db")
+    ResponseCache(SQLiteBackend(path, clock=clock), ttl=TTL, clock=clock).put(key("hello"), "Hi there!")
+    assert ResponseCache(SQLiteBackend(path, clock=clock), ttl=TTL, clock=clock).get(key("hello")) == "Hi there!"
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Offline tests for the pre-rendered speech bundle, with a stand-in synthesizer.
+
+Run with: python -m pytest test_speech_bundle.py
+"""
+
+import asyncio
+import logging
+import os
+
+import pytest
+
+from assistant_core import COMMAND_CONFIRMATIONS, HELP_MESSAGE, LANGUAGES, get_tts_cache
+from conversation_context import truncating_summarizer
+from speech_bundle import HEADER, MAGIC, build_bundle, bundle_entries, load_bundle, static_messages
+from speech_to_text import StubBackend
+from tts_cache import TTSCache
+from voice_service import VoiceSession
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bench_fixtures")
+
+
+def fake_synthesize(text, language="en", slow=False):
+    return f"MP3:{language}:{int(slow)}:{text}".encode()
+
+
+def test_bundle_covers_every_language_and_speed(tmp_path):
+    path = str(tmp_path / "speech.bin")
+    build_bundle(path, synthesize=fake_synthesize, workers=2)
+    bundle = load_bundle(path)
+
+    tts_codes = {settings["tts_code"] for settings in LANGUAGES.values()}
+    assert len(bundle) == len(static_messages()) * len(tts_codes) * 2 == len(bundle_entries())
+
+    cache = TTSCache(cache_dir=None, bundle=bundle)
+    assert cache.get(HELP_MESSAGE, "ja", True) == fake_synthesize(HELP_MESSAGE, "ja", True)
+    assert cache.bundled("Not a fixed message", "en", False) is None
+    assert cache.stats()["bundle_hits"] == 1
+
+
+def test_bundled_clips_never_reach_the_synthesizer(tmp_path):
+    path = str(tmp_path / "speech.bin")
+    build_bundle(path, bundle_entries([HELP_MESSAGE]), synthesize=fake_synthesize)
+    cache = TTSCache(cache_dir=None, bundle=load_bundle(path))
+
+    def live_synthesize(text, language="en", slow=False):
+        raise AssertionError("live TTS call")
+
+    assert cache.get_or_synthesize(HELP_MESSAGE, "fr", synthesize=live_synthesize).startswith(b"MP3:fr:0:")
+
+
+def test_missing_and_foreign_files(tmp_path):
+    assert load_bundle(str(tmp_path / "missing.bin")) is None
+
+    path = tmp_path / "foreign.bin"
+    path.write_bytes(b"ID3 not a bundle at all")
+    with pytest.raises(ValueError):
+        load_bundle(str(path))
+
+
+def damaged_bundles(tmp_path):
+    """Files a crashed build, an older release or a stray file could leave at the bundle path"""
+    good = tmp_path / "good.bin"
+    build_bundle(str(good), bundle_entries([HELP_MESSAGE]), synthesize=fake_synthesize)
+    data = good.read_bytes()
+    return {
+        "empty": b"",
+        "short header": data[:HEADER.size - 2],
+        "truncated index": data[:HEADER.size + 10],
+        "old format": HEADER.pack(MAGIC, 0, 2) + b"{}",
+        "bad index": HEADER.pack(MAGIC, 1, 2) + b"[]",
+        "foreign": b"ID3 not a bundle at all"
+    }
+
+
+@pytest.mark.parametrize("damage", ["empty", "short header", "truncated index", "old format", "bad index", "foreign"])
+def test_damaged_files_raise_value_error(tmp_path, damage):
+    path = tmp_path / "damaged.bin"
+    path.write_bytes(damaged_bundles(tmp_path)[damage])
+    with pytest.raises(ValueError):
+        load_bundle(str(path))
+
+
+def test_damaged_bundle_falls_back_to_live_tts(tmp_path, monkeypatch, caplog):
+    path = tmp_path / "speech.bin"
+    monkeypatch.setenv("TTS_BUNDLE_PATH", str(path))
+    monkeypatch.setenv("TTS_CACHE_DIR", str(tmp_path / "cache"))
+    for data in damaged_bundles(tmp_path).values():
+        path.write_bytes(data)
+        get_tts_cache.cache_clear()
+        try:
+            with caplog.at_level(logging.WARNING, logger="assistant_core"):
+                cache = get_tts_cache()
+        finally:
+            get_tts_cache.cache_clear()
+        assert cache.bundled(HELP_MESSAGE, "en", False) is None
+        assert "Ignoring speech bundle" in caplog.text
+        caplog.clear()
+
+
+def test_voice_command_confirmation_is_spoken_from_the_bundle(tmp_path):
+    path = str(tmp_path / "speech.bin")
+    build_bundle(path, bundle_entries([COMMAND_CONFIRMATIONS["slow_down"]]), synthesize=fake_synthesize)
+    session = VoiceSession(
+        stt_backend=StubBackend(default="speak slower"),
+        summarize=truncating_summarizer,
+        tts_cache=TTSCache(cache_dir=None, bundle=load_bundle(path))
+    )
+    with open(os.path.join(FIXTURES, "command.wav"), "rb") as f:
+        wav_bytes = f.read()
+
+    async def collect():
+        return [event async for event in session.handle_audio(wav_bytes)]
+
+    events = asyncio.run(collect())
+    assert [event["type"] for event in events] == ["transcript", "command", "audio"]
+    # The command already slowed speech down, so the confirmation is voiced slowly
+    assert events[-1]["audio"] == fake_synthesize(COMMAND_CONFIRMATIONS["slow_down"], "en", True)
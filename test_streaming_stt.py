@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Offline tests for streaming recognition, replaying recorded frames
+through the stub STT backend instead of a live microphone.
+
+Run with: python -m pytest test_streaming_stt.py
+"""
+
+import os
+import socket
+import threading
+import time
+import types
+
+import numpy as np
+import uvicorn
+
+from audio_frontend import read_wav, write_wav
+from conversation_context import truncating_summarizer
+from speech_to_text import StubBackend, audio_duration
+from stream_replay import replay_to_server, replay_wav
+from voice_server import create_app
+from voice_service import VoiceSession
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bench_fixtures")
+
+
+class GrowingTranscript(StubBackend):
+    """One word per half second of audio, so longer prefixes read longer"""
+
+    def _recognize(self, audio_data, language):
+        return " ".join(["word"] * max(1, int(audio_duration(audio_data) * 2)))
+
+
+class ReplyModel:
+    def generate_content(self, prompt, stream=False, check=None):
+        yield types.SimpleNamespace(text="It is noon.")
+
+
+def read_fixture(name):
+    with open(os.path.join(FIXTURES, name), "rb") as f:
+        return f.read()
+
+
+def test_partials_grow_while_speaking_then_one_final():
+    events = replay_wav(read_fixture("question.wav"), stt_backend=GrowingTranscript())
+    kinds = [event["type"] for event in events]
+
+    assert kinds[0] == "speech_start"
+    assert kinds[-1] == "final" and kinds.count("final") == 1
+    partials = [event["text"] for event in events if event["type"] == "partial"]
+    assert len(partials) >= 2
+    assert [len(text) for text in partials] == sorted(len(text) for text in partials)
+    assert len(events[-1]["text"]) >= len(partials[-1])
+    assert [event["time"] for event in events] == sorted(event["time"] for event in events)
+
+
+def test_silence_produces_no_events():
+    silence = write_wav(np.zeros((16000 * 2, 1), dtype=np.float32), 16000)
+    assert replay_wav(silence, stt_backend=GrowingTranscript()) == []
+
+
+def test_a_pause_splits_two_utterances():
+    samples, sample_rate = read_wav(read_fixture("command.wav"))
+    pause = np.zeros((int(sample_rate * 1.5), samples.shape[1]), dtype=np.float32)
+    events = replay_wav(write_wav(np.concatenate([samples, pause, samples]), sample_rate), stt_backend=StubBackend())
+
+    finals = [event for event in events if event["type"] == "final"]
+    assert [event["utterance"] for event in finals] == [1, 2]
+    assert finals[1]["time"] - finals[0]["time"] > 1.5
+
+
+def test_listen_websocket_streams_partials_and_answers_the_final():
+    def make_session():
+        return VoiceSession(
+            model_for=lambda personality, language: ReplyModel(),
+            stt_backend=StubBackend(default="what time is it"),
+            summarize=truncating_summarizer,
+            speak=False
+        )
+
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+    server = uvicorn.Server(uvicorn.Config(create_app(session_factory=make_session), port=port, log_level="error"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.01)
+
+    try:
+        events = replay_to_server(read_fixture("question.wav"), f"ws://127.0.0.1:{port}/v1/listen", answer=True,
+                                  realtime=True)  # Unpaced, the final can overtake every partial
+    finally:
+        server.should_exit = True
+        thread.join(5)
+
+    kinds = [event["type"] for event in events]
+    assert kinds[0] == "config" and kinds[-1] == "end"
+    assert "partial" in kinds
+    assert kinds.index("partial") < kinds.index("final") < kinds.index("done")
+    assert [event["text"] for event in events if event["type"] == "final"] == ["what time is it"]
+    assert events[kinds.index("done")]["text"] == "It is noon."
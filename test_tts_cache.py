@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Offline tests for the shared TTS cache, with a counting stand-in for gTTS.
+
+Run with: python -m pytest test_tts_cache.py
+"""
+
+import os
+
+from tts_cache import TTSCache, tts_cache_key
+
+
+class CountingSynth:
+    def __init__(self, size=100):
+        self.size = size
+        self.calls = []
+
+    def __call__(self, text, language="en", slow=False):
+        self.calls.append(text)
+        return text.encode().ljust(self.size, b"\0")
+
+
+def clip(text, size=100):
+    return text.encode().ljust(size, b"\0")
+
+
+def disk_clips(cache_dir):
+    return sorted(name for _, _, names in os.walk(cache_dir) for name in names if name.endswith(".mp3"))
+
+
+def test_key_depends_on_language_and_speed():
+    assert len({tts_cache_key("hello"), tts_cache_key("hello", "fr"), tts_cache_key("hello", slow=True)}) == 3
+
+
+def test_each_clip_is_synthesized_once():
+    cache = TTSCache(cache_dir=None)
+    synth = CountingSynth()
+    for _ in range(3):
+        assert cache.get_or_synthesize("hello", synthesize=synth) == clip("hello")
+    cache.get_or_synthesize("hello", language="fr", synthesize=synth)
+    assert synth.calls == ["hello", "hello"]
+    assert cache.stats()["memory_hits"] == 2
+
+
+def test_memory_tier_evicts_least_recently_used_by_bytes():
+    cache = TTSCache(max_memory_bytes=300, cache_dir=None)
+    for text in ("one", "two", "three"):
+        cache.put(text, "en", False, clip(text))
+    cache.get("one")
+    cache.put("four", "en", False, clip("four"))
+
+    assert cache.get("two") is None
+    assert [cache.get(text) for text in ("one", "three", "four")] == [clip("one"), clip("three"), clip("four")]
+    assert cache.stats()["memory_bytes"] == 300
+
+
+def test_clip_larger_than_memory_tier_is_served_from_disk(tmp_path):
+    cache = TTSCache(max_memory_bytes=50, cache_dir=str(tmp_path))
+    cache.put("hello", "en", False, clip("hello"))
+    assert cache.stats()["entries"] == 0
+    assert cache.get("hello") == clip("hello")
+    assert cache.stats()["disk_hits"] == 1
+
+
+def test_disk_tier_is_shared_with_a_new_process(tmp_path):
+    TTSCache(cache_dir=str(tmp_path)).put("hello", "en", False, clip("hello"))
+    cache = TTSCache(cache_dir=str(tmp_path))
+    assert cache.stats()["disk_bytes"] == 100
+    assert cache.get("hello") == clip("hello")
+    # Promoted to memory on the first disk hit
+    assert cache.get("hello") == clip("hello")
+    assert (cache.stats()["disk_hits"], cache.stats()["memory_hits"]) == (1, 1)
+
+
+def test_disk_tier_drops_its_oldest_clips(tmp_path):
+    cache = TTSCache(max_memory_bytes=0, cache_dir=str(tmp_path), max_disk_bytes=300)
+    for text in ("one", "two", "three", "four"):
+        cache.put(text, "en", False, clip(text))
+
+    assert cache.get("one") is None
+    assert [cache.get(text) for text in ("two", "three", "four")] == [clip("two"), clip("three"), clip("four")]
+    assert len(disk_clips(tmp_path)) == 3
+    assert cache.stats()["disk_bytes"] == 300
+
+
+def test_reopening_with_a_smaller_cap_trims_the_oldest_clips(tmp_path):
+    cache = TTSCache(cache_dir=str(tmp_path))
+    for age, text in enumerate(("one", "two", "three")):
+        cache.put(text, "en", False, clip(text))
+        os.utime(cache._disk_path(tts_cache_key(text)), (age, age))
+
+    reopened = TTSCache(max_memory_bytes=0, cache_dir=str(tmp_path), max_disk_bytes=200)
+    assert reopened.get("one") is None
+    assert reopened.get("three") == clip("three")
+    assert disk_clips(tmp_path) == sorted(f"{tts_cache_key(text)}.mp3" for text in ("two", "three"))
+
+
+def test_clip_larger_than_disk_tier_stays_in_memory(tmp_path):
+    cache = TTSCache(cache_dir=str(tmp_path), max_disk_bytes=50)
+    cache.put("hello", "en", False, clip("hello"))
+    assert disk_clips(tmp_path) == []
+    assert cache.get("hello") == clip("hello")
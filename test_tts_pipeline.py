@@ -0,0 +1,31 @@
+#!/usr/bin/env python3
+"""
+Tests for sentence-pipelined TTS helpers.
+
+Run with: python -m pytest test_tts_pipeline.py
+"""
+
+import pytest
+
+from tts_pipeline import mp3_duration
+
+# MPEG-2 Layer III, 32 kbps, 24 kHz, mono (what gTTS produces): 96-byte frames of 24 ms
+GTTS_FRAME = bytes([0xFF, 0xF3, 0x44, 0xC4]) + bytes(92)
+
+
+def test_duration_counts_frames():
+    assert mp3_duration(GTTS_FRAME * 125) == pytest.approx(3.0)
+
+
+def test_concatenated_segments_add_up():
+    first, second = GTTS_FRAME * 50, GTTS_FRAME * 25
+    assert mp3_duration(first + second) == pytest.approx(mp3_duration(first) + mp3_duration(second))
+
+
+def test_id3_tag_is_skipped():
+    tag = b"ID3\x04\x00\x00\x00\x00\x00\x0A" + b"\xFF\xF3\x44\xC4" + bytes(6)
+    assert mp3_duration(tag + GTTS_FRAME * 10) == pytest.approx(0.24)
+
+
+def test_unreadable_audio_is_estimated_from_its_size():
+    assert mp3_duration(bytes(4000)) == pytest.approx(1.0)
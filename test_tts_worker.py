@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+Offline tests for the background TTS worker.
+
+Run with: python -m pytest test_tts_worker.py
+"""
+
+import time
+
+from tts_cache import TTSCache
+from tts_worker import FAILED, PENDING, READY, TTSWorker
+
+
+def failing_synth(text, language="en", slow=False):
+    raise RuntimeError(f"cannot say {text}")
+
+
+def request_until_settled(worker, text, timeout=5):
+    deadline = time.time() + timeout
+    state, audio = worker.request("s", text)
+    while state == PENDING and time.time() < deadline:
+        time.sleep(0.01)
+        state, audio = worker.request("s", text)
+    return state, audio
+
+
+def test_clip_is_synthesized_into_the_cache():
+    cache = TTSCache(cache_dir=None)
+    worker = TTSWorker(cache, synthesize=lambda text, language="en", slow=False: text.encode())
+    assert request_until_settled(worker, "hello") == (READY, b"hello")
+    assert cache.get("hello") == b"hello"
+
+
+def test_failure_is_reported_once_then_retried():
+    worker = TTSWorker(TTSCache(cache_dir=None), synthesize=failing_synth)
+    assert request_until_settled(worker, "hello") == (FAILED, "cannot say hello")
+    assert worker.request("s", "hello") == (PENDING, None)
+
+
+def test_unclaimed_failures_are_bounded():
+    worker = TTSWorker(TTSCache(cache_dir=None), synthesize=failing_synth, num_threads=1, max_failed=3)
+    texts = [f"clip {n}" for n in range(5)]
+    for text in texts:
+        assert worker.request("s", text) == (PENDING, None)
+    worker._queue.join()
+
+    assert len(worker._failed) == 3
+    # The oldest failures were forgotten, so those clips are simply queued again
+    assert [worker.request("s", text)[0] for text in texts] == [PENDING, PENDING, FAILED, FAILED, FAILED]
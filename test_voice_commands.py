@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Tests for the compiled voice command matcher.
+
+Run with: python -m pytest test_voice_commands.py
+"""
+
+import pytest
+
+from voice_commands import LANGUAGE_COMMANDS, LANGUAGE_FILLERS, match_voice_command
+
+# Questions that merely contain a command phrase
+QUESTIONS = [
+    "How can I speed up my computer?",
+    "what can you do about climate change",
+    "I need to slow down my breathing",
+    "how do I switch to general relativity",
+    "can you help me with math",
+    "please help my brother with his homework",
+    "ok thanks"
+]
+
+
+@pytest.mark.parametrize("text", QUESTIONS)
+def test_command_phrases_inside_questions_are_not_commands(text):
+    assert match_voice_command(text) is None
+
+
+@pytest.mark.parametrize("text, action", [
+    ("speed up", "speed_up"),
+    ("Please clear chat.", "clear_chat"),
+    ("slow down now", "slow_down"),
+    ("What can you do?", "show_help"),
+    ("can you help", "show_help"),
+    ("Switch to gaming, please!", "Gaming Helper"),
+    ("  HELP  ", "show_help")
+])
+def test_whole_utterance_commands_with_fillers(text, action):
+    assert match_voice_command(text) == action
+
+
+@pytest.mark.parametrize("language_code", sorted(LANGUAGE_COMMANDS))
+def test_every_phrase_in_each_language_table(language_code):
+    filler = LANGUAGE_FILLERS[language_code][0]
+    for phrase, action in LANGUAGE_COMMANDS[language_code].items():
+        assert match_voice_command(phrase, language_code) == action
+        assert match_voice_command(f"{filler} {phrase}", language_code) == action
+        # The same phrase as part of a longer sentence is not a command
+        assert match_voice_command(f"{phrase} xyzzy quux", language_code) is None
+        assert match_voice_command(f"xyzzy {phrase}", language_code) is None
+
+
+def test_english_commands_work_in_every_language():
+    for language_code in LANGUAGE_COMMANDS:
+        assert match_voice_command("clear chat", language_code) == "clear_chat"
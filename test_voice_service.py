@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+Offline tests for the async voice sessions and the voice API server,
+with the stub STT backend and stand-in Gemini and TTS.
+
+Run with: python -m pytest test_voice_service.py
+"""
+
+import asyncio
+import contextlib
+import json
+import os
+import socket
+import threading
+import time
+import types
+import urllib.error
+import urllib.request
+
+import uvicorn
+from websockets.sync.client import connect
+
+from conversation_context import truncating_summarizer
+from speech_to_text import StubBackend
+from voice_server import create_app
+from voice_service import VoiceSession
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bench_fixtures")
+
+
+class StreamingModel:
+    """Streams a fixed two-sentence reply word by word"""
+
+    def __init__(self, reply="Sure thing. Here you go!", delay=0.0):
+        self.reply = reply
+        self.delay = delay
+
+    def generate_content(self, prompt, stream=False, check=None):
+        for word in self.reply.split(" "):
+            time.sleep(self.delay)
+            yield types.SimpleNamespace(text=word + " ")
+
+
+def make_session(transcript="what time is it", **kwargs):
+    return VoiceSession(
+        model_for=lambda personality, language: StreamingModel(**kwargs),
+        synthesize=lambda text, language="en", slow=False: f"MP3:{text.strip()}".encode(),
+        stt_backend=StubBackend(default=transcript),
+        summarize=truncating_summarizer
+    )
+
+
+def read_fixture(name):
+    with open(os.path.join(FIXTURES, name), "rb") as f:
+        return f.read()
+
+
+async def collect(events):
+    return [event async for event in events]
+
+
+def test_text_turn_streams_text_then_audio_per_sentence():
+    session = make_session()
+    events = asyncio.run(collect(session.handle_text("hi")))
+    kinds = [event["type"] for event in events]
+
+    assert kinds[0] == "text" and kinds[-1] == "done"
+    assert "".join(event["delta"] for event in events if event["type"] == "text").strip() == "Sure thing. Here you go!"
+    assert [event["audio"] for event in events if event["type"] == "audio"] == [b"MP3:Sure thing.", b"MP3:Here you go!"]
+    assert [m["role"] for m in session.messages] == ["user", "assistant"]
+
+
+def test_spoken_command_updates_the_session_without_calling_gemini():
+    session = make_session(transcript="switch to gaming")
+    session.model_for = None  # Any Gemini call would fail
+    events = asyncio.run(collect(session.handle_audio(read_fixture("command.wav"))))
+
+    assert [event["type"] for event in events] == ["transcript", "command"]
+    assert events[1]["action"] == "Gaming Helper"
+    assert session.personality == "Gaming Helper"
+
+
+def test_new_input_cancels_the_reply_in_progress():
+    session = make_session(reply="one two three four five six seven eight", delay=0.05)
+
+    async def barge_in():
+        first = asyncio.ensure_future(collect(session.handle_text("tell me a story")))
+        await asyncio.sleep(0.1)
+        second = await collect(session.handle_text("stop"))
+        return await first, second
+
+    first, second = asyncio.run(barge_in())
+    assert first[-1]["type"] == "cancelled"
+    assert second[-1]["type"] == "done"
+
+
+def test_superseded_turns_leave_the_history_to_the_newest():
+    session = make_session(reply="one two three four", delay=0.2)
+
+    async def barge_in_twice():
+        first = asyncio.ensure_future(collect(session.handle_text("tell me a story")))
+        await asyncio.sleep(0.1)
+        second = asyncio.ensure_future(collect(session.handle_text("no wait")))
+        await asyncio.sleep(0.01)
+        third = await collect(session.handle_text("stop"))
+        return await first, await second, third
+
+    first, second, third = asyncio.run(barge_in_twice())
+    assert [events[-1]["type"] for events in (first, second, third)] == ["cancelled", "cancelled", "done"]
+    # The turn cancelled while waiting for the first one to stop never touched the history
+    assert [m["content"] for m in session.messages] == ["tell me a story", "stop", "one two three four "]
+
+
+@contextlib.contextmanager
+def running_server():
+    """Serve the voice API on a free local port for the duration of the block"""
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+    server = uvicorn.Server(uvicorn.Config(create_app(session_factory=make_session), port=port, log_level="error"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.01)
+
+    try:
+        yield port
+    finally:
+        server.should_exit = True
+        thread.join(5)
+
+
+def test_turn_rejects_malformed_json():
+    with running_server() as port:
+        statuses = []
+        for body in (b"{not json", b"[1, 2]", b'{"text": 42}', b'{"text": "  "}'):
+            request = urllib.request.Request(
+                f"http://127.0.0.1:{port}/v1/turn", data=body, headers={"Content-Type": "application/json"}
+            )
+            try:
+                urllib.request.urlopen(request, timeout=5)
+            except urllib.error.HTTPError as e:
+                statuses.append(e.code)
+    assert statuses == [400, 400, 400, 400]
+
+
+BAD_FRAMES = ["[1]", '"hi"', "{not json", '{"type": "text", "text": 5}', '{"type": "text"}',
+              '{"type": "config", "personality": ["General Assistant"]}']
+
+
+def test_stream_answers_bad_frames_with_error_events():
+    with running_server() as port:
+        with connect(f"ws://127.0.0.1:{port}/v1/stream") as websocket:
+            for frame in BAD_FRAMES:
+                websocket.send(frame)
+                assert json.loads(websocket.recv())["type"] == "error"
+            # The connection is still usable
+            websocket.send(json.dumps({"type": "config", "language": "French"}))
+            assert json.loads(websocket.recv())["language"] == "French"
+
+
+def test_listen_answers_bad_frames_with_error_events():
+    with running_server() as port:
+        with connect(f"ws://127.0.0.1:{port}/v1/listen") as websocket:
+            for frame in BAD_FRAMES[:3] + ['{"type": "config", "sample_rate": "abc"}',
+                                           '{"type": "config", "sample_rate": -8000}']:
+                websocket.send(frame)
+                assert json.loads(websocket.recv())["type"] == "error"
+            websocket.send(json.dumps({"type": "config", "sample_rate": 8000}))
+            assert json.loads(websocket.recv())["sample_rate"] == 8000
+
+
+def test_websocket_streams_events_and_audio_frames():
+    with running_server() as port:
+        with connect(f"ws://127.0.0.1:{port}/v1/stream") as websocket:
+            websocket.send(json.dumps({"type": "config", "language": "Spanish"}))
+            assert json.loads(websocket.recv())["language"] == "Spanish"
+
+            websocket.send(read_fixture("question.wav"))
+            events, frames = [], []
+            while not events or events[-1]["type"] != "done":
+                message = websocket.recv()
+                if isinstance(message, bytes):
+                    frames.append(message)
+                else:
+                    events.append(json.loads(message))
+
+    assert events[0] == {"type": "transcript", "text": "what time is it", "seconds": events[0]["seconds"]}
+    audio_headers = [event for event in events if event["type"] == "audio"]
+    assert [header["bytes"] for header in audio_headers] == [len(frame) for frame in frames]
+    assert frames == [b"MP3:Sure thing.", b"MP3:Here you go!"]
@@ -0,0 +1,201 @@
+"""
+Content-addressed text-to-speech cache shared by every session.
+
+Clips are keyed by a hash of (text, TTS language code, slow) and kept in
+a byte-bounded in-memory LRU tier backed by an on-disk tier, so the same
+sentence is only ever synthesized once per server. The disk tier is
+byte-bounded too and drops its oldest clips first. An optional read-only
+speech bundle (speech_bundle.py) of pre-rendered fixed messages is
+checked before both.
+"""
+
+import hashlib
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+
+from tts_pipeline import synthesize_speech
+
+DEFAULT_MEMORY_BYTES = 32 * 1024 * 1024  # 32 MB of MP3 audio in memory
+DEFAULT_DISK_BYTES = 512 * 1024 * 1024   # 512 MB of MP3 audio on disk
+DEFAULT_CACHE_DIR = os.path.join(tempfile.gettempdir(), "voice-assistant-tts")
+
+
+def tts_cache_key(text, language="en", slow=False):
+    """Hash the text together with the settings that change the audio"""
+    payload = f"{language}\0{int(bool(slow))}\0{text}"
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class TTSCache:
+    """Two-tier (memory LRU + disk) cache of synthesized MP3 clips, with an optional bundle in front"""
+
+    def __init__(self, max_memory_bytes=DEFAULT_MEMORY_BYTES, cache_dir=DEFAULT_CACHE_DIR, bundle=None,
+                 max_disk_bytes=DEFAULT_DISK_BYTES):
+        self.max_memory_bytes = max_memory_bytes
+        self.max_disk_bytes = max_disk_bytes
+        self.cache_dir = cache_dir
+        self.bundle = bundle
+
+        self._memory = OrderedDict()
+        self._memory_bytes = 0
+        self._disk = OrderedDict()  # key -> size of the clips on disk, oldest first
+        self._disk_bytes = 0
+        self._lock = threading.Lock()
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+            self._scan_disk()
+
+        self.bundle_hits = 0
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def bundled(self, text, language="en", slow=False):
+        """Return the pre-rendered clip from the bundle, or None - never synthesizes or touches disk"""
+        if self.bundle is None:
+            return None
+        audio = self.bundle.get(tts_cache_key(text, language, slow))
+        if audio is not None:
+            with self._lock:
+                self.bundle_hits += 1
+        return audio
+
+    def get(self, text, language="en", slow=False):
+        """Return the cached clip, or None if it has never been synthesized"""
+        audio = self.bundled(text, language, slow)
+        if audio is not None:
+            return audio
+        key = tts_cache_key(text, language, slow)
+
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+                return self._memory[key]
+
+        audio = self._read_disk(key)
+        with self._lock:
+            if audio is None:
+                self.misses += 1
+                return None
+            self.disk_hits += 1
+            self._remember(key, audio)
+        return audio
+
+    def put(self, text, language, slow, audio):
+        """Store a clip in both tiers"""
+        key = tts_cache_key(text, language, slow)
+        self._write_disk(key, audio)
+        with self._lock:
+            self._remember(key, audio)
+
+    def get_or_synthesize(self, text, language="en", slow=False, synthesize=synthesize_speech):
+        """Return the cached clip, synthesizing and storing it on a miss"""
+        audio = self.get(text, language, slow)
+        if audio is None:
+            audio = synthesize(text, language=language, slow=slow)
+            self.put(text, language, slow, audio)
+        return audio
+
+    def stats(self):
+        """Hit/miss counters and current memory usage"""
+        with self._lock:
+            hits = self.bundle_hits + self.memory_hits + self.disk_hits
+            lookups = hits + self.misses
+            return {
+                "bundle_hits": self.bundle_hits,
+                "bundle_clips": len(self.bundle) if self.bundle is not None else 0,
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": hits / lookups if lookups else 0.0,
+                "entries": len(self._memory),
+                "memory_bytes": self._memory_bytes,
+                "disk_entries": len(self._disk),
+                "disk_bytes": self._disk_bytes
+            }
+
+    def _remember(self, key, audio):
+        """Insert into the memory tier and evict least recently used clips (lock held)"""
+        if key in self._memory:
+            self._memory_bytes -= len(self._memory.pop(key))
+
+        # Clips larger than the whole tier only live on disk
+        if len(audio) > self.max_memory_bytes:
+            return
+
+        self._memory[key] = audio
+        self._memory_bytes += len(audio)
+        while self._memory_bytes > self.max_memory_bytes:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_bytes -= len(evicted)
+
+    def _disk_path(self, key):
+        return os.path.join(self.cache_dir, key[:2], f"{key}.mp3")
+
+    def _scan_disk(self):
+        """Index the clips already on disk (left by earlier runs or other processes), oldest first"""
+        clips = []
+        for root, _, names in os.walk(self.cache_dir):
+            for name in names:
+                if not name.endswith(".mp3"):
+                    continue
+                try:
+                    info = os.stat(os.path.join(root, name))
+                except OSError:
+                    continue
+                clips.append((info.st_mtime, name[:-4], info.st_size))
+
+        for _, key, size in sorted(clips):
+            self._disk[key] = size
+            self._disk_bytes += size
+        self._remove_from_disk(self._evict_disk())
+
+    def _evict_disk(self):
+        """Drop the oldest clips from the disk index until it fits, returning their keys (lock held)"""
+        evicted = []
+        while self._disk_bytes > self.max_disk_bytes:
+            key, size = self._disk.popitem(last=False)
+            self._disk_bytes -= size
+            evicted.append(key)
+        return evicted
+
+    def _remove_from_disk(self, keys):
+        for key in keys:
+            try:
+                os.remove(self._disk_path(key))
+            except OSError:
+                pass  # Already removed, e.g. by another process sharing the directory
+
+    def _read_disk(self, key):
+        if not self.cache_dir:
+            return None
+        try:
+            with open(self._disk_path(key), "rb") as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def _write_disk(self, key, audio):
+        # Clips larger than the whole tier only live in memory
+        if not self.cache_dir or len(audio) > self.max_disk_bytes:
+            return
+        path = self._disk_path(key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Write to a temp file first so readers never see a partial clip
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                f.write(audio)
+            os.replace(tmp_path, path)
+        except OSError:
+            return  # The memory tier still holds the clip
+
+        with self._lock:
+            self._disk_bytes -= self._disk.pop(key, 0)
+            self._disk[key] = len(audio)
+            self._disk_bytes += len(audio)
+            evicted = self._evict_disk()
+        self._remove_from_disk(evicted)
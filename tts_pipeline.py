@@ -0,0 +1,223 @@
+"""
+Sentence-pipelined text-to-speech for streaming AI replies.
+
+Text arriving from the model is split at sentence boundaries and every
+complete sentence is handed to a background worker that synthesizes it
+with gTTS, so the first sentence can be played while the rest of the
+reply is still being generated.
+"""
+
+import io
+import queue
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# Sentence ends: Latin punctuation followed by whitespace, or CJK punctuation
+SENTENCE_BOUNDARY = re.compile(r'(?<=[.!?])\s+|(?<=[。！？])')
+
+# Clause breaks used when a single sentence is still too long
+CLAUSE_BOUNDARY = re.compile(r'(?<=[,;:])\s+|(?<=[，；：、])')
+
+# gTTS sends at most ~100 characters per request, so chunks of this size map to one request each
+MAX_CHUNK_CHARS = 100
+
+# Concurrent gTTS requests for a single long text
+MAX_SYNTH_WORKERS = 4
+
+
+def synthesize_speech(text, language="en", slow=False):
+    """Synthesize text with gTTS and return the MP3 bytes (raises on failure)"""
+    from gtts import gTTS  # Imported on first synthesis, keeping it off the app's startup path
+
+    tts = gTTS(text=text, lang=language, slow=slow)
+    audio_buffer = io.BytesIO()
+    tts.write_to_fp(audio_buffer)
+    return audio_buffer.getvalue()
+
+
+def _pack(pieces, max_chars):
+    """Greedily join pieces into chunks no longer than max_chars"""
+    chunks = []
+    current = ""
+    for piece in pieces:
+        candidate = f"{current} {piece}".strip()
+        if len(candidate) <= max_chars or not current:
+            current = candidate
+        else:
+            chunks.append(current)
+            current = piece
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def split_text_chunks(text, max_chars=MAX_CHUNK_CHARS):
+    """Split text at sentence, then clause, then word boundaries into chunks of at most max_chars"""
+    pieces = []
+    for sentence in SENTENCE_BOUNDARY.split(text):
+        sentence = sentence.strip()
+        if not sentence:
+            continue
+        if len(sentence) <= max_chars:
+            pieces.append(sentence)
+            continue
+
+        for clause in CLAUSE_BOUNDARY.split(sentence):
+            clause = clause.strip()
+            if len(clause) <= max_chars:
+                pieces.append(clause)
+            else:
+                # No punctuation left to split on - fall back to words
+                pieces.extend(_pack(clause.split(), max_chars))
+
+    return _pack(pieces, max_chars)
+
+
+def synthesize_long_text(text, language="en", slow=False, synthesize=synthesize_speech,
+                         max_chars=MAX_CHUNK_CHARS, max_workers=MAX_SYNTH_WORKERS):
+    """Synthesize chunks of a long text concurrently and join the MP3 frames in order"""
+    chunks = split_text_chunks(text, max_chars)
+    if len(chunks) <= 1:
+        return synthesize(text, language=language, slow=slow)
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(chunks))) as pool:
+        # map() yields results in submission order, whatever order they finish in
+        segments = pool.map(lambda chunk: synthesize(chunk, language=language, slow=slow), chunks)
+        return b"".join(segments)
+
+
+# MPEG audio Layer III frame header tables, by the header's version bits (3: MPEG-1, 2: MPEG-2, 0: MPEG-2.5)
+MP3_SAMPLE_RATES = {3: (44100, 48000, 32000), 2: (22050, 24000, 16000), 0: (11025, 12000, 8000)}
+MP3_BITRATES_KBPS = {
+    True: (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),   # MPEG-1
+    False: (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160)      # MPEG-2 and 2.5
+}
+
+# gTTS bitrate, used to estimate the length of audio without readable frames
+FALLBACK_KBPS = 32
+
+
+def mp3_duration(data):
+    """Playback length of MP3 bytes in seconds, counted frame by frame"""
+    pos = 0
+    if data[:3] == b"ID3" and len(data) >= 10:
+        # Skip the ID3v2 tag; its size is stored as four 7-bit bytes
+        pos = 10 + ((data[6] & 0x7F) << 21 | (data[7] & 0x7F) << 14 | (data[8] & 0x7F) << 7 | data[9] & 0x7F)
+
+    seconds = 0.0
+    frames = 0
+    while pos + 4 <= len(data):
+        b1, b2 = data[pos + 1], data[pos + 2]
+        version, layer = (b1 >> 3) & 3, (b1 >> 1) & 3
+        bitrate_index, rate_index = b2 >> 4, (b2 >> 2) & 3
+        if (data[pos] != 0xFF or b1 & 0xE0 != 0xE0 or version == 1 or layer != 1
+                or bitrate_index in (0, 15) or rate_index == 3):
+            pos += 1  # Not a Layer III frame header - resynchronize
+            continue
+
+        mpeg1 = version == 3
+        sample_rate = MP3_SAMPLE_RATES[version][rate_index]
+        bitrate = MP3_BITRATES_KBPS[mpeg1][bitrate_index] * 1000
+        pos += (144 if mpeg1 else 72) * bitrate // sample_rate + ((b2 >> 1) & 1)
+        seconds += (1152 if mpeg1 else 576) / sample_rate
+        frames += 1
+
+    if not frames:
+        return len(data) * 8 / (FALLBACK_KBPS * 1000)
+    return seconds
+
+
+class SentenceSplitter:
+    """Accumulate streamed text and emit complete sentences"""
+
+    def __init__(self):
+        self.buffer = ""
+
+    def feed(self, text):
+        """Add a chunk of text and return the sentences it completed"""
+        self.buffer += text
+        parts = SENTENCE_BOUNDARY.split(self.buffer)
+
+        # The last part is still open - keep it for the next chunk
+        self.buffer = parts.pop()
+        return [part.strip() for part in parts if part.strip()]
+
+    def flush(self):
+        """Return whatever text is left once the stream has finished"""
+        remainder = self.buffer.strip()
+        self.buffer = ""
+        return [remainder] if remainder else []
+
+
+class SpeechPipeline:
+    """Producer/consumer pipeline turning sentences into ordered audio segments"""
+
+    def __init__(self, language="en", slow=False, synthesize=synthesize_speech):
+        self.language = language
+        self.slow = slow
+        self.synthesize = synthesize
+        self.splitter = SentenceSplitter()
+        self.errors = []
+        self.cancelled = False
+
+        self._sentences = queue.Queue()
+        self._segments = []
+        self._lock = threading.Lock()
+        self._worker = threading.Thread(target=self._run, daemon=True)
+        self._worker.start()
+
+    def feed(self, text):
+        """Feed streamed text, queueing every sentence it completes"""
+        if self.cancelled:
+            return
+        for sentence in self.splitter.feed(text):
+            self._sentences.put(sentence)
+
+    def close(self):
+        """Queue the trailing text and tell the worker no more text is coming"""
+        if self.cancelled:
+            return
+        for sentence in self.splitter.flush():
+            self._sentences.put(sentence)
+        self._sentences.put(None)
+
+    def cancel(self):
+        """Stop synthesizing: drop queued sentences and end the worker"""
+        self.cancelled = True
+        try:
+            while True:
+                self._sentences.get_nowait()
+        except queue.Empty:
+            pass
+        self._sentences.put(None)
+
+    def ready_segments(self):
+        """Return the audio segments synthesized so far, in sentence order"""
+        with self._lock:
+            return list(self._segments)
+
+    def finished(self):
+        """True once every queued sentence has been synthesized (or the pipeline cancelled)"""
+        return not self._worker.is_alive()
+
+    def join(self, timeout=None):
+        """Wait for the worker to finish and return all audio segments"""
+        self._worker.join(timeout)
+        return self.ready_segments()
+
+    def _run(self):
+        """Worker loop: synthesize queued sentences one at a time, in order"""
+        while True:
+            sentence = self._sentences.get()
+            if sentence is None or self.cancelled:
+                break
+
+            try:
+                audio = self.synthesize(sentence, language=self.language, slow=self.slow)
+            except Exception as e:
+                self.errors.append(str(e))
+                continue
+
+            with self._lock:
+                self._segments.append(audio)
@@ -0,0 +1,125 @@
+"""
+Background text-to-speech worker shared by every session.
+
+The chat render loop only asks for a clip's status; synthesis happens on
+a small pool of daemon threads fed from a bounded queue. Finished clips
+land in the shared TTSCache, and jobs can be cancelled per session when
+a chat is cleared.
+"""
+
+import queue
+import threading
+from collections import OrderedDict
+
+from tts_cache import tts_cache_key
+from tts_pipeline import synthesize_long_text
+
+# Clip states reported to the render loop
+READY = "ready"
+PENDING = "pending"
+BUSY = "busy"      # Queue full - ask again on a later rerun
+FAILED = "failed"
+
+DEFAULT_THREADS = 2
+DEFAULT_QUEUE_SIZE = 32
+DEFAULT_MAX_FAILED = 256  # Failures kept for sessions that have not asked again yet
+
+
+class _Job:
+    """One clip to synthesize, possibly wanted by several sessions"""
+
+    def __init__(self, key, text, language, slow, session_id):
+        self.key = key
+        self.text = text
+        self.language = language
+        self.slow = slow
+        self.sessions = {session_id}
+
+
+class TTSWorker:
+    """Bounded queue of TTS jobs processed by background threads"""
+
+    def __init__(self, cache, synthesize=synthesize_long_text,
+                 num_threads=DEFAULT_THREADS, max_queue=DEFAULT_QUEUE_SIZE, max_failed=DEFAULT_MAX_FAILED):
+        self.cache = cache
+        self.synthesize = synthesize
+        self.max_failed = max_failed
+
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._pending = {}
+        self._failed = OrderedDict()
+        self._lock = threading.Lock()
+
+        self._threads = []
+        for i in range(num_threads):
+            thread = threading.Thread(target=self._run, name=f"tts-worker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def request(self, session_id, text, language="en", slow=False):
+        """Return (state, audio) for a clip, queueing it if it is not ready yet"""
+        key = tts_cache_key(text, language, slow)
+
+        with self._lock:
+            if key in self._pending:
+                self._pending[key].sessions.add(session_id)
+                return PENDING, None
+            if key in self._failed:
+                # Report the failure once; the next request tries again
+                return FAILED, self._failed.pop(key)
+
+        audio = self.cache.get(text, language, slow)
+        if audio is not None:
+            return READY, audio
+
+        with self._lock:
+            if key in self._pending:
+                self._pending[key].sessions.add(session_id)
+                return PENDING, None
+
+            job = _Job(key, text, language, slow, session_id)
+            try:
+                self._queue.put_nowait(job)
+            except queue.Full:
+                return BUSY, None
+            self._pending[key] = job
+            return PENDING, None
+
+    def cancel_session(self, session_id):
+        """Drop a session's interest in its queued clips (e.g. when its chat is cleared)"""
+        with self._lock:
+            for job in self._pending.values():
+                job.sessions.discard(session_id)
+
+    def is_settled(self, key):
+        """True once a clip is no longer waiting in the queue"""
+        with self._lock:
+            return key not in self._pending
+
+    def has_capacity(self):
+        """True if a new job would be accepted right now"""
+        return not self._queue.full()
+
+    def queue_depth(self):
+        return self._queue.qsize()
+
+    def _run(self):
+        """Worker loop: synthesize queued clips into the shared cache"""
+        while True:
+            job = self._queue.get()
+            try:
+                with self._lock:
+                    cancelled = not job.sessions
+                if not cancelled:
+                    audio = self.synthesize(job.text, language=job.language, slow=job.slow)
+                    self.cache.put(job.text, job.language, job.slow, audio)
+            except Exception as e:
+                with self._lock:
+                    self._failed[job.key] = str(e)
+                    # Nobody may ask for this clip again - forget the oldest failures first
+                    while len(self._failed) > self.max_failed:
+                        self._failed.popitem(last=False)
+            finally:
+                with self._lock:
+                    self._pending.pop(job.key, None)
+                self._queue.task_done()
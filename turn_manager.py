@@ -0,0 +1,82 @@
+"""
+Per-session turn tracking for barge-in.
+
+Every new recording or sent message starts a new turn, and starting a
+turn cancels the previous one: its cancel callbacks run (stopping speech
+synthesis, cancelling queued futures) and any loop that checks the turn
+stops at its next check, so a stale reply stops costing API calls.
+"""
+
+import itertools
+import threading
+
+
+class CancelledTurn(Exception):
+    """Raised by work that belongs to a turn that has been superseded"""
+
+
+class Turn:
+    """One user request: STT -> Gemini -> TTS, cancellable as a unit"""
+
+    def __init__(self, turn_id):
+        self.id = turn_id
+        self._cancelled = threading.Event()
+        self._callbacks = []
+        self._lock = threading.Lock()
+
+    @property
+    def cancelled(self):
+        return self._cancelled.is_set()
+
+    def check(self):
+        """Raise CancelledTurn if this turn has been superseded"""
+        if self.cancelled:
+            raise CancelledTurn(f"Turn {self.id} was superseded")
+
+    def on_cancel(self, callback):
+        """Run callback when the turn is cancelled (right away if it already was)"""
+        with self._lock:
+            if not self.cancelled:
+                self._callbacks.append(callback)
+                return
+        callback()
+
+    def track(self, future):
+        """Cancel a concurrent.futures.Future together with this turn"""
+        self.on_cancel(future.cancel)
+        return future
+
+    def cancel(self):
+        """Cancel the turn and run its cleanup callbacks once"""
+        with self._lock:
+            if self.cancelled:
+                return
+            self._cancelled.set()
+            callbacks, self._callbacks = self._callbacks, []
+
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception:
+                pass  # Cleanup must never break the new turn
+
+
+class TurnManager:
+    """Hands out increasing turn ids for one session"""
+
+    def __init__(self):
+        self._ids = itertools.count(1)
+        self.current = Turn(0)
+
+    def start_turn(self):
+        """Start a new turn, cancelling the one in flight"""
+        previous = self.current
+        self.current = Turn(next(self._ids))
+        previous.cancel()
+        return self.current
+
+    def active(self):
+        """The current turn, or a fresh one if it has already been cancelled"""
+        if self.current.cancelled:
+            return self.start_turn()
+        return self.current
@@ -0,0 +1,307 @@
+"""
+Voice command tables and a compiled matcher.
+
+Each language's phrases (keyed by the LANGUAGES "code" values) are
+compiled once into a single regular expression with word-boundary and
+longest-match semantics, so matching costs one scan of the transcript
+however many commands there are. English commands work in every
+language. A command only fires when it is the whole utterance, give or
+take filler words such as "please" or "now": "speed up" is a command,
+"how can I speed up my computer?" and "can you help me with math" are
+questions.
+"""
+
+import functools
+import re
+
+# English command table - also active for every other language
+VOICE_COMMANDS = {
+    # Chat control commands
+    "clear chat": "clear_chat",
+    "clear conversation": "clear_chat",
+    "delete chat": "clear_chat",
+    "erase chat": "clear_chat",
+
+    # Personality change commands
+    "change personality to general": "General Assistant",
+    "change personality to study": "Study Buddy",
+    "change personality to fitness": "Fitness Coach",
+    "change personality to gaming": "Gaming Helper",
+    "switch to general": "General Assistant",
+    "switch to study": "Study Buddy",
+    "switch to fitness": "Fitness Coach",
+    "switch to gaming": "Gaming Helper",
+    "become general assistant": "General Assistant",
+    "become study buddy": "Study Buddy",
+    "become fitness coach": "Fitness Coach",
+    "become gaming helper": "Gaming Helper",
+
+    # TTS speed commands
+    "speak slower": "slow_down",
+    "slow down": "slow_down",
+    "talk slower": "slow_down",
+    "speak faster": "speed_up",
+    "speed up": "speed_up",
+    "talk faster": "speed_up",
+    "normal speed": "normal_speed",
+
+    # Help command
+    "help": "show_help",
+    "show commands": "show_help",
+    "what can you do": "show_help",
+    "list commands": "show_help"
+}
+
+# Per-language phrases, keyed by LANGUAGES[...]["code"]
+LANGUAGE_COMMANDS = {
+    "en-US": VOICE_COMMANDS,
+    "es-ES": {
+        "borrar chat": "clear_chat",
+        "borrar conversación": "clear_chat",
+        "cambiar a general": "General Assistant",
+        "cambiar a estudio": "Study Buddy",
+        "cambiar a fitness": "Fitness Coach",
+        "cambiar a juegos": "Gaming Helper",
+        "habla más despacio": "slow_down",
+        "habla más rápido": "speed_up",
+        "velocidad normal": "normal_speed",
+        "ayuda": "show_help",
+        "mostrar comandos": "show_help"
+    },
+    "fr-FR": {
+        "effacer la conversation": "clear_chat",
+        "effacer le chat": "clear_chat",
+        "passer en mode général": "General Assistant",
+        "passer en mode étude": "Study Buddy",
+        "passer en mode fitness": "Fitness Coach",
+        "passer en mode jeu": "Gaming Helper",
+        "parle plus lentement": "slow_down",
+        "parle plus vite": "speed_up",
+        "vitesse normale": "normal_speed",
+        "aide": "show_help",
+        "afficher les commandes": "show_help"
+    },
+    "de-DE": {
+        "chat löschen": "clear_chat",
+        "unterhaltung löschen": "clear_chat",
+        "wechsle zu allgemein": "General Assistant",
+        "wechsle zu lernen": "Study Buddy",
+        "wechsle zu fitness": "Fitness Coach",
+        "wechsle zu gaming": "Gaming Helper",
+        "sprich langsamer": "slow_down",
+        "sprich schneller": "speed_up",
+        "normale geschwindigkeit": "normal_speed",
+        "hilfe": "show_help",
+        "befehle anzeigen": "show_help"
+    },
+    "zh-CN": {
+        "清除聊天": "clear_chat",
+        "清空对话": "clear_chat",
+        "切换到通用助手": "General Assistant",
+        "切换到学习伙伴": "Study Buddy",
+        "切换到健身教练": "Fitness Coach",
+        "切换到游戏助手": "Gaming Helper",
+        "说慢一点": "slow_down",
+        "说快一点": "speed_up",
+        "正常语速": "normal_speed",
+        "帮助": "show_help",
+        "显示命令": "show_help"
+    },
+    "ja-JP": {
+        "チャットを消去": "clear_chat",
+        "会話を消去": "clear_chat",
+        "一般アシスタントに切り替え": "General Assistant",
+        "勉強モードに切り替え": "Study Buddy",
+        "フィットネスモードに切り替え": "Fitness Coach",
+        "ゲームモードに切り替え": "Gaming Helper",
+        "ゆっくり話して": "slow_down",
+        "速く話して": "speed_up",
+        "普通の速さ": "normal_speed",
+        "ヘルプ": "show_help",
+        "コマンドを表示": "show_help"
+    },
+    "ko-KR": {
+        "채팅 지우기": "clear_chat",
+        "대화 지우기": "clear_chat",
+        "일반 모드로 전환": "General Assistant",
+        "공부 모드로 전환": "Study Buddy",
+        "피트니스 모드로 전환": "Fitness Coach",
+        "게임 모드로 전환": "Gaming Helper",
+        "천천히 말해": "slow_down",
+        "빨리 말해": "speed_up",
+        "보통 속도": "normal_speed",
+        "도움말": "show_help",
+        "명령어 보기": "show_help"
+    },
+    "it-IT": {
+        "cancella chat": "clear_chat",
+        "cancella conversazione": "clear_chat",
+        "passa a generale": "General Assistant",
+        "passa a studio": "Study Buddy",
+        "passa a fitness": "Fitness Coach",
+        "passa a giochi": "Gaming Helper",
+        "parla più lentamente": "slow_down",
+        "parla più veloce": "speed_up",
+        "velocità normale": "normal_speed",
+        "aiuto": "show_help",
+        "mostra comandi": "show_help"
+    },
+    "pt-PT": {
+        "limpar chat": "clear_chat",
+        "limpar conversa": "clear_chat",
+        "mudar para geral": "General Assistant",
+        "mudar para estudo": "Study Buddy",
+        "mudar para fitness": "Fitness Coach",
+        "mudar para jogos": "Gaming Helper",
+        "fala mais devagar": "slow_down",
+        "fala mais depressa": "speed_up",
+        "velocidade normal": "normal_speed",
+        "ajuda": "show_help",
+        "mostrar comandos": "show_help"
+    },
+    "ru-RU": {
+        "очистить чат": "clear_chat",
+        "очистить разговор": "clear_chat",
+        "переключись на общий": "General Assistant",
+        "переключись на учебу": "Study Buddy",
+        "переключись на фитнес": "Fitness Coach",
+        "переключись на игры": "Gaming Helper",
+        "говори медленнее": "slow_down",
+        "говори быстрее": "speed_up",
+        "нормальная скорость": "normal_speed",
+        "помощь": "show_help",
+        "показать команды": "show_help"
+    },
+    "ar-SA": {
+        "امسح المحادثة": "clear_chat",
+        "احذف المحادثة": "clear_chat",
+        "التبديل إلى المساعد العام": "General Assistant",
+        "التبديل إلى رفيق الدراسة": "Study Buddy",
+        "التبديل إلى مدرب اللياقة": "Fitness Coach",
+        "التبديل إلى مساعد الألعاب": "Gaming Helper",
+        "تحدث ببطء": "slow_down",
+        "تحدث بسرعة": "speed_up",
+        "السرعة العادية": "normal_speed",
+        "مساعدة": "show_help",
+        "اعرض الأوامر": "show_help"
+    },
+    "hi-IN": {
+        "चैट साफ करो": "clear_chat",
+        "बातचीत मिटाओ": "clear_chat",
+        "सामान्य सहायक पर जाओ": "General Assistant",
+        "पढ़ाई मोड पर जाओ": "Study Buddy",
+        "फिटनेस मोड पर जाओ": "Fitness Coach",
+        "गेमिंग मोड पर जाओ": "Gaming Helper",
+        "धीरे बोलो": "slow_down",
+        "तेज़ बोलो": "speed_up",
+        "सामान्य गति": "normal_speed",
+        "मदद": "show_help",
+        "कमांड दिखाओ": "show_help"
+    }
+}
+
+# Polite or filler words allowed around a command ("please clear chat", "slow down now").
+# English fillers - also active for every other language
+FILLER_WORDS = ["please", "now", "ok", "okay", "hey", "can you", "could you", "would you", "thanks", "thank you"]
+
+LANGUAGE_FILLERS = {
+    "en-US": FILLER_WORDS,
+    "es-ES": ["por favor", "ahora", "vale", "gracias"],
+    "fr-FR": ["s'il te plaît", "s'il vous plaît", "maintenant", "merci"],
+    "de-DE": ["bitte", "jetzt", "danke"],
+    "zh-CN": ["请", "现在", "吧", "谢谢"],
+    "ja-JP": ["ください", "今", "お願いします"],
+    "ko-KR": ["제발", "지금", "주세요"],
+    "it-IT": ["per favore", "adesso", "ora", "grazie"],
+    "pt-PT": ["por favor", "agora", "obrigado"],
+    "ru-RU": ["пожалуйста", "сейчас", "спасибо"],
+    "ar-SA": ["من فضلك", "الآن", "شكرا"],
+    "hi-IN": ["कृपया", "अब", "धन्यवाद"]
+}
+
+# Scripts written without spaces between words - no word boundaries there
+UNSPACED_CHAR = re.compile(r'[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff]')
+
+
+def _boundary(char, assertion):
+    """Word-boundary assertion next to char, unless its script has no spaces"""
+    return "" if UNSPACED_CHAR.match(char) else assertion
+
+
+def _build_trie(phrases):
+    """Character trie of phrases; the "" key marks the end of a phrase"""
+    trie = {}
+    for phrase in phrases:
+        node = trie
+        for char in phrase:
+            node = node.setdefault(char, {})
+        node[""] = True
+    return trie
+
+
+def _trie_pattern(node, last_char):
+    """Regex for a trie node - phrases sharing a prefix share one branch"""
+    branches = [re.escape(char) + _trie_pattern(child, char)
+                for char, child in sorted(node.items()) if char]
+    if "" in node:
+        # Ending here is tried after every longer continuation, giving longest match
+        branches.append(_boundary(last_char, r"(?!\w)"))
+    if len(branches) == 1:
+        return branches[0]
+    return "(?:" + "|".join(branches) + ")"
+
+
+def _alternation(phrases):
+    """Trie-shaped regex matching any of the phrases as whole words"""
+    trie = _build_trie(phrases)
+    spaced = {char: child for char, child in trie.items() if not UNSPACED_CHAR.match(char)}
+    unspaced = {char: child for char, child in trie.items() if UNSPACED_CHAR.match(char)}
+
+    # One shared start-of-word check for every phrase in a spaced script
+    alternatives = []
+    if spaced:
+        alternatives.append(r"(?<!\w)" + _trie_pattern(spaced, ""))
+    if unspaced:
+        alternatives.append(_trie_pattern(unspaced, ""))
+    return "(?:" + "|".join(alternatives) + ")"
+
+
+def _normalize(text):
+    return " ".join(text.casefold().split())
+
+
+class CommandMatcher:
+    """Matches a transcript against a command table with one compiled regex"""
+
+    def __init__(self, commands, fillers=()):
+        self.actions = {_normalize(phrase): action for phrase, action in commands.items()}
+        self._regex = None
+        if self.actions:
+            command = "(" + _alternation(self.actions) + ")"
+            if fillers:
+                # Fillers before and after the command; the word-boundary checks keep them separate words
+                filler = _alternation([_normalize(word) for word in fillers])
+                command = rf"(?:{filler}[\W_]*)*{command}(?:[\W_]*{filler})*"
+            # The command must be the whole utterance (ignoring punctuation and fillers)
+            self._regex = re.compile(rf"^[\W_]*{command}[\W_]*$")
+
+    def match(self, text):
+        """Return the action for the command in text, or None"""
+        if self._regex is None:
+            return None
+        found = self._regex.match(_normalize(text))
+        return self.actions[found.group(1)] if found else None
+
+
+@functools.lru_cache(maxsize=None)
+def get_command_matcher(language_code):
+    """Compiled matcher for a language's commands plus the English ones"""
+    commands = dict(VOICE_COMMANDS)
+    commands.update(LANGUAGE_COMMANDS.get(language_code, {}))
+    fillers = dict.fromkeys(FILLER_WORDS + LANGUAGE_FILLERS.get(language_code, []))
+    return CommandMatcher(commands, list(fillers))
+
+
+def match_voice_command(text, language_code="en-US"):
+    """Return the command action spoken in text, or None if it is not a command"""
+    return get_command_matcher(language_code).match(text)
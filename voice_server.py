@@ -0,0 +1,321 @@
+#!/usr/bin/env python3
+"""
+Headless HTTP/WebSocket voice API, served alongside the Streamlit UI.
+
+Runs VoiceSession (voice_service.py) on an async server (Starlette on
+uvicorn, both already installed with Streamlit), so voice clients no
+longer need a Streamlit script run per interaction.
+
+Endpoints:
+    GET  /healthz        liveness and open WebSocket sessions
+    POST /v1/turn        one stateless turn. Body: a WAV recording
+                         (audio/wav) or {"text": ...} (application/json).
+                         Query: personality, language, slow, speak.
+                         Response: NDJSON events, MP3 audio base64-encoded.
+    WS   /v1/stream      a conversation. Send binary frames (one WAV
+                         utterance each) or JSON text frames:
+                         {"type": "config", "personality", "language", "slow", "speak"}
+                         {"type": "text", "text": ...}
+                         {"type": "cancel"}
+                         Events come back as JSON text frames; each
+                         {"type": "audio", "index", "bytes"} frame is followed
+                         by one binary frame holding that MP3 segment.
+                         New input cancels the reply still in progress.
+    WS   /v1/listen      live microphone. Send binary frames of 16-bit mono
+                         PCM as they are captured, and JSON text frames:
+                         {"type": "config", "sample_rate", "language", "answer", ...}
+                         {"type": "end"}   finalize, then get {"type": "end"}
+                         speech_start / partial / final events come back
+                         while the user speaks (streaming_stt.py); with
+                         "answer" set each final transcript is also run as
+                         a command or answered, as on /v1/stream.
+
+Usage:
+    python voice_server.py --port 8502
+"""
+
+import argparse
+import asyncio
+import base64
+import json
+import os
+
+import uvicorn
+from dotenv import load_dotenv
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse, StreamingResponse
+from starlette.routing import Route, WebSocketRoute
+from starlette.websockets import WebSocketDisconnect
+
+from assistant_core import LANGUAGES, get_stt_backend
+from streaming_stt import DEFAULT_SAMPLE_RATE, StreamingRecognizer
+from voice_service import DEFAULT_WORKERS, VoiceSession, create_executor
+
+DEFAULT_PORT = 8502
+
+
+def _flag(value):
+    return None if value is None else value.lower() in ("1", "true", "yes")
+
+
+def _encode(event):
+    """An event as JSON, with audio base64-encoded"""
+    if "audio" in event:
+        event = dict(event, audio=base64.b64encode(event["audio"]).decode("ascii"))
+    return json.dumps(event, ensure_ascii=False)
+
+
+def _parse_request(text):
+    """Decode a JSON text frame; returns (request object, None) or (None, error message)"""
+    try:
+        request = json.loads(text or "{}")
+    except ValueError:
+        return None, "Invalid JSON"
+    if not isinstance(request, dict):
+        return None, "Expected a JSON object"
+    return request, None
+
+
+def _request_text(request):
+    """The stripped "text" of a request, or "" when it is missing or not a string"""
+    text = request.get("text")
+    return text.strip() if isinstance(text, str) else ""
+
+
+def _sample_rate(value):
+    """A positive integer sample rate; raises ValueError otherwise"""
+    try:
+        sample_rate = int(value)
+    except (TypeError, ValueError):
+        sample_rate = 0
+    if sample_rate <= 0:
+        raise ValueError(f"Invalid sample_rate: {value!r}")
+    return sample_rate
+
+
+async def _send_events(websocket, events, send_lock):
+    """Forward session events; each audio event becomes a JSON header and a binary frame"""
+    async for event in events:
+        async with send_lock:
+            if event["type"] == "audio":
+                audio = event["audio"]
+                await websocket.send_text(json.dumps({"type": "audio", "index": event["index"], "bytes": len(audio)}))
+                await websocket.send_bytes(audio)
+            else:
+                await websocket.send_text(_encode(event))
+
+
+def create_app(session_factory=None, workers=DEFAULT_WORKERS):
+    """Build the ASGI app; session_factory() creates each VoiceSession"""
+    executor = create_executor(workers)
+    session_factory = session_factory or (lambda: VoiceSession(executor=executor))
+    sessions = set()
+
+    def new_session(settings):
+        session = session_factory()
+        session.configure(**settings)
+        return session
+
+    async def healthz(request):
+        return JSONResponse({"status": "ok", "sessions": len(sessions)})
+
+    async def turn(request):
+        settings = {
+            "personality": request.query_params.get("personality"),
+            "language": request.query_params.get("language"),
+            "slow": _flag(request.query_params.get("slow")),
+            "speak": _flag(request.query_params.get("speak"))
+        }
+        try:
+            session = new_session(settings)
+        except ValueError as e:
+            return JSONResponse({"error": str(e)}, status_code=400)
+
+        if request.headers.get("content-type", "").startswith("application/json"):
+            payload, error = _parse_request(await request.body())
+            if error:
+                return JSONResponse({"error": error}, status_code=400)
+            text = _request_text(payload)
+            if not text:
+                return JSONResponse({"error": "Missing text"}, status_code=400)
+            events = session.handle_text(text)
+        else:
+            body = await request.body()
+            if not body:
+                return JSONResponse({"error": "Missing audio"}, status_code=400)
+            events = session.handle_audio(body)
+
+        async def ndjson():
+            try:
+                async for event in events:
+                    yield _encode(event) + "\n"
+            finally:
+                # The client went away mid-reply - stop spending API calls on it
+                session.cancel()
+
+        return StreamingResponse(ndjson(), media_type="application/x-ndjson")
+
+    async def stream(websocket):
+        await websocket.accept()
+        session = new_session({})
+        sessions.add(session)
+        tasks = set()
+        # A cancelled reply may still be sending while the next one starts - keep each audio header with its frame
+        send_lock = asyncio.Lock()
+
+        def run(events):
+            task = asyncio.ensure_future(_send_events(websocket, events, send_lock))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+
+        try:
+            while True:
+                message = await websocket.receive()
+                if message["type"] == "websocket.disconnect":
+                    break
+                if message.get("bytes") is not None:
+                    run(session.handle_audio(message["bytes"]))
+                    continue
+
+                request, error = _parse_request(message.get("text"))
+                if error:
+                    await websocket.send_text(json.dumps({"type": "error", "message": error}))
+                    continue
+                kind = request.get("type")
+                if kind == "config":
+                    try:
+                        session.configure(
+                            request.get("personality"), request.get("language"),
+                            request.get("slow"), request.get("speak")
+                        )
+                        await websocket.send_text(json.dumps({"type": "config", **session.settings()}))
+                    except (ValueError, TypeError) as e:
+                        await websocket.send_text(json.dumps({"type": "error", "message": str(e)}))
+                elif kind == "text":
+                    text = _request_text(request)
+                    if text:
+                        run(session.handle_text(text))
+                    else:
+                        await websocket.send_text(json.dumps({"type": "error", "message": "Missing text"}))
+                elif kind == "cancel":
+                    session.cancel()
+                else:
+                    await websocket.send_text(json.dumps({"type": "error", "message": f"Unknown message: {kind}"}))
+        except WebSocketDisconnect:
+            pass
+        finally:
+            session.cancel()
+            sessions.discard(session)
+            for task in list(tasks):
+                task.cancel()
+
+    async def listen(websocket):
+        await websocket.accept()
+        loop = asyncio.get_running_loop()
+        session = new_session({})
+        sessions.add(session)
+        options = {"sample_rate": DEFAULT_SAMPLE_RATE, "answer": False}
+        recognizer = None
+        events = asyncio.Queue()
+        tasks = set()
+        send_lock = asyncio.Lock()
+
+        def emit(event):
+            # Called from the recognition threads
+            loop.call_soon_threadsafe(events.put_nowait, event)
+
+        def new_recognizer():
+            return StreamingRecognizer(
+                emit,
+                language_code=LANGUAGES[session.language]["code"],
+                sample_rate=options["sample_rate"],
+                stt_backend=session.stt_backend or get_stt_backend(),
+                executor=executor
+            )
+
+        async def send():
+            while True:
+                event = await events.get()
+                if event["type"] == "end":
+                    # Finish the replies to the last utterance first
+                    await asyncio.gather(*tasks, return_exceptions=True)
+                async with send_lock:
+                    await websocket.send_text(json.dumps(event, ensure_ascii=False))
+                if not options["answer"]:
+                    continue
+                if event["type"] == "speech_start":
+                    session.cancel()  # Barge-in: the user started talking over the reply
+                elif event["type"] == "final":
+                    task = asyncio.ensure_future(_send_events(websocket, session.handle_transcript(event["text"]), send_lock))
+                    tasks.add(task)
+                    task.add_done_callback(tasks.discard)
+
+        sender = asyncio.ensure_future(send())
+        try:
+            while True:
+                message = await websocket.receive()
+                if message["type"] == "websocket.disconnect":
+                    break
+                if message.get("bytes") is not None:
+                    recognizer = recognizer or new_recognizer()
+                    recognizer.feed(message["bytes"])
+                    continue
+
+                request, error = _parse_request(message.get("text"))
+                if error:
+                    emit({"type": "error", "message": error})
+                    continue
+                kind = request.get("type")
+                if kind == "config":
+                    try:
+                        sample_rate = _sample_rate(request.get("sample_rate") or options["sample_rate"])
+                        session.configure(
+                            request.get("personality"), request.get("language"),
+                            request.get("slow"), request.get("speak")
+                        )
+                    except (ValueError, TypeError) as e:
+                        emit({"type": "error", "message": str(e)})
+                        continue
+                    options["sample_rate"] = sample_rate
+                    options["answer"] = bool(request.get("answer", options["answer"]))
+                    if recognizer is not None:
+                        await loop.run_in_executor(None, recognizer.flush)  # Waits on the recognitions in executor
+                    recognizer = None  # The next frame starts a recognizer with the new settings
+                    emit({"type": "config", **session.settings(), **options})
+                elif kind == "end":
+                    if recognizer is not None:
+                        await loop.run_in_executor(None, recognizer.flush)
+                        recognizer = None
+                    emit({"type": "end"})
+                else:
+                    emit({"type": "error", "message": f"Unknown message: {kind}"})
+        except WebSocketDisconnect:
+            pass
+        finally:
+            session.cancel()
+            sessions.discard(session)
+            sender.cancel()
+            for task in list(tasks):
+                task.cancel()
+
+    return Starlette(routes=[
+        Route("/healthz", healthz),
+        Route("/v1/turn", turn, methods=["POST"]),
+        WebSocketRoute("/v1/stream", stream),
+        WebSocketRoute("/v1/listen", listen)
+    ])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default=os.getenv("VOICE_API_HOST", "127.0.0.1"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("VOICE_API_PORT", DEFAULT_PORT)))
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="Threads for STT, Gemini and TTS")
+    args = parser.parse_args(argv)
+
+    load_dotenv()
+    uvicorn.run(create_app(workers=args.workers), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,246 @@
+"""
+Async voice sessions on top of assistant_core, independent of any UI.
+
+A VoiceSession holds one client's conversation (personality, language,
+speech speed, history) and turns each utterance - a WAV recording, a
+transcript from streaming recognition or typed text - into a stream of
+events:
+
+    {"type": "transcript", "text": ...}          what was recognized
+    {"type": "no_speech"}                        nothing to answer
+    {"type": "command", "action": ..., ...}      a voice command ran
+    {"type": "text", "delta": ...}               reply text as it streams
+    {"type": "audio", "index": n, "audio": b""}  MP3 of the next sentence
+    {"type": "done", "text": ..., "timing": {}}  reply finished
+    {"type": "cancelled"}                        superseded by newer input
+    {"type": "error", "message": ...}
+
+Command confirmations, the help reply and the no_speech message are
+voiced from the pre-rendered speech bundle (speech_bundle.py) when it
+holds them, as audio events right after the command or no_speech event;
+they never wait for a live TTS call.
+
+Blocking work (recognition, Gemini, gTTS) runs on a thread pool, so one
+event loop can serve many sessions. Starting a new utterance cancels the
+one still in progress (barge-in), like the app does.
+"""
+
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from assistant_core import (ERROR_MESSAGES, LANGUAGES, PERSONALITIES, dispatch_voice_command, finish_speech,
+                            get_ai_model, get_stt_backend, get_summarizer, get_tts_cache, stream_reply,
+                            transcribe_audio)
+from conversation_context import DEFAULT_TOKEN_BUDGET, ConversationContext
+from tts_pipeline import SpeechPipeline
+from turn_manager import CancelledTurn, TurnManager
+
+DEFAULT_WORKERS = 16
+
+
+class VoiceSession:
+    """One client's conversation, answered as a stream of events"""
+
+    def __init__(self, personality="General Assistant", language="English", slow=False, speak=True,
+                 executor=None, model_for=None, synthesize=None, stt_backend=None, summarize=None,
+                 token_budget=DEFAULT_TOKEN_BUDGET, tts_cache=None):
+        self.personality = personality
+        self.language = language
+        self.slow = slow
+        self.speak = speak
+        self.messages = []
+        self.executor = executor
+        self.model_for = model_for or get_ai_model
+        self.synthesize = synthesize
+        self.stt_backend = stt_backend
+        self.tts_cache = tts_cache
+        self.context = ConversationContext(token_budget=token_budget, summarize=summarize or get_summarizer())
+        self.turns = TurnManager()
+        # A superseded turn may still be running on another thread while the next one starts:
+        # turns touch the history one at a time, the newer one once the older has stopped
+        self._history_lock = threading.RLock()
+
+    def configure(self, personality=None, language=None, slow=None, speak=None):
+        """Change the session settings; raises ValueError for unknown names"""
+        if personality is not None:
+            if personality not in PERSONALITIES:
+                raise ValueError(f"Unknown personality: {personality}")
+            self.personality = personality
+        if language is not None:
+            if language not in LANGUAGES:
+                raise ValueError(f"Unknown language: {language}")
+            self.language = language
+        if slow is not None:
+            self.slow = bool(slow)
+        if speak is not None:
+            self.speak = bool(speak)
+
+    def settings(self):
+        return {"personality": self.personality, "language": self.language, "slow": self.slow, "speak": self.speak}
+
+    def cancel(self):
+        """Cancel the utterance in progress, if any"""
+        if self.turns.current is not None:
+            self.turns.current.cancel()
+
+    async def handle_audio(self, wav_bytes):
+        """Recognize a WAV utterance, then run it as a command or answer it"""
+        turn = self.turns.start_turn()
+        events = _EventStream()
+        events.start(self.executor, self._run_audio, wav_bytes, turn)
+        async for event in events:
+            yield event
+
+    async def handle_text(self, text):
+        """Answer typed text (voice commands are only matched in speech)"""
+        turn = self.turns.start_turn()
+        events = _EventStream()
+        events.start(self.executor, self._run_reply, text, turn)
+        async for event in events:
+            yield event
+
+    async def handle_transcript(self, text):
+        """Run speech already recognized elsewhere (e.g. by streaming recognition) like a recording"""
+        turn = self.turns.start_turn()
+        events = _EventStream()
+        events.start(self.executor, self._run_transcript, text, turn)
+        async for event in events:
+            yield event
+
+    def _run_audio(self, wav_bytes, turn, emit):
+        language_code = LANGUAGES[self.language]["code"]
+        start = time.perf_counter()
+        text, stats = transcribe_audio(
+            wav_bytes, language_code, self.stt_backend or get_stt_backend(), cancelled=lambda: turn.cancelled
+        )
+        turn.check()
+        if not text:
+            emit({"type": "no_speech", "audio_seconds": stats["audio_seconds"]})
+            self._emit_static([ERROR_MESSAGES["no_speech"]], emit)
+            return
+        emit({"type": "transcript", "text": text, "seconds": time.perf_counter() - start})
+        self._run_transcript(text, turn, emit)
+
+    def _run_transcript(self, text, turn, emit):
+        """Run recognized speech as a voice command, or answer it"""
+        language_code = LANGUAGES[self.language]["code"]
+        command = dispatch_voice_command(text, language_code, self.personality, self.slow)
+        if command is None:
+            self._run_reply(text, turn, emit)
+            return
+
+        with self._history_lock:
+            turn.check()
+            if command["clear_chat"]:
+                self.messages = []
+                self.context.reset()
+            self.personality = command["personality"]
+            self.slow = command["slow"]
+            if command["reply"]:
+                self.messages.append({"role": "assistant", "content": command["reply"]})
+        emit({"type": "command", **command})
+        self._emit_static([command["confirmation"], command["reply"]], emit)
+
+    def _emit_static(self, texts, emit):
+        """Emit the bundled clips of fixed messages; messages missing from the bundle stay silent"""
+        if not self.speak:
+            return
+        cache = self.tts_cache or get_tts_cache()
+        tts_code = LANGUAGES[self.language]["tts_code"]
+        index = 0
+        for text in texts:
+            audio = cache.bundled(text, tts_code, self.slow) if text else None
+            if audio is not None:
+                emit({"type": "audio", "index": index, "audio": audio})
+                index += 1
+
+    def _run_reply(self, text, turn, emit):
+        """Stream a Gemini reply to text, voicing it sentence by sentence"""
+        with self._history_lock:
+            turn.check()
+            self.messages.append({"role": "user", "content": text})
+            prompt, prompt_tokens = self.context.build(self.messages)
+            model = self.model_for(self.personality, self.language)
+
+            speech = None
+            if self.speak:
+                speech = SpeechPipeline(
+                    language=LANGUAGES[self.language]["tts_code"],
+                    slow=self.slow,
+                    synthesize=self.synthesize or (self.tts_cache or get_tts_cache()).get_or_synthesize
+                )
+                turn.on_cancel(speech.cancel)
+
+            sent = 0
+
+            def emit_audio():
+                """Emit the sentences synthesized since the last call"""
+                nonlocal sent
+                segments = speech.ready_segments()
+                for index in range(sent, len(segments)):
+                    emit({"type": "audio", "index": index, "audio": segments[index]})
+                sent = len(segments)
+
+            try:
+                reply, timing = stream_reply(
+                    model, prompt, lambda delta, reply: emit({"type": "text", "delta": delta}),
+                    speech, emit_audio, check=turn.check
+                )
+                if speech is not None:
+                    finish_speech(speech, emit_audio, check=turn.check)
+            except Exception:
+                if speech is not None:
+                    speech.cancel()
+                raise
+            turn.check()
+
+            self.messages.append({"role": "assistant", "content": reply})
+            emit({
+                "type": "done",
+                "text": reply,
+                "prompt_tokens": prompt_tokens,
+                "audio_segments": sent,
+                "timing": timing
+            })
+
+
+class _EventStream:
+    """Runs a blocking producer on a thread and yields its events on the event loop"""
+
+    _DONE = object()
+
+    def __init__(self):
+        self.queue = asyncio.Queue()
+        self.loop = asyncio.get_running_loop()
+
+    def emit(self, event):
+        self.loop.call_soon_threadsafe(self.queue.put_nowait, event)
+
+    def start(self, executor, produce, payload, turn):
+        def run():
+            try:
+                produce(payload, turn, self.emit)
+            except CancelledTurn:
+                self.emit({"type": "cancelled"})
+            except Exception as e:
+                self.emit({"type": "error", "message": f"{type(e).__name__}: {e}"})
+            finally:
+                self.emit(self._DONE)
+
+        self.loop.run_in_executor(executor, run)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        event = await self.queue.get()
+        if event is self._DONE:
+            raise StopAsyncIteration
+        return event
+
+
+def create_executor(workers=DEFAULT_WORKERS):
+    """Thread pool for the blocking pipeline stages of every session"""
+    return ThreadPoolExecutor(max_workers=workers, thread_name_prefix="voice")